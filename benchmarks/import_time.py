@@ -0,0 +1,82 @@
+"""
+Measures how long `import uberduck` and the first use of its entry points take in a fresh interpreter.
+
+Run from the repository root with `python -m benchmarks.import_time`. Every statement is timed `-n` times, each in a new
+Python process so that nothing is already imported, and the median is reported with the heavy dependencies it pulled in.
+`--budget-ms` makes the run fail (exit status 1) when the median of `import uberduck` is above the budget, so it can
+guard against an eager import creeping back in. `--top` prints the slowest modules of `python -X importtime`.
+"""
+from argparse import ArgumentParser
+from statistics import median
+import subprocess
+import sys
+
+STATEMENTS = (
+    'import uberduck',
+    'from uberduck import UberDuck',
+    'import uberduck; uberduck.SpeechAudio',
+    'import uberduck; uberduck.Pipeline'
+)
+DEPENDENCIES = ('requests', 'aiohttp', 'pydub', 'numpy')
+
+_PROBE = '''
+import sys
+from time import perf_counter
+start = perf_counter()
+exec({statement!r})
+elapsed = perf_counter() - start
+print(elapsed, *(name for name in {dependencies!r} if name in sys.modules))
+'''
+
+def measure(statement: str) -> tuple:
+    """
+    Runs `statement` in a new interpreter and returns the seconds it took and the dependencies it imported.
+    """
+    output = subprocess.run(
+        [sys.executable, '-W', 'ignore', '-c', _PROBE.format(statement = statement, dependencies = DEPENDENCIES)],
+        check = True, capture_output = True, text = True
+    ).stdout.split()
+    return float(output[0]), output[1:]
+
+def top_modules(statement: str, count: int) -> list:
+    """
+    Returns the `count` modules with the largest cumulative import time (in microseconds) reported by `python -X importtime`,
+    leaving out the modules imported by the interpreter at startup.
+    """
+    stderr = subprocess.run(
+        [sys.executable, '-W', 'ignore', '-X', 'importtime', '-c', statement], check = True, capture_output = True, text = True
+    ).stderr
+    modules = []
+    for line in stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        if fields[2].rstrip() == ' site': # the last module imported at startup
+            modules = []
+            continue
+        modules.append((int(fields[1]), fields[2].strip()))
+    return sorted(modules, reverse = True)[:count]
+
+def main() -> None:
+    parser = ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--runs', type = int, default = 7, help = 'fresh interpreters per statement')
+    parser.add_argument('--budget-ms', type = float, default = None, help = 'fail if `import uberduck` takes longer than this')
+    parser.add_argument('--top', type = int, default = 0, help = 'print the slowest modules of `import uberduck`')
+    args = parser.parse_args()
+
+    results = {}
+    for statement in STATEMENTS:
+        runs = [measure(statement) for _ in range(args.runs)]
+        results[statement] = median(elapsed for elapsed, _ in runs) * 1000
+        imported = ', '.join(runs[-1][1]) or 'none'
+        print(f'{statement:<52} {results[statement]:8.1f} ms   imports {imported}')
+    if args.top:
+        print(f'\nslowest modules of `{STATEMENTS[0]}`:')
+        for microseconds, module in top_modules(STATEMENTS[0], args.top):
+            print(f'{microseconds / 1000:8.1f} ms   {module}')
+    if args.budget_ms is not None and results[STATEMENTS[0]] > args.budget_ms:
+        print(f'\n`{STATEMENTS[0]}` took {results[STATEMENTS[0]]:.1f} ms, over the budget of {args.budget_ms:g} ms.')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Measures the throughput and resource use of the synchronous and asynchronous clients against the mock API at increasing concurrency.
+
+Run from the repository root with `python -m benchmarks.load`. At each concurrency level, `-n` jobs are spoken with
+`speak` from a pool of threads and with `speak_async` from tasks. Each run reports jobs per second, p50 and p99 latency,
+and the peak number of open sockets, threads and resident memory of the client process, sampled while the jobs run.
+The mock API runs in a separate process so that its own sockets and threads are not counted. `--render-delay`,
+`--error-rate` and `--ratelimit-rate` configure it; injected failures are retried with `uberduck.RetryPolicy`.
+"""
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pipe, Process
+from threading import Event, Thread, active_count
+from time import perf_counter
+import asyncio
+import os
+
+from benchmarks.mock_server import MockServer
+from uberduck import UberDuck, RetryPolicy
+
+def _serve(connection, options: dict) -> None:
+    with MockServer(**options) as server:
+        connection.send(server.url)
+        connection.recv() # blocks until the benchmark is done
+        connection.send(server.stats())
+
+def _open_sockets() -> int:
+    """
+    Returns the number of sockets open in this process, or -1 where `/proc` is not available.
+    """
+    try:
+        descriptors = os.listdir('/proc/self/fd')
+    except OSError:
+        return -1
+    sockets = 0
+    for descriptor in descriptors:
+        try:
+            sockets += os.readlink(f'/proc/self/fd/{descriptor}').startswith('socket:')
+        except OSError: # closed while listing
+            pass
+    return sockets
+
+def _rss() -> int:
+    """
+    Returns the resident memory of this process in bytes, or its peak where `/proc` is not available.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class _Sampler:
+    """
+    Samples the open sockets, threads and resident memory every `interval` seconds from a background thread, keeping the peaks.
+    """
+    def __init__(self, interval: float = 0.02) -> None:
+        self.interval = interval
+        self.sockets = self.threads = self.rss = 0
+        self._stopped = Event()
+        self._thread = Thread(target = self._run, daemon = True)
+
+    def _sample(self) -> None:
+        self.sockets = max(self.sockets, _open_sockets())
+        self.threads = max(self.threads, active_count() - 1) # without the sampler
+        self.rss = max(self.rss, _rss())
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> '_Sampler':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._stopped.set()
+        self._thread.join()
+        self._sample()
+
+def _client(url: str, concurrency: int, args) -> UberDuck:
+    retry_policy = RetryPolicy(budget = args.jobs) if args.error_rate or args.ratelimit_rate else None
+    return UberDuck('key', 'secret', base_url = url, pool_size = max(concurrency, 1), retry_policy = retry_policy)
+
+def _run_sync(url: str, concurrency: int, args) -> tuple:
+    with _client(url, concurrency, args) as client:
+        def job(i: int):
+            start = perf_counter()
+            try:
+                client.speak(f'Benchmark job {i}.', 'voice1', check_every = args.check_every)
+            except Exception:
+                return None
+            return perf_counter() - start
+        with _Sampler() as sampler, ThreadPoolExecutor(max_workers = concurrency) as executor:
+            start = perf_counter()
+            latencies = list(executor.map(job, range(args.jobs)))
+            elapsed = perf_counter() - start
+    return elapsed, latencies, sampler
+
+async def _run_async(url: str, concurrency: int, args) -> tuple:
+    async with _client(url, concurrency, args) as client:
+        semaphore = asyncio.Semaphore(concurrency)
+        async def job(i: int):
+            async with semaphore:
+                start = perf_counter()
+                try:
+                    await client.speak_async(f'Benchmark job {i}.', 'voice1', check_every = args.check_every)
+                except Exception:
+                    return None
+                return perf_counter() - start
+        with _Sampler() as sampler:
+            start = perf_counter()
+            latencies = await asyncio.gather(*(job(i) for i in range(args.jobs)))
+            elapsed = perf_counter() - start
+    return elapsed, latencies, sampler
+
+def _report(mode: str, concurrency: int, elapsed: float, latencies: list, sampler: _Sampler) -> None:
+    succeeded = sorted(latency for latency in latencies if latency is not None)
+    failed = len(latencies) - len(succeeded)
+    p50 = succeeded[len(succeeded) // 2] * 1000 if succeeded else float('nan')
+    p99 = succeeded[min(len(succeeded) - 1, int(len(succeeded) * 0.99))] * 1000 if succeeded else float('nan')
+    print(
+        f'{mode:<6}{concurrency:>6} {len(succeeded) / elapsed:9.1f} jobs/s   p50 {p50:8.2f} ms   p99 {p99:8.2f} ms   '
+        f'sockets {sampler.sockets:>4}   threads {sampler.threads:>4}   rss {sampler.rss / 2 ** 20:7.1f} MiB   failed {failed}'
+    )
+
+def main() -> None:
+    parser = ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--jobs', type = int, default = 200, help = 'jobs per measurement')
+    parser.add_argument('-c', '--concurrency', type = int, nargs = '+', default = [1, 4, 16, 64], help = 'concurrency levels to measure')
+    parser.add_argument('--mode', choices = ('sync', 'async', 'both'), default = 'both')
+    parser.add_argument('--check-every', type = float, default = 0.05, help = 'seconds between status checks')
+    parser.add_argument('--audio-bytes', type = int, default = 32000, help = 'size of the sample data of the audio')
+    parser.add_argument('--render-delay', type = float, nargs = '+', default = [0.0], metavar = 'SECONDS', help = 'delay before audio is ready, or a low and high bound')
+    parser.add_argument('--error-rate', type = float, default = 0.0, help = 'fraction of requests answered with a 503')
+    parser.add_argument('--ratelimit-rate', type = float, default = 0.0, help = 'fraction of requests answered with a 429')
+    parser.add_argument('--retry-after', type = float, default = 0.1, help = 'Retry-After of the injected 429s')
+    args = parser.parse_args()
+
+    options = {
+        'audio_bytes': args.audio_bytes,
+        'render_delay': args.render_delay[0] if len(args.render_delay) == 1 else tuple(args.render_delay[:2]),
+        'error_rate': args.error_rate, 'ratelimit_rate': args.ratelimit_rate, 'retry_after': args.retry_after, 'seed': 0
+    }
+    connection, server_connection = Pipe()
+    server = Process(target = _serve, args = (server_connection, options), daemon = True)
+    server.start()
+    url = connection.recv()
+    print(f'{args.jobs} jobs per run, {args.audio_bytes / 1024:.0f} KiB audio, render delay {options["render_delay"]} s, {os.cpu_count()} CPUs')
+    print(f'{"mode":<6}{"conc.":>6}')
+    try:
+        for concurrency in args.concurrency:
+            if args.mode in ('sync', 'both'):
+                _report('sync', concurrency, *_run_sync(url, concurrency, args))
+            if args.mode in ('async', 'both'):
+                _report('async', concurrency, *asyncio.run(_run_async(url, concurrency, args)))
+    finally:
+        connection.send(None)
+        print('server', connection.recv())
+        server.join()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""
+A local stand-in for the UberDuck API, used by the benchmarks in this directory and for testing without network access.
+
+It implements `POST /speak`, `GET /speak-status`, `GET /voices` (with `ETag` revalidation) and `GET /audio/<uuid>.wav`
+(with `Range` requests). Audio is reported as ready `render_delay` seconds after it was submitted, and any request can be
+answered with a 429 or a server error at a configurable rate. Run `python -m benchmarks.mock_server --help` to serve it
+on a fixed port.
+"""
+from argparse import ArgumentParser
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from random import Random
+from threading import Lock, Thread
+from time import monotonic, sleep, time
+from typing import Optional, Tuple, Union
+from urllib.parse import urlparse, parse_qs
+from uuid import uuid4
+from hashlib import sha256
+import json
+import re
+import struct
+
+def make_wav(n_bytes: int = 32000, sample_rate: int = 16000) -> bytes:
+    """
+    Returns a silent mono 16-bit WAV file with `n_bytes` bytes of sample data.
+    """
+    header = b'RIFF' + struct.pack('<I', 36 + n_bytes) + b'WAVE'
+    header += b'fmt ' + struct.pack('<IHHIIHH', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    header += b'data' + struct.pack('<I', n_bytes)
+    return header + bytes(n_bytes)
+
+def make_voices(n_voices: int = 100) -> list:
+    """
+    Returns a synthetic voice list shaped like the one of `/voices?mode=tts-basic`.
+    """
+    categories = ('Anime', 'Cartoons', 'Games', 'Music', 'Politics')
+    return [{
+        'architecture': 'tacotron2' if i % 3 else 'radtts',
+        'category': categories[i % len(categories)],
+        'contributors': [f'contributor{i % 7}'],
+        'controls': bool(i % 2),
+        'display_name': f'Voice {i}',
+        'is_active': i % 10 != 0,
+        'model_id': f'model-{i}',
+        'memberships': [],
+        'is_private': False,
+        'name': f'voice{i}',
+        'symbol_set': 'english_basic',
+        'voicemodel_uuid': f'00000000-0000-0000-0000-{i:012d}',
+        'added_at': 1640000000.0 + i,
+        'is_primary': i % 4 == 0,
+        'hifi_gan_vocoder': 'universal',
+        'ml_model_id': i,
+        'speaker_id': None,
+        'language': 'english' if i % 5 else 'spanish'
+    } for i in range(n_voices)]
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # keeps connections alive so that pooled clients can reuse them
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = 'application/json', headers: Optional[dict] = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _inject(self, path: str) -> bool:
+        """
+        Answers with a 429 or a server error instead of the real response, at the rates of the server. Returns True if it did.
+        """
+        server = self.server
+        status = server.pick_failure()
+        server.count(path, status)
+        if status == 429:
+            self._send(429, b'{"detail": "Too Many Requests"}', headers = {'Retry-After': str(server.retry_after)})
+            return True
+        if status is not None:
+            self._send(status, b'{"detail": "Injected server error"}')
+            return True
+        return False
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if urlparse(self.path).path != '/speak':
+            return self._send(404, b'{"detail": "Not Found"}')
+        if self._inject('/speak'):
+            return
+        uuid = str(uuid4())
+        self.server.submit(uuid)
+        self._send(200, json.dumps({'uuid': uuid}).encode())
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path == '/speak-status':
+            if self._inject('/speak-status'):
+                return
+            uuid = parse_qs(url.query)['uuid'][0]
+            if not self.server.is_ready(uuid):
+                return self._send(200, json.dumps({'path': None, 'started_at': time(), 'finished_at': None}).encode())
+            path = f'{self.server.url}/audio/{uuid}.wav'
+            return self._send(200, json.dumps({'path': path, 'finished_at': time()}).encode())
+        if url.path == '/voices':
+            if self._inject('/voices'):
+                return
+            if self.headers.get('If-None-Match') == self.server.voices_etag:
+                self.send_response(304)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('ETag', self.server.voices_etag)
+            self.send_header('Content-Length', str(len(self.server.voices)))
+            self.end_headers()
+            self.wfile.write(self.server.voices)
+            return
+        if url.path.startswith('/audio/'):
+            if self._inject('/audio'):
+                return
+            wav = self.server.wav
+            match = re.fullmatch(r'bytes=(\d+)-', self.headers.get('Range', ''))
+            if match and int(match.group(1)) < len(wav):
+                start = int(match.group(1))
+                return self._send(206, wav[start:], 'audio/wav', {'Content-Range': f'bytes {start}-{len(wav) - 1}/{len(wav)}'})
+            return self._send(200, wav, 'audio/wav')
+        self._send(404, b'{"detail": "Not Found"}')
+
+class _Server(ThreadingHTTPServer):
+    """
+    The HTTP server holding the state shared by the handlers: the payloads, the submitted jobs and the request counters.
+    """
+    daemon_threads = True
+
+    def __init__(self, port: int, render_delay: Union[float, Tuple[float, float]], error_rate: float, ratelimit_rate: float, error_status: int, retry_after: float, seed: Optional[int]) -> None:
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.url = f'http://127.0.0.1:{self.server_port}'
+        self.render_delay = render_delay
+        self.error_rate = error_rate
+        self.ratelimit_rate = ratelimit_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.jobs = {}
+        self.requests = Counter()
+        self._random = Random(seed)
+        self._lock = Lock()
+
+    def pick_failure(self) -> Optional[int]:
+        if not self.error_rate and not self.ratelimit_rate:
+            return None
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.ratelimit_rate:
+            return 429
+        if roll < self.ratelimit_rate + self.error_rate:
+            return self.error_status
+        return None
+
+    def count(self, path: str, status: Optional[int]) -> None:
+        with self._lock:
+            self.requests[path] += 1
+            if status is not None:
+                self.requests[status] += 1
+
+    def submit(self, uuid: str) -> None:
+        delay = self.render_delay
+        if isinstance(delay, tuple):
+            with self._lock:
+                delay = self._random.uniform(*delay)
+        with self._lock:
+            self.jobs[uuid] = monotonic() + delay
+
+    def is_ready(self, uuid: str) -> bool:
+        with self._lock:
+            ready_at = self.jobs.get(uuid)
+            if ready_at is None or monotonic() >= ready_at: # unknown UUIDs are ready, so that status checks can be benchmarked alone
+                self.jobs.pop(uuid, None)
+                return True
+            return False
+
+class MockServer:
+    """
+    Runs the mock API on `127.0.0.1` in a background thread. Use `url` as the `base_url` of `uberduck.UberDuck`.
+
+    `audio_bytes` and `n_voices` set the size of the audio and of the voice list. `render_delay` is the number of seconds
+    (or a `(low, high)` range to pick from at random) between a submission and its audio being reported as ready.
+    `ratelimit_rate` and `error_rate` are the fractions of requests answered with a 429 (with a `Retry-After` of
+    `retry_after` seconds) or with `error_status`. `seed` makes the injected failures and delays reproducible.
+    """
+    def __init__(
+        self,
+        port: int = 0,
+        audio_bytes: int = 32000,
+        n_voices: int = 100,
+        *,
+        render_delay: Union[float, Tuple[float, float]] = 0.0,
+        error_rate: float = 0.0,
+        ratelimit_rate: float = 0.0,
+        error_status: int = 503,
+        retry_after: float = 1,
+        seed: Optional[int] = None
+    ) -> None:
+        self._server = _Server(port, render_delay, error_rate, ratelimit_rate, error_status, retry_after, seed)
+        self.url = self._server.url
+        self._server.wav = make_wav(audio_bytes)
+        self._server.voices = json.dumps(make_voices(n_voices)).encode()
+        self._server.voices_etag = f'"{sha256(self._server.voices).hexdigest()[:16]}"'
+        self._thread = Thread(target = self._server.serve_forever, daemon = True)
+
+    def __enter__(self) -> 'MockServer':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> dict:
+        """
+        Returns the number of requests to each path and the number of injected responses of each status code.
+        """
+        with self._server._lock:
+            return {str(key): value for key, value in self._server.requests.items()}
+
+def main() -> None:
+    parser = ArgumentParser(description = 'Serves the mock UberDuck API until interrupted.')
+    parser.add_argument('--port', type = int, default = 8000)
+    parser.add_argument('--audio-bytes', type = int, default = 32000, help = 'size of the sample data of the audio')
+    parser.add_argument('--voices', type = int, default = 100, help = 'number of voices in /voices')
+    parser.add_argument('--render-delay', type = float, nargs = '+', default = [0.0], metavar = 'SECONDS', help = 'delay before audio is ready, or a low and high bound')
+    parser.add_argument('--error-rate', type = float, default = 0.0, help = 'fraction of requests answered with --error-status')
+    parser.add_argument('--error-status', type = int, default = 503)
+    parser.add_argument('--ratelimit-rate', type = float, default = 0.0, help = 'fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type = float, default = 1)
+    parser.add_argument('--seed', type = int)
+    args = parser.parse_args()
+    delay = args.render_delay[0] if len(args.render_delay) == 1 else tuple(args.render_delay[:2])
+    with MockServer(
+        args.port, args.audio_bytes, args.voices,
+        render_delay = delay, error_rate = args.error_rate, ratelimit_rate = args.ratelimit_rate,
+        error_status = args.error_status, retry_after = args.retry_after, seed = args.seed
+    ) as server:
+        print(f'Serving the mock API on {server.url}')
+        try:
+            while True:
+                sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == '__main__':
+    main()
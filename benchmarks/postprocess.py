@@ -0,0 +1,63 @@
+"""
+Measures how many clips per second `uberduck.Pipeline` post-processes with increasing numbers of worker processes.
+
+Run from the repository root with `python -m benchmarks.postprocess`. Every clip is a few seconds of noisy tone with
+silence around it, processed by trimming, normalizing and resampling. Encoding to MP3 or OGG needs ffmpeg and is only
+measured with `--format mp3` (or any other format ffmpeg supports).
+"""
+from argparse import ArgumentParser
+from math import pi, sin
+from random import Random
+from time import perf_counter
+import array
+import os
+import struct
+
+from uberduck import Pipeline, TrimSilence, Normalize, Resample, Encode
+
+def make_clip(seconds: float = 3.0, sample_rate: int = 22050, silence: float = 0.5, seed: int = 0) -> bytes:
+    """
+    Returns a mono 16-bit WAV file of a noisy 220 Hz tone with `silence` seconds of silence before and after it.
+    """
+    random = Random(seed)
+    quiet = [0] * int(silence * sample_rate)
+    tone = [int(8000 * sin(2 * pi * 220 * i / sample_rate) + random.gauss(0, 500)) for i in range(int(seconds * sample_rate))]
+    samples = array.array('h', quiet + tone + quiet).tobytes()
+    header = b'RIFF' + struct.pack('<I', 36 + len(samples)) + b'WAVE'
+    header += b'fmt ' + struct.pack('<IHHIIHH', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    header += b'data' + struct.pack('<I', len(samples))
+    return header + samples
+
+def _measure(pipeline: Pipeline, clips: list) -> float:
+    if pipeline.processes:
+        pipeline.submit(clips[0]).result() # start the workers before timing
+    start = perf_counter()
+    if pipeline.processes:
+        for future in [pipeline.submit(clip) for clip in clips]:
+            future.result()
+    else:
+        for clip in clips:
+            pipeline.run(clip)
+    return len(clips) / (perf_counter() - start)
+
+def main() -> None:
+    parser = ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--clips', type = int, default = 64, help = 'clips per measurement')
+    parser.add_argument('--format', default = 'wav', help = 'output format of the pipeline')
+    parser.add_argument('--max-processes', type = int, default = os.cpu_count() or 1, help = 'the largest pool to measure')
+    args = parser.parse_args()
+
+    clips = [make_clip(seed = i) for i in range(args.clips)]
+    counts = [0] + sorted({1, 2, 4, 8, 16, args.max_processes} & set(range(1, args.max_processes + 1)))
+    print(f'{len(clips)} clips of {len(clips[0]) / 1024:.0f} KiB, {os.cpu_count()} CPUs')
+    baseline = None
+    for processes in counts:
+        steps = (TrimSilence(padding_ms = 50), Normalize(-18), Resample(16000), Encode(args.format))
+        with Pipeline(*steps, processes = processes) as pipeline:
+            rate = _measure(pipeline, clips)
+        baseline = baseline or rate
+        label = 'calling thread' if not processes else f'{processes} processes'
+        print(f'{label:<16} {rate:8.1f} clips/s   x{rate / baseline:.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Compares per-request latency of one-off connections against the pooled sessions of `uberduck.UberDuck`.
+
+Run from the repository root with `python -m benchmarks.session_latency`. The mock server is plain HTTP, so the
+TLS handshake that the real API adds to every new connection is not included and the real gap is larger.
+"""
+from argparse import ArgumentParser
+from statistics import median
+from time import perf_counter
+import asyncio
+
+import aiohttp
+import requests
+
+from benchmarks.mock_server import MockServer
+from uberduck import UberDuck
+
+def _report(label: str, timings: list) -> None:
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f'{label:<36} p50 {median(timings) * 1000:7.3f} ms   p99 {p99 * 1000:7.3f} ms')
+
+def _time_sync(function, n: int) -> list:
+    timings = []
+    for _ in range(n):
+        start = perf_counter()
+        function()
+        timings.append(perf_counter() - start)
+    return timings
+
+async def _time_async(function, n: int) -> list:
+    timings = []
+    for _ in range(n):
+        start = perf_counter()
+        await function()
+        timings.append(perf_counter() - start)
+    return timings
+
+async def _async_benchmarks(client: UberDuck, url: str, n: int) -> None:
+    async def fresh():
+        async with aiohttp.request('GET', url) as response:
+            await response.read()
+    async def pooled():
+        async with client._get_async_session().get(url) as response:
+            await response.read()
+    _report('async status, fresh connection', await _time_async(fresh, n))
+    _report('async status, pooled session', await _time_async(pooled, n))
+    _report('speak_async(), pooled session', await _time_async(lambda: client.speak_async('hello', 'mock', check_every = 0), n))
+    await client.close_async()
+
+def main() -> None:
+    parser = ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--requests', type = int, default = 500, help = 'requests per measurement')
+    args = parser.parse_args()
+
+    with MockServer() as server, UberDuck('key', 'secret', base_url = server.url) as client:
+        url = f'{server.url}/speak-status?uuid=benchmark'
+        _report('sync status, fresh connection', _time_sync(lambda: requests.get(url).content, args.requests))
+        _report('sync status, pooled session', _time_sync(lambda: client.session.get(url).content, args.requests))
+        _report('speak(), pooled session', _time_sync(lambda: client.speak('hello', 'mock', check_every = 0), args.requests))
+        asyncio.run(_async_benchmarks(client, url, args.requests))
+
+if __name__ == '__main__':
+    main()
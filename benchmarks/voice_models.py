@@ -0,0 +1,45 @@
+"""
+Measures the time and peak memory of turning a large synthetic voice list into models.
+
+Run from the repository root with `python -m benchmarks.voice_models`. `eager __dict__` is a copy of the previous `Voice`
+model, which parsed `added_at` and `memberships` up front and stored its attributes in a per-instance dictionary.
+"""
+from argparse import ArgumentParser
+from datetime import datetime as dt
+from time import perf_counter
+import tracemalloc
+
+from benchmarks.mock_server import make_voices
+from uberduck import Voice, VoiceColumns, Membership
+
+class _EagerVoice:
+    def __init__(self, **voice) -> None:
+        self.__dict__.update(voice)
+        if self.memberships:
+            self.memberships = [Membership(*self.memberships)]
+        self.added_at = dt.fromtimestamp(self.added_at)
+
+def _measure(label: str, build, raw: list, n_voices: int) -> None:
+    tracemalloc.start()
+    start = perf_counter()
+    models = build(raw)
+    elapsed = perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:<32} {elapsed * 1000:8.1f} ms   peak {peak / 1024 / 1024:7.1f} MiB   {peak / n_voices:6.0f} B/voice')
+    del models
+
+def main() -> None:
+    parser = ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--voices', type = int, default = 50000, help = 'number of synthetic voices')
+    args = parser.parse_args()
+
+    raw = make_voices(args.voices)
+    _measure('eager __dict__', lambda raw: [_EagerVoice(**voice) for voice in raw], raw, args.voices)
+    _measure('__slots__, lazy parsing', lambda raw: [Voice(**voice) for voice in raw], raw, args.voices)
+    _measure('__slots__, then added_at', lambda raw: [(voice, voice.added_at) for voice in (Voice(**v) for v in raw)], raw, args.voices)
+    _measure('columnar', VoiceColumns, raw, args.voices)
+    _measure('columnar, filter by name', lambda raw: [voice for voice in VoiceColumns(raw).names if voice.endswith('7')], raw, args.voices)
+
+if __name__ == '__main__':
+    main()
@@ -13,7 +13,7 @@ for line in lines:
         break
 
 dependencies = [
-    'requests', 'aiohttp', 'polling', 'pydub', 'simpleaudio'
+    'requests', 'aiohttp', 'pydub', 'simpleaudio'
 ]
 if version_info < (3,8):
     dependencies.append('typing_extensions')
@@ -9,9 +9,47 @@ The above copyright notice and this permission notice shall be included in all c
 
 THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
-from uberduck.main import UberDuck, get_voices, get_voices_async
 from uberduck.classes import *
+from typing import Dict as _Dict
 import logging as _logging
+import sys as _sys
+
+# The rest of the package is imported on first access, so that `import uberduck` does not pay for requests, aiohttp and pydub.
+# For example, `uberduck.UberDuck` imports `uberduck.main` (and requests) but not aiohttp, which is only imported by the asynchronous functions.
+_LAZY: _Dict[str, str] = {
+    'UberDuck': 'main', 'get_voices': 'main', 'get_voices_async': 'main',
+    'PollStrategy': 'strategies', 'FixedInterval': 'strategies', 'ExponentialBackoff': 'strategies', 'AdaptivePolling': 'strategies',
+    'SpeechCache': 'cache', 'cache_key': 'cache',
+    'VoiceCatalog': 'catalog',
+    'RateLimiter': 'ratelimit', 'TokenBucket': 'ratelimit',
+    'RetryPolicy': 'retry',
+    'SingleFlight': 'singleflight',
+    'Instrumentation': 'instrumentation', 'MetricsRegistry': 'instrumentation', 'Histogram': 'instrumentation',
+    'OTLPExporter': 'instrumentation', 'PhaseEvent': 'instrumentation', 'PHASES': 'instrumentation', 'DEFAULT_BOUNDARIES': 'instrumentation',
+    'SpeechJob': 'job',
+    'Pipeline': 'postprocess', 'Step': 'postprocess', 'Resample': 'postprocess', 'Normalize': 'postprocess',
+    'TrimSilence': 'postprocess', 'Encode': 'postprocess',
+    'SpeechAudio': 'audio', 'wav_header': 'audio',
+    'split_text': 'longform',
+    'PlaybackQueue': 'playback', 'Playback': 'playback', 'AudioSink': 'playback', 'FileSink': 'playback',
+    'FFplaySink': 'playback', 'PyAudioSink': 'playback', 'default_sink': 'playback'
+}
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    from importlib import import_module
+    value = getattr(import_module(f'{__name__}.{module}'), name)
+    globals()[name] = value # later lookups skip this function
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+if _sys.version_info < (3, 7): # module `__getattr__` (PEP 562) is not supported, import everything up front
+    for _name in _LAZY:
+        __getattr__(_name)
 
 __author__: str = 'ImNimboss'
 __license__: str = 'MIT'
@@ -22,4 +60,11 @@ DOCUMENTATION: str = 'https://github.com/ImNimboss/uberduck/tree/main/Documentat
 SPONSOR: str = 'https://patreon.com/ImNimboss'
 API_CREDITS: str = 'https://uberduck.ai'
 
+__all__ = sorted((
+    'Membership', 'Voice', 'VoiceColumns', 'SpeechResult', 'JobHandle',
+    'UberduckException', 'InvalidVoice', 'Unauthorized', 'Ratelimited', 'HTTPException', 'TimedOut',
+    'GITHUB', 'ISSUE_TRACKER', 'DOCUMENTATION', 'SPONSOR', 'API_CREDITS',
+    *_LAZY
+))
+
 _logging.getLogger(__name__).addHandler(_logging.NullHandler())
\ No newline at end of file
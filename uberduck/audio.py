@@ -0,0 +1,260 @@
+"""
+Copyright 2022-present ImNimboss
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from array import array
+from mmap import mmap, ACCESS_READ
+from os import PathLike
+from struct import Struct
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple, Union
+
+_CHUNK = Struct('<4sI')
+_FMT = Struct('<HHIIHH') # format tag, channels, sample rate, byte rate, block align, bits per sample
+_TAG = Struct('<H')
+_PCM, _IEEE_FLOAT, _EXTENSIBLE = 1, 3, 0xFFFE
+_CASTS = {(_PCM, 1): 'B', (_PCM, 2): 'h', (_PCM, 4): 'i', (_IEEE_FLOAT, 4): 'f', (_IEEE_FLOAT, 8): 'd'}
+_DTYPES = {(_PCM, 1): 'u1', (_PCM, 2): '<i2', (_PCM, 4): '<i4', (_IEEE_FLOAT, 4): '<f4', (_IEEE_FLOAT, 8): '<f8'}
+
+def wav_header(data_length: int, sample_rate: int, channels: int, sample_width: int, format_tag: int = _PCM) -> bytes:
+    """
+    Returns the 44-byte header of a WAV file holding `data_length` bytes of samples.
+    """
+    block_align = channels * sample_width
+    return (
+        b'RIFF' + (36 + data_length).to_bytes(4, 'little') + b'WAVE'
+        + _CHUNK.pack(b'fmt ', _FMT.size) + _FMT.pack(format_tag, channels, sample_rate, sample_rate * block_align, block_align, sample_width * 8)
+        + _CHUNK.pack(b'data', data_length)
+    )
+
+def _find_samples(buffer: memoryview) -> Optional[Tuple[Tuple[int, int, int, int, int, int], int, int]]:
+    """
+    A private function that walks the chunks at the start of a WAV file and returns the fields of its format chunk, and the offset and declared size of its samples.
+    Returns None if `buffer` ends before the samples start, so that it can be called again on a longer prefix of a stream.
+    """
+    if len(buffer) >= 12 and (buffer[:4] != b'RIFF' or buffer[8:12] != b'WAVE'):
+        raise ValueError('The audio is not a WAV file.')
+    fmt = None
+    position = 12
+    while position + _CHUNK.size <= len(buffer):
+        name, size = _CHUNK.unpack_from(buffer, position)
+        position += _CHUNK.size
+        if name == b'fmt ':
+            if position + max(_FMT.size, min(size, 26)) > len(buffer): # the rest of the format chunk has not arrived yet
+                return None
+            fmt = _FMT.unpack_from(buffer, position)
+            if fmt[0] == _EXTENSIBLE and size >= 26:
+                fmt = (_TAG.unpack_from(buffer, position + 24)[0],) + fmt[1:] # the first field of the sub-format GUID
+        elif name == b'data':
+            if fmt is None:
+                raise ValueError('The WAV file has no format chunk before its samples.')
+            return fmt, position, size
+        position += size + (size & 1) # chunks are padded to an even size
+    return None
+
+def _parse(buffer: memoryview) -> Tuple[int, int, int, int, int, int]:
+    """
+    A private function that walks the chunks of a WAV file once and returns its format tag, channels, sample rate, sample width, and the offset and length of its samples.
+    """
+    if len(buffer) < 12:
+        raise ValueError('The audio is not a WAV file.')
+    found = _find_samples(buffer)
+    if found is None:
+        raise ValueError('The WAV file has no samples.')
+    (format_tag, channels, sample_rate, _, block_align, bits), position, size = found
+    length = min(size, len(buffer) - position) # streamed WAV files have a placeholder size
+    length -= length % block_align
+    return format_tag, channels, sample_rate, bits // 8, position, length
+
+def _crossfade(tail: memoryview, head: memoryview, channels: int, cast: Optional[str]) -> memoryview:
+    """
+    A private function that mixes the end of one clip into the start of the next with a linear crossfade.
+    """
+    if cast is None:
+        raise ValueError('Only 8, 16 and 32-bit audio can be crossfaded.')
+    tail, head = tail.cast(cast), head.cast(cast)
+    frames = len(tail) // channels
+    integer = cast in 'Bhi'
+    mixed = array(cast, tail)
+    for i in range(len(mixed)):
+        weight = (i // channels + 1) / (frames + 1)
+        value = tail[i] + (head[i] - tail[i]) * weight
+        mixed[i] = round(value) if integer else value
+    return memoryview(mixed).cast('B')
+
+def _stitch(clips: List['SpeechAudio'], block_align: int, gap: int, overlap: int, silence: bytes) -> Iterator[memoryview]:
+    """
+    A private generator yielding the pieces of the joined samples: views of the clips, silence between them, and their crossfaded overlaps.
+    """
+    mixed = 0 # the number of bytes at the start of the current clip that were already crossfaded
+    for i, clip in enumerate(clips):
+        data = clip.data
+        last = i == len(clips) - 1
+        if overlap and not last:
+            following = clips[i + 1].data
+            frames = min(overlap, (len(data) - mixed) // block_align, len(following) // block_align)
+            end = len(data) - frames * block_align
+            yield data[mixed:end]
+            yield _crossfade(data[end:], following[:frames * block_align], clip.channels, _CASTS.get((clip._format_tag, clip.sample_width)))
+            mixed = frames * block_align
+        else:
+            yield data[mixed:]
+            mixed = 0
+            if gap and not last:
+                yield memoryview(silence)
+
+class SpeechAudio:
+    """
+    A WAV file returned by `speak(..., return_audio = True)`, whose header is parsed once and whose samples are never copied.
+
+    Initialization parameters:
+        `data (bytes | bytearray | memoryview | mmap)` - The WAV file.
+
+    Attributes:
+        `sample_rate (int)` - The number of frames per second.
+        `channels (int)` - The number of channels.
+        `sample_width (int)` - The number of bytes per sample.
+        `frames (int)` - The number of frames (samples per channel).
+        `duration (float)` - The length of the audio in seconds.
+        `path (str | None)` - The path of the file the audio is memory-mapped from, if any.
+
+    Functions:
+        `from_file(path: str)` - A class method that memory-maps a WAV file instead of reading it.
+        `samples()` - Returns the samples as a `memoryview` of integers (or floats) over the original buffer.
+        `to_numpy()` - Returns the samples as a NumPy array of shape (frames, channels) sharing memory with the original buffer.
+        `concatenate(clips: Iterable[SpeechAudio], file: BinaryIO = None, *, padding_ms: float = 0, crossfade_ms: float = 0)` - A class method that joins clips of the same format into one WAV file, in memory or written to `file`, optionally with silence or a crossfade between them.
+        `save(file: str | BinaryIO)` - Writes the WAV file to a path or an open binary file object.
+        `close()` - Releases the memory map, if any.
+
+    Magic methods:
+        `__bytes__`: Returns the whole WAV file as bytes, without copying if it already is bytes.
+        `__len__`: Returns the size of the WAV file in bytes.
+        `__repr__`: Returns a string representation in the format `<SpeechAudio duration={duration} sample_rate={sample_rate} channels={channels}>`.
+    """
+    __slots__ = ('_data', '_view', 'path', '_format_tag', 'channels', 'sample_rate', 'sample_width', '_offset', '_length')
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview, mmap], path: Optional[str] = None) -> None:
+        self._data = data
+        self._view = memoryview(data)
+        self.path = path
+        self._format_tag, self.channels, self.sample_rate, self.sample_width, self._offset, self._length = _parse(self._view)
+
+    @classmethod
+    def from_file(cls, path: Union[str, PathLike]) -> 'SpeechAudio':
+        """
+        Memory-maps the WAV file at `path`, so that only the parts that are used are read from the disk.
+        """
+        with open(path, 'rb') as file:
+            mapped = mmap(file.fileno(), 0, access = ACCESS_READ)
+        return cls(mapped, str(path))
+
+    @property
+    def frames(self) -> int:
+        return self._length // (self.channels * self.sample_width)
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate
+
+    @property
+    def data(self) -> memoryview:
+        """
+        The raw sample bytes, as a `memoryview` over the original buffer.
+        """
+        return self._view[self._offset:self._offset + self._length]
+
+    def samples(self) -> memoryview:
+        """
+        Returns the interleaved samples as a `memoryview` of integers (or floats for IEEE float audio) over the original buffer. 24-bit audio is returned as bytes.
+        """
+        cast = _CASTS.get((self._format_tag, self.sample_width))
+        return self.data if cast is None else self.data.cast(cast)
+
+    def to_numpy(self):
+        """
+        Returns the samples as a read-only NumPy array of shape (frames, channels) that shares memory with the original buffer. Requires NumPy.
+        """
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError('`SpeechAudio.to_numpy` requires NumPy, install it with `pip install numpy`.') from None
+        dtype = _DTYPES.get((self._format_tag, self.sample_width))
+        if dtype is None:
+            raise ValueError(f'{self.sample_width * 8}-bit audio cannot be viewed as a NumPy array.')
+        return numpy.frombuffer(self.data, dtype = dtype).reshape(-1, self.channels)
+
+    def _format(self) -> Tuple[int, int, int, int]:
+        return self._format_tag, self.channels, self.sample_rate, self.sample_width
+
+    @classmethod
+    def concatenate(
+        cls,
+        clips: Iterable['SpeechAudio'],
+        file: Optional[BinaryIO] = None,
+        *,
+        padding_ms: float = 0,
+        crossfade_ms: float = 0
+    ) -> Optional['SpeechAudio']:
+        """
+        Joins clips of the same format into one WAV file. Only one header is written and each clip's samples are copied once, into one preallocated buffer or straight to `file`.
+        `padding_ms` milliseconds of silence are put between the clips, or the last `crossfade_ms` milliseconds of each clip are faded into the next one (8, 16 and 32-bit audio only).
+        Returns the joined audio, or None if it was written to `file`.
+        """
+        clips = list(clips)
+        if not clips:
+            raise ValueError('There are no clips to concatenate.')
+        if padding_ms and crossfade_ms:
+            raise ValueError('`padding_ms` and `crossfade_ms` cannot be used together.')
+        format_ = clips[0]._format()
+        if any(clip._format() != format_ for clip in clips):
+            raise ValueError('Only clips with the same format, sample rate, channels and sample width can be concatenated.')
+        format_tag, channels, sample_rate, sample_width = format_
+        block_align = channels * sample_width
+        gap = round(sample_rate * padding_ms / 1000)
+        silence = (b'\x80' if (format_tag, sample_width) == (_PCM, 1) else b'\x00') * (gap * block_align) # 8-bit PCM is unsigned
+        pieces = list(_stitch(clips, block_align, gap, round(sample_rate * crossfade_ms / 1000), silence))
+        length = sum(len(piece) for piece in pieces)
+        header = wav_header(length, sample_rate, channels, sample_width, format_tag)
+        if file is not None:
+            file.write(header)
+            for piece in pieces:
+                file.write(piece)
+            return None
+        output = bytearray(len(header) + length)
+        output[:len(header)] = header
+        position = len(header)
+        for piece in pieces:
+            output[position:position + len(piece)] = piece
+            position += len(piece)
+        return cls(output)
+
+    def save(self, file: Union[str, PathLike, BinaryIO]) -> None:
+        """
+        Writes the WAV file to `file`, a path or an open binary file object.
+        """
+        if not isinstance(file, (str, PathLike)):
+            file.write(self._view)
+            return
+        with open(file, 'wb') as output:
+            output.write(self._view)
+
+    def close(self) -> None:
+        """
+        Releases the memory map of an audio created with `from_file`. Views returned earlier must not be used afterwards.
+        """
+        if isinstance(self._data, mmap):
+            self._view.release()
+            self._data.close()
+
+    def __bytes__(self):
+        return self._data if isinstance(self._data, bytes) else bytes(self._view)
+
+    def __len__(self):
+        return len(self._view)
+
+    def __repr__(self):
+        return f'<SpeechAudio duration={self.duration:.2f} sample_rate={self.sample_rate} channels={self.channels}>'
@@ -0,0 +1,227 @@
+"""
+Copyright 2022-present ImNimboss
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from collections import OrderedDict
+from hashlib import sha256
+from tempfile import mkstemp
+from threading import Lock
+from time import time
+from typing import Optional, Tuple
+import os
+from logging import getLogger
+
+log = getLogger(__name__)
+
+def cache_key(speech: str, voice: str) -> str:
+    """
+    Returns the key that a (speech, voice) pair is cached under: a SHA-256 hash of the speech with its whitespace collapsed and the lowercase voice name.
+    """
+    normalized = ' '.join(speech.split())
+    return sha256(f'{normalized}\0{voice.lower()}'.encode()).hexdigest()
+
+class SpeechCache:
+    """
+    A cache of generated audio with an in-memory LRU tier and an optional on-disk tier, used through `UberDuck(..., cache = SpeechCache(...))`.
+
+    Initialization parameters:
+        `max_memory_bytes (int)` - The maximum total size of the audio kept in memory. The least recently used audio is evicted first. Defaults to 64 MiB.
+        `directory (str)` - The directory of the on-disk tier. If not specified, only the memory tier is used.
+        `max_disk_bytes (int)` - The maximum total size of the on-disk tier. The least recently used files are evicted first. Defaults to 1 GiB.
+        `ttl (float)` - The number of seconds a cached audio stays valid. If not specified, it stays valid until it is evicted.
+
+    The memory tier is shared by the threads of a process. The on-disk tier can be shared by many processes: files are written
+    atomically and every process tolerates files being evicted by another one.
+
+    Functions:
+        `get(key: str)` - Returns the cached audio bytes or None.
+        `set(key: str, data: bytes)` - Caches audio bytes.
+        `clear()` - Removes everything from both tiers.
+        `stats()` - Returns the hits (in memory and on disk), misses and evictions so far, and the size of the memory tier.
+    """
+    def __init__(
+        self,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        directory: Optional[str] = None,
+        max_disk_bytes: int = 1024 * 1024 * 1024,
+        ttl: Optional[float] = None
+    ) -> None:
+        self.max_memory_bytes = max_memory_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self._memory: 'OrderedDict[str, Tuple[bytes, float]]' = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes: Optional[int] = None # this process' running estimate, corrected whenever the directory is scanned
+        self._lock = Lock()
+        self._memory_hits = self._disk_hits = self._misses = self._evictions = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok = True)
+
+    def __repr__(self):
+        return f'<SpeechCache max_memory_bytes={self.max_memory_bytes} directory={self.directory!r} max_disk_bytes={self.max_disk_bytes} ttl={self.ttl}>'
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time() - stored_at > self.ttl
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}.wav')
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns the cached audio for `key`, or None if it is not cached or has expired.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[1]):
+                    self._memory.move_to_end(key)
+                    self._memory_hits += 1
+                    return entry[0]
+                self._remove_from_memory(key)
+        data = self._get_from_disk(key)
+        with self._lock:
+            if data is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+        return data
+
+    def _get_from_disk(self, key: str) -> Optional[bytes]:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                stored_at = os.fstat(file.fileno()).st_mtime
+                if self._expired(stored_at):
+                    data = None
+                else:
+                    data = file.read()
+        except FileNotFoundError:
+            return None
+        if data is None:
+            self._unlink(path)
+            return None
+        try:
+            os.utime(path, (time(), stored_at)) # the access time orders the files for eviction, the modification time is when they were stored
+        except FileNotFoundError:
+            pass
+        self._store_in_memory(key, data, stored_at)
+        return data
+
+    def set(self, key: str, data: bytes) -> None:
+        """
+        Caches `data` under `key` in both tiers.
+        """
+        self._store_in_memory(key, data, time())
+        if self.directory is not None:
+            self._store_on_disk(key, data)
+
+    def _store_in_memory(self, key: str, data: bytes, stored_at: float) -> None:
+        if len(data) > self.max_memory_bytes:
+            return
+        with self._lock:
+            self._remove_from_memory(key)
+            self._memory[key] = (data, stored_at)
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, (evicted, _) = self._memory.popitem(last = False)
+                self._memory_bytes -= len(evicted)
+                self._evictions += 1
+
+    def _remove_from_memory(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= len(entry[0])
+
+    def _store_on_disk(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        descriptor, temporary_path = mkstemp(dir = os.path.dirname(path), suffix = '.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(data)
+            os.replace(temporary_path, path) # atomic, so other processes never read a partial file
+        except BaseException:
+            self._unlink(temporary_path)
+            raise
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += len(data)
+            over_budget = self._disk_bytes is None or self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_from_disk()
+
+    def _scan(self) -> list:
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_dir():
+                continue
+            for file in os.scandir(entry.path):
+                if not file.name.endswith('.wav'):
+                    continue
+                try:
+                    stat = file.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_atime, stat.st_mtime, stat.st_size, file.path))
+        return files
+
+    def _evict_from_disk(self) -> None:
+        files = self._scan()
+        total = sum(size for _, _, size, _ in files)
+        target = self.max_disk_bytes * 0.9 if total > self.max_disk_bytes else self.max_disk_bytes # leave some room so that the next writes do not rescan
+        evicted = 0
+        for atime, mtime, size, path in sorted(files):
+            if total <= target and not self._expired(mtime):
+                continue
+            if self._unlink(path):
+                evicted += 1
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+            self._evictions += evicted
+        if evicted:
+            log.debug('Evicted %s files from the speech cache in %s.', evicted, self.directory)
+
+    @staticmethod
+    def _unlink(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError: # already evicted by another process
+            return False
+
+    def clear(self) -> None:
+        """
+        Removes every cached audio from both tiers.
+        """
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.directory is not None:
+            for _, _, _, path in self._scan():
+                self._unlink(path)
+            with self._lock:
+                self._disk_bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the number of hits (`memory_hits` and `disk_hits` make up `hits`), `misses` and `evictions` so far, and the size of the memory tier.
+        """
+        with self._lock:
+            return {
+                'hits': self._memory_hits + self._disk_hits,
+                'memory_hits': self._memory_hits,
+                'disk_hits': self._disk_hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'memory_bytes': self._memory_bytes,
+                'memory_items': len(self._memory)
+            }
@@ -0,0 +1,292 @@
+"""
+Copyright 2022-present ImNimboss
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from hashlib import sha256
+from tempfile import mkstemp
+from threading import Lock
+from time import time
+from typing import Dict, FrozenSet, Iterator, List, Optional, TYPE_CHECKING
+import json
+import os
+from requests import Session, get
+from uberduck.classes import Voice
+from uberduck.main import API_URL, _handle_exceptions
+from uberduck.singleflight import SingleFlight
+from logging import getLogger
+if TYPE_CHECKING:
+    from aiohttp import ClientSession
+
+log = getLogger(__name__)
+
+_INDEXED = ('category', 'language', 'architecture', 'is_active')
+
+class _Snapshot:
+    """
+    A private class holding one version of the voice list and its indexes. It is replaced as a whole on refresh so that readers never see a half-built index.
+    """
+    __slots__ = ('raw', 'voices', 'by_name', 'indexes')
+
+    def __init__(self, raw: list) -> None:
+        self.raw = raw
+        self.voices: List[Optional[Voice]] = [None] * len(raw) # built on first lookup
+        self.by_name: Dict[str, int] = {}
+        self.indexes: Dict[str, Dict[object, FrozenSet[int]]] = {}
+        building = {field: {} for field in _INDEXED}
+        for position, voice in enumerate(raw):
+            self.by_name[voice['name'].lower()] = position
+            for field, index in building.items():
+                index.setdefault(voice.get(field), []).append(position)
+        for field, index in building.items():
+            self.indexes[field] = {value: frozenset(positions) for value, positions in index.items()}
+
+    def voice(self, position: int) -> Voice:
+        voice = self.voices[position]
+        if voice is None:
+            voice = self.voices[position] = Voice(**self.raw[position])
+        return voice
+
+class VoiceCatalog:
+    """
+    A cached and indexed list of the voices of the API, which can be given to `UberDuck(..., voice_catalog = VoiceCatalog())` to reject unknown voices without sending a request.
+
+    Initialization parameters:
+        `ttl (float)` - The number of seconds the list is used before it is revalidated with the API. Defaults to 3600.
+        `path (str)` - The path of a JSON file the list is also cached in, so that it survives restarts and can be shared by processes. If not specified, the list is only kept in memory.
+        `base_url (str)` - The URL of the API. Defaults to `https://api.uberduck.ai`.
+        `retry_interval (float)` - The number of seconds after a failed refresh during which the list is not fetched again (unless `force` is True), so that an outage does not make every request fetch it. Defaults to 60.
+
+    Only one refresh runs at a time: callers that need one while it is in flight wait for it and share its result.
+    Revalidation is conditional: the `ETag` and `Last-Modified` headers of the last response are sent back, and a `304 Not Modified` response (or a body identical to the cached one) keeps the current indexes.
+
+    Functions:
+        `refresh(session: requests.Session = None, *, force: bool = False)` - Fetches or revalidates the list if it is older than `ttl` (or always if `force` is True). Returns True if the list changed.
+        `refresh_async(session: aiohttp.ClientSession = None, *, force: bool = False)` - The asynchronous version of `refresh`.
+        `get(name: str)` - Returns the `uberduck.Voice` with the given name (case-insensitive) or None.
+        `filter(*, category: str = None, language: str = None, architecture: str = None, is_active: bool = None)` - Returns the voices matching every given field, using the indexes.
+        `names()` - Returns the names of every voice.
+        `values(field: str)` - Returns every distinct value of an indexed field (`category`, `language`, `architecture` or `is_active`).
+
+    Magic methods:
+        `__contains__`: Returns whether a voice name (case-insensitive) or `uberduck.Voice` is in the catalog.
+        `__len__`: Returns the number of voices.
+        `__iter__`: Iterates over every voice as `uberduck.Voice` objects.
+    """
+    def __init__(self, ttl: float = 3600, path: Optional[str] = None, base_url: str = API_URL, retry_interval: float = 60) -> None:
+        self.ttl = ttl
+        self.path = path
+        self.base_url = base_url.rstrip('/')
+        self.retry_interval = retry_interval
+        self._snapshot: Optional[_Snapshot] = None
+        self._fetched_at = 0.0
+        self._failed_at = float('-inf')
+        self._flight = SingleFlight()
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._digest: Optional[str] = None
+        self._lock = Lock()
+        if path is not None:
+            self._load()
+
+    def __repr__(self):
+        return f'<VoiceCatalog voices={len(self)} ttl={self.ttl} path={self.path!r} stale={self.stale}>'
+
+    @property
+    def loaded(self) -> bool:
+        """
+        Whether a voice list has been loaded, from the API or from `path`.
+        """
+        return self._snapshot is not None
+
+    @property
+    def stale(self) -> bool:
+        """
+        Whether the list is older than `ttl` seconds and will be revalidated by the next `refresh`.
+        """
+        return time() - self._fetched_at >= self.ttl
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding = 'utf-8') as file:
+                cached = json.load(file)
+        except (OSError, ValueError):
+            return
+        self._install(cached['voices'], cached.get('digest'))
+        self._fetched_at = cached.get('fetched_at', 0.0)
+        self._etag = cached.get('etag')
+        self._last_modified = cached.get('last_modified')
+        log.debug('Loaded %s voices from %s.', len(self), self.path)
+
+    def _save(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temporary_path = mkstemp(dir = directory, suffix = '.tmp')
+        try:
+            with os.fdopen(descriptor, 'w', encoding = 'utf-8') as file:
+                json.dump({
+                    'fetched_at': self._fetched_at,
+                    'etag': self._etag,
+                    'last_modified': self._last_modified,
+                    'digest': self._digest,
+                    'voices': self._snapshot.raw
+                }, file)
+            os.replace(temporary_path, self.path)
+        except BaseException:
+            try:
+                os.remove(temporary_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _install(self, raw: list, digest: Optional[str]) -> None:
+        self._snapshot = _Snapshot(raw)
+        self._digest = digest
+
+    def _conditional_headers(self) -> dict:
+        headers = {}
+        if self._snapshot is not None:
+            if self._etag:
+                headers['If-None-Match'] = self._etag
+            if self._last_modified:
+                headers['If-Modified-Since'] = self._last_modified
+        return headers
+
+    def _update(self, status: int, body: bytes, headers) -> bool:
+        """
+        A private function applying a response to `/voices`, returning True if the list changed.
+        """
+        with self._lock:
+            if status == 304:
+                log.debug('The voice list has not been modified.')
+                changed = False
+            else:
+                data = json.loads(body)
+                _handle_exceptions(status, data)
+                self._etag = headers.get('ETag')
+                self._last_modified = headers.get('Last-Modified')
+                digest = sha256(body).hexdigest()
+                changed = digest != self._digest
+                if changed:
+                    self._install(data, digest)
+                    log.debug('Indexed %s voices.', len(data))
+                else:
+                    log.debug('The voice list is unchanged.')
+            self._fetched_at = time()
+            if self.path is not None:
+                self._save()
+        return changed
+
+    def _due(self, force: bool) -> bool:
+        """
+        A private function returning whether `refresh` should fetch the list: when forced, or when it is stale and the last failure is more than `retry_interval` seconds old.
+        """
+        return force or (self.stale and time() - self._failed_at >= self.retry_interval)
+
+    def _failed(self, exception: Exception) -> None:
+        self._failed_at = time()
+        log.debug('Refreshing the voice list failed, not trying again for %s seconds: %r.', self.retry_interval, exception)
+
+    def refresh(self, session: Optional[Session] = None, *, force: bool = False) -> bool:
+        """
+        Fetches or revalidates the voice list if it is older than `ttl` seconds, or always if `force` is True. Returns True if the list changed.
+        `session` is the `requests.Session` to use, for example `UberDuck.session`. After a failure, the list is not fetched again for `retry_interval` seconds unless `force` is True.
+        """
+        if not self._due(force):
+            return False
+        return self._flight.do('refresh', lambda: self._fetch(session))
+
+    def _fetch(self, session: Optional[Session]) -> bool:
+        url = f'{self.base_url}/voices?mode=tts-basic'
+        headers = self._conditional_headers()
+        try:
+            response = session.get(url, headers = headers) if session is not None else get(url, headers = headers)
+            return self._update(response.status_code, response.content, response.headers)
+        except Exception as e:
+            self._failed(e)
+            raise
+
+    async def refresh_async(self, session: Optional['ClientSession'] = None, *, force: bool = False) -> bool:
+        """
+        The asynchronous version of `refresh`. `session` is the `aiohttp.ClientSession` to use.
+        """
+        if not self._due(force):
+            return False
+        return await self._flight.do_async('refresh', lambda: self._fetch_async(session))
+
+    async def _fetch_async(self, session: Optional['ClientSession']) -> bool:
+        url = f'{self.base_url}/voices?mode=tts-basic'
+        headers = self._conditional_headers()
+        try:
+            if session is not None:
+                async with session.get(url, headers = headers) as response:
+                    return self._update(response.status, await response.read(), response.headers)
+            from aiohttp import request # imported on first use, like in `uberduck.get_voices_async`
+            async with request('GET', url, headers = headers) as response:
+                return self._update(response.status, await response.read(), response.headers)
+        except Exception as e:
+            self._failed(e)
+            raise
+
+    def _current(self) -> _Snapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise RuntimeError('The voice catalog is empty, call `refresh` or `refresh_async` first.')
+        return snapshot
+
+    def get(self, name: str) -> Optional[Voice]:
+        """
+        Returns the voice with the given name (case-insensitive), or None if there is no such voice.
+        """
+        snapshot = self._current()
+        position = snapshot.by_name.get(name.lower())
+        return None if position is None else snapshot.voice(position)
+
+    def filter(
+        self,
+        *,
+        category: Optional[str] = None,
+        language: Optional[str] = None,
+        architecture: Optional[str] = None,
+        is_active: Optional[bool] = None
+    ) -> List[Voice]:
+        """
+        Returns the voices matching every given field, in the order of the API's list.
+        """
+        snapshot = self._current()
+        wanted = {'category': category, 'language': language, 'architecture': architecture, 'is_active': is_active}
+        matches: Optional[FrozenSet[int]] = None
+        for field, value in wanted.items():
+            if value is None:
+                continue
+            positions = snapshot.indexes[field].get(value, frozenset())
+            matches = positions if matches is None else matches & positions
+        if matches is None:
+            return list(self)
+        return [snapshot.voice(position) for position in sorted(matches)]
+
+    def names(self) -> List[str]:
+        """
+        Returns the names of every voice.
+        """
+        return [voice['name'] for voice in self._current().raw]
+
+    def values(self, field: str) -> list:
+        """
+        Returns every distinct value of an indexed field (`category`, `language`, `architecture` or `is_active`).
+        """
+        return list(self._current().indexes[field])
+
+    def __contains__(self, voice) -> bool:
+        name = voice.name if isinstance(voice, Voice) else voice
+        return name.lower() in self._current().by_name
+
+    def __len__(self) -> int:
+        return 0 if self._snapshot is None else len(self._snapshot.raw)
+
+    def __iter__(self) -> Iterator[Voice]:
+        snapshot = self._current()
+        return (snapshot.voice(position) for position in range(len(snapshot.raw)))
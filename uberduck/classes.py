@@ -7,8 +7,9 @@ The above copyright notice and this permission notice shall be included in all c
 
 THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Union
 from datetime import datetime as dt
+from time import time as _time
 
 class Membership:
     """
@@ -24,6 +25,8 @@ class Membership:
 
     This class is read-only.
     """
+    __slots__ = ('name', 'id')
+
     def __init__(self, name: str = None, id: int = None):
         self.name = name
         self.id = id
@@ -58,12 +61,20 @@ class Voice:
         `speaker_id: (int)`: The ID of the person doing the voice.
         `language: (str)`: The language the voice was trained for.
 
+    `added_at` and `memberships` are only parsed the first time they are used.
+
     Magic methods:
         `__str__`: Returns a string representation of the Voice object in the format `Voice: Architecture - {architecture}, Category - {category}, Contributors - {contributors}, Controls - {controls}, Display Name - {display_name}, Is Active - {is_active},  Model ID - {model_id}, Memberships - {memberships}, Is Private - {is_private}, Name - {name}, Symbol Set - {symbol_set}, Voice model UUID - {voicemodel_uuid}, Added At - {added_at}, Is Primary - {is_primary}, Hifi Gan Vocoder - {hifi_gan_vocoder}, ML Model ID - {ml_model_id}, Speaker ID - {speaker_id}, Language {language}`.
         `__repr__`: Returns a string representation of the Voice object in the format `<Voice architecture='{architecture}' category='{category}' contributors='{contributors}' controls='{controls}' display_name='{display_name}' is_active='{is_active}' model_id='{model_id}' memberships='{memberships}' is_private='{is_private}' name='{name}' symbol_set='{symbol_set}' voicemodel_uuid='{voicemodel_uuid}' added_at='{added_at}' is_primary='{is_primary}' hifi_gan_vocoder='{hifi_gan_vocoder}' ml_model_id='{ml_model_id}' speaker_id='{speaker_id}' language='{language}'>`.
 
     This class is read-only.
     """
+    __slots__ = (
+        'architecture', 'category', 'contributors', 'controls', 'display_name', 'is_active', 'model_id',
+        '_memberships', '_memberships_parsed', 'is_private', 'name', 'symbol_set', 'voicemodel_uuid', '_added_at',
+        'is_primary', 'hifi_gan_vocoder', 'ml_model_id', 'speaker_id', 'language'
+    )
+
     def __init__(
         self,
         architecture: str,
@@ -92,20 +103,33 @@ class Voice:
         self.display_name = display_name
         self.is_active = is_active
         self.model_id = model_id
-        self.memberships = memberships
-        if self.memberships:
-            self.memberships: List[Membership] = [Membership(*memberships)]
+        self._memberships = memberships
+        self._memberships_parsed = False
         self.is_private = is_private
         self.name = name
         self.symbol_set = symbol_set
         self.voicemodel_uuid = voicemodel_uuid
-        self.added_at: dt = dt.fromtimestamp(added_at)
+        self._added_at = added_at
         self.is_primary = is_primary
         self.hifi_gan_vocoder = hifi_gan_vocoder
         self.ml_model_id = ml_model_id
         self.speaker_id = speaker_id
         self.language = language
 
+    @property
+    def memberships(self) -> Union[List[Membership], list]:
+        if not self._memberships_parsed:
+            if self._memberships:
+                self._memberships = [Membership(*self._memberships)]
+            self._memberships_parsed = True
+        return self._memberships
+
+    @property
+    def added_at(self) -> dt:
+        if not isinstance(self._added_at, dt):
+            self._added_at = dt.fromtimestamp(self._added_at)
+        return self._added_at
+
     def __str__(self):
         time = self.added_at.strftime('%a, %B %d %Y, %I:%M:%S %p UTC')
         return f'Voice: Architecture - {self.architecture}, Category - {self.category}, Contributors - {self.contributors}, Controls - {self.controls}, Display Name - {self.display_name}, Is Active - {self.is_active},  Model ID - {self.model_id}, Memberships - {self.memberships}, Is Private - {self.is_private}, Name - {self.name}, Symbol Set - {self.symbol_set}, Voice model UUID - {self.voicemodel_uuid}, Added At - {time}, Is Primary - {self.is_primary}, Hifi Gan Vocoder - {self.hifi_gan_vocoder}, ML Model ID - {self.ml_model_id}, Speaker ID - {self.speaker_id}, Language {self.language}'
@@ -113,6 +137,164 @@ class Voice:
     def __repr__(self):
         return f'<Voice architecture=\'{self.architecture}\' category=\'{self.category}\' contributors=\'{self.contributors}\' controls=\'{self.controls}\' display_name=\'{self.display_name}\' is_active=\'{self.is_active}\' model_id=\'{self.model_id}\' memberships=\'{self.memberships}\' is_private=\'{self.is_private}\' name=\'{self.name}\' symbol_set=\'{self.symbol_set}\' voicemodel_uuid=\'{self.voicemodel_uuid}\' added_at=\'{dt.timestamp(self.added_at)}\' is_primary=\'{self.is_primary}\' hifi_gan_vocoder=\'{self.hifi_gan_vocoder}\' ml_model_id=\'{self.ml_model_id}\' speaker_id=\'{self.speaker_id}\' language=\'{self.language}\'>'
 
+class VoiceColumns:
+    """
+    This is a model class VoiceColumns that stores a list of voices column by column, as returned by `get_voices(columnar = True)`.
+    No `uberduck.Voice` object is built unless a row is accessed.
+
+    Attributes:
+        `fields (list)`: The names of the columns, which are the attribute names of `uberduck.Voice`.
+        `names (list)`: The `name` column.
+
+    Functions:
+        `column(field: str)` - Returns the list of values of one column, without copying it.
+        `row(index: int)` - Returns the raw values of one voice as a dictionary.
+        `to_voices()` - Returns every voice as a list of `uberduck.Voice` objects.
+
+    Magic methods:
+        `__len__`: Returns the number of voices.
+        `__getitem__`: Returns the voice at an index as a `uberduck.Voice` object.
+        `__iter__`: Iterates over the voices as `uberduck.Voice` objects, building one at a time.
+        `__repr__`: Returns a string representation of the VoiceColumns object in the format `<VoiceColumns voices={number of voices} fields={fields}>`.
+
+    This class is read-only.
+    """
+    __slots__ = ('_columns', '_length')
+
+    def __init__(self, voices: List[Dict[str, Any]]) -> None:
+        fields = list(voices[0]) if voices else []
+        self._columns: Dict[str, list] = {field: [voice[field] for voice in voices] for field in fields}
+        self._length = len(voices)
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self._columns)
+
+    @property
+    def names(self) -> List[str]:
+        return self._columns.get('name', [])
+
+    def column(self, field: str) -> list:
+        return self._columns[field]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        return {field: values[index] for field, values in self._columns.items()}
+
+    def to_voices(self) -> List[Voice]:
+        return list(self)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index: int) -> Voice:
+        return Voice(**self.row(index))
+
+    def __iter__(self) -> Iterator[Voice]:
+        return (self[index] for index in range(self._length))
+
+    def __repr__(self):
+        return f'<VoiceColumns voices={self._length} fields={self.fields}>'
+
+class SpeechResult:
+    """
+    This is a model class SpeechResult that represents the outcome of one item of a batch from `UberDuck.speak_many` or `UberDuck.speak_many_async`.
+
+    Attributes:
+        `index (int)`: The position of the item in the input of the batch.
+        `speech (str)`: The text that was spoken.
+        `voice (str)`: The name of the voice that was used.
+        `result (bytes | str | None)`: The bytes or URL of the audio depending on the `return_bytes` argument, or None if the item failed.
+        `exception (Exception | None)`: The exception raised while generating this item, or None if it succeeded.
+
+    Magic methods:
+        `__bool__`: Returns True if the item succeeded.
+        `__str__`: Returns a string representation of the SpeechResult object in the format `SpeechResult: Index - {index}, Speech - {speech}, Voice - {voice}, Exception - {exception}`.
+        `__repr__`: Returns a string representation of the SpeechResult object in the format `<SpeechResult index={index} speech='{speech}' voice='{voice}' exception={exception!r}>`.
+
+    This class is read-only.
+    """
+    __slots__ = ('index', 'speech', 'voice', 'result', 'exception')
+
+    def __init__(
+        self,
+        index: int,
+        speech: str,
+        voice: str,
+        result: Union[bytes, str, None] = None,
+        exception: Optional[Exception] = None
+    ) -> None:
+        self.index = index
+        self.speech = speech
+        self.voice = voice
+        self.result = result
+        self.exception = exception
+
+    def __bool__(self):
+        return self.exception is None
+
+    def __str__(self):
+        return f'SpeechResult: Index - {self.index}, Speech - {self.speech}, Voice - {self.voice}, Exception - {self.exception}'
+
+    def __repr__(self):
+        return f'<SpeechResult index={self.index} speech=\'{self.speech}\' voice=\'{self.voice}\' exception={self.exception!r}>'
+
+class JobHandle:
+    """
+    This is a model class JobHandle that represents a speech that has been submitted to the API, returned by `UberDuck.start_job` and `UberDuck.start_job_async`.
+    It can be saved with `to_dict` and given back to `UberDuck.resume_job` after a crash or a restart, so that the audio is polled for and downloaded without being generated again.
+
+    Attributes:
+        `uuid (str)`: The UUID of the audio.
+        `speech (str)`: The text that is spoken, or an empty string if unknown.
+        `voice (str)`: The name of the voice that is used, or an empty string if unknown.
+        `state (str)`: `'submitted'` until the audio is ready, then `'ready'`, then `'downloaded'` once its bytes have been received. `'failed'` if polling or downloading failed for good.
+        `path (str | None)`: The URL of the audio once it is ready.
+        `error (str | None)`: The error that made the job fail, if any.
+        `submitted_at (float)`: The UNIX timestamp of the submission.
+
+    Functions:
+        `to_dict()` - Returns the job as a JSON-serializable dictionary.
+        `from_dict(data: dict)` - A class method that creates a job from the output of `to_dict`.
+
+    Magic methods:
+        `__str__`: Returns the UUID of the job.
+        `__repr__`: Returns a string representation of the JobHandle object in the format `<JobHandle uuid='{uuid}' state='{state}' voice='{voice}'>`.
+
+    The attributes are updated by `UberDuck` as the job progresses.
+    """
+    __slots__ = ('uuid', 'speech', 'voice', 'state', 'path', 'error', 'submitted_at')
+
+    def __init__(
+        self,
+        uuid: str,
+        speech: str = '',
+        voice: str = '',
+        state: str = 'submitted',
+        path: Optional[str] = None,
+        error: Optional[str] = None,
+        submitted_at: Optional[float] = None
+    ) -> None:
+        self.uuid = uuid
+        self.speech = speech
+        self.voice = voice
+        self.state = state
+        self.path = path
+        self.error = error
+        self.submitted_at = _time() if submitted_at is None else submitted_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'JobHandle':
+        return cls(**data)
+
+    def __str__(self):
+        return self.uuid
+
+    def __repr__(self):
+        return f'<JobHandle uuid=\'{self.uuid}\' state=\'{self.state}\' voice=\'{self.voice}\'>'
+
 class UberduckException(Exception):
     """
     Base class for all exceptions raised by Uberduck. This exception could be used to catch any exceptions thrown by this library.
@@ -137,9 +319,16 @@ class Unauthorized(UberduckException):
 class Ratelimited(UberduckException):
     """
     Exception raised when you are being ratelimited from the API.
+
+    Attributes:
+        `retry_after` - The number of seconds the API asked to wait before trying again (from the `Retry-After` header), or None.
     """
-    def __init__(self) -> None:
-        super().__init__('You are being ratelimited from the API. Please try again later.')
+    def __init__(self, retry_after: Optional[float] = None) -> None:
+        self.retry_after = retry_after
+        if retry_after is None:
+            super().__init__('You are being ratelimited from the API. Please try again later.')
+        else:
+            super().__init__(f'You are being ratelimited from the API. Please try again in {retry_after:g} seconds.')
 
 class HTTPException(UberduckException):
     """
@@ -148,4 +337,27 @@ class HTTPException(UberduckException):
     def __init__(self, status_code: int, detail) -> None:
         self.status_code = status_code
         self.detail = detail
-        super().__init__(f'Unexpected HTTP response with status code {status_code} and detail {detail}.')
\ No newline at end of file
+        super().__init__(f'Unexpected HTTP response with status code {status_code} and detail {detail}.')
+
+class TimedOut(UberduckException):
+    """
+    Exception raised when the audio is not submitted, generated and downloaded within the given timeout.
+
+    Attributes:
+        `uuid (str | None)` - The UUID of the audio, or None if it was not submitted yet or is not known where the timeout happened.
+        `timeout (float)` - The timeout that was given.
+        `phase (str)` - What timed out: `'submit'`, `'rate_limit'` (waiting for the rate limiter before submitting), `'render'` (waiting for the audio to be generated), `'download'` or `'coalesced'` (waiting for an identical call in flight).
+    """
+    _MESSAGES = {
+        'submit': 'The audio was not submitted within {timeout} seconds.',
+        'rate_limit': 'The audio could not be submitted within {timeout} seconds because of the rate limit.',
+        'render': 'The audio{uuid} was not generated within {timeout} seconds.',
+        'download': 'The audio{uuid} was not downloaded within {timeout} seconds.',
+        'coalesced': 'The identical call in flight did not finish within {timeout} seconds.'
+    }
+
+    def __init__(self, uuid: Optional[str], timeout: float, phase: Optional[str] = None) -> None:
+        self.uuid = uuid
+        self.timeout = timeout
+        self.phase = phase or ('submit' if uuid is None else 'render')
+        super().__init__(self._MESSAGES[self.phase].format(uuid = '' if uuid is None else f' with UUID {uuid}', timeout = timeout))
\ No newline at end of file
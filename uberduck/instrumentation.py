@@ -0,0 +1,413 @@
+"""
+Copyright 2022-present ImNimboss
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from bisect import bisect_left
+from threading import Event, Lock, Thread
+from time import perf_counter, time
+from typing import Callable, Dict, List, Optional, Tuple
+from logging import getLogger
+
+log = getLogger(__name__)
+
+PHASES: Tuple[str, ...] = ('queue_wait', 'submit', 'poll', 'render', 'download', 'file_write', 'playback', 'speak')
+DEFAULT_BOUNDARIES: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class PhaseEvent:
+    """
+    One timed phase of a request, given to the hooks of a `uberduck.Instrumentation`.
+
+    Attributes:
+        `phase (str)` - One of `uberduck.PHASES`: `'queue_wait'` (waiting for the rate limiter), `'submit'` (one submission attempt), `'poll'` (one status check), `'render'` (from the submission to the audio being ready), `'download'`, `'file_write'`, `'playback'` or `'speak'` (a whole `speak` or `speak_async` call).
+        `duration (float)` - The duration of the phase in seconds.
+        `uuid (str | None)` - The UUID of the audio, if known.
+        `voice (str | None)` - The name of the voice, if known.
+        `status_code (int | None)` - The status code of the response, for requests.
+        `size (int | None)` - The number of bytes transferred or written.
+        `error (str | None)` - The class name of the exception that ended the phase, or None if it succeeded.
+        `endpoint (str | None)` - `'speak'` or `'status'` for `'queue_wait'` events.
+    """
+    __slots__ = ('phase', 'duration', 'uuid', 'voice', 'status_code', 'size', 'error', 'endpoint')
+
+    def __init__(
+        self,
+        phase: str,
+        duration: float,
+        uuid: Optional[str] = None,
+        voice: Optional[str] = None,
+        status_code: Optional[int] = None,
+        size: Optional[int] = None,
+        error: Optional[str] = None,
+        endpoint: Optional[str] = None
+    ) -> None:
+        self.phase = phase
+        self.duration = duration
+        self.uuid = uuid
+        self.voice = voice
+        self.status_code = status_code
+        self.size = size
+        self.error = error
+        self.endpoint = endpoint
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f'<PhaseEvent phase=\'{self.phase}\' duration={self.duration:.4f} error={self.error!r}>'
+
+Hook = Callable[[PhaseEvent], None]
+
+class _Span:
+    """
+    A private context manager timing one phase and emitting its `PhaseEvent` on exit, with the class name of the exception if one was raised.
+    """
+    __slots__ = ('instrumentation', 'phase', 'fields', 'started')
+
+    def __init__(self, instrumentation: 'Instrumentation', phase: str, fields: dict) -> None:
+        self.instrumentation = instrumentation
+        self.phase = phase
+        self.fields = fields
+
+    def set(self, **fields) -> None:
+        self.fields.update(fields)
+
+    def __enter__(self) -> '_Span':
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is not None and exc_type is not GeneratorExit:
+            self.fields['error'] = exc_type.__name__
+        self.instrumentation.emit(self.phase, perf_counter() - self.started, **self.fields)
+
+class _NoSpan:
+    """
+    A private stand-in for `_Span` used when instrumentation is disabled, so that the timed code does not branch.
+    """
+    __slots__ = ()
+
+    def set(self, **fields) -> None:
+        pass
+
+    def __enter__(self) -> '_NoSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        pass
+
+NO_SPAN = _NoSpan()
+
+class Instrumentation:
+    """
+    Times every phase of the requests of an `UberDuck` instance and gives a `uberduck.PhaseEvent` for each to its hooks, used through `UberDuck(..., instrumentation = Instrumentation(...))`.
+    Without it, the phases are not timed at all.
+
+    Initialization parameters:
+        `*hooks (Callable[[uberduck.PhaseEvent], None])` - Functions called with every event, from the thread or event loop that finished the phase. They should return quickly; exceptions they raise are logged and ignored.
+        `registry (uberduck.MetricsRegistry)` - A registry that aggregates the events into histograms and counters. If not specified, events only go to the hooks.
+
+    Functions:
+        `add_hook(hook: Callable)` - Adds a hook.
+        `remove_hook(hook: Callable)` - Removes a hook.
+        `emit(phase: str, duration: float, **fields)` - Gives a `uberduck.PhaseEvent` to every hook.
+        `span(phase: str, **fields)` - Returns a context manager that times its block and emits the event when it exits.
+    """
+    def __init__(self, *hooks: Hook, registry: Optional['MetricsRegistry'] = None) -> None:
+        self.registry = registry
+        self._hooks: List[Hook] = list(hooks)
+        if registry is not None:
+            self._hooks.append(registry.record)
+
+    def __repr__(self):
+        return f'<Instrumentation hooks={len(self._hooks)} registry={self.registry!r}>'
+
+    def add_hook(self, hook: Hook) -> None:
+        self._hooks = self._hooks + [hook] # replaced rather than mutated, so that emitting threads never see a half-updated list
+
+    def remove_hook(self, hook: Hook) -> None:
+        self._hooks = [existing for existing in self._hooks if existing is not hook]
+
+    def emit(self, phase: str, duration: float, **fields) -> None:
+        """
+        Gives a `uberduck.PhaseEvent` for `phase` to every hook. `fields` are the other attributes of the event.
+        """
+        event = PhaseEvent(phase, duration, **fields)
+        for hook in self._hooks:
+            try:
+                hook(event)
+            except Exception:
+                log.exception('An instrumentation hook failed on %r.', event)
+
+    def span(self, phase: str, **fields) -> _Span:
+        """
+        Returns a context manager that times its block as `phase` and emits the event when the block exits. More fields can be added with `span.set(**fields)` inside the block.
+        """
+        return _Span(self, phase, fields)
+
+class Histogram:
+    """
+    A histogram with explicit bucket boundaries, like the ones of OpenTelemetry. Bucket `i` counts the values greater than `boundaries[i - 1]` and at most `boundaries[i]`, the last bucket counts the values above every boundary.
+
+    Attributes:
+        `boundaries (tuple)` - The upper bounds of the buckets.
+        `bucket_counts (list)` - The number of values in each bucket, one more than `boundaries`.
+        `count (int)` - The number of values.
+        `sum (float)` - The sum of the values.
+        `min (float | None)` - The smallest value.
+        `max (float | None)` - The largest value.
+
+    Functions:
+        `record(value: float)` - Adds a value.
+        `quantile(q: float)` - Estimates the `q` quantile (0.99 for p99) by interpolating inside its bucket.
+        `to_dict()` - Returns the histogram as a dictionary, with the estimated p50, p90 and p99.
+    """
+    __slots__ = ('boundaries', 'bucket_counts', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, boundaries: Tuple[float, ...] = DEFAULT_BOUNDARIES) -> None:
+        self.boundaries = tuple(boundaries)
+        self.bucket_counts = [0] * (len(self.boundaries) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def record(self, value: float) -> None:
+        self.bucket_counts[bisect_left(self.boundaries, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None or value < self.min else self.min
+        self.max = value if self.max is None or value > self.max else self.max
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimates the `q` quantile, between 0 and 1, assuming that the values are spread evenly inside each bucket. Returns None if there are no values.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket in enumerate(self.bucket_counts):
+            if bucket and seen + bucket >= rank:
+                lower = self.min if i == 0 else max(self.boundaries[i - 1], self.min)
+                upper = self.max if i == len(self.boundaries) else min(self.boundaries[i], self.max)
+                return lower + (upper - lower) * (rank - seen) / bucket
+            seen += bucket
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count, 'sum': self.sum, 'min': self.min, 'max': self.max,
+            'p50': self.quantile(0.5), 'p90': self.quantile(0.9), 'p99': self.quantile(0.99),
+            'boundaries': list(self.boundaries), 'bucket_counts': list(self.bucket_counts)
+        }
+
+    def __repr__(self):
+        return f'<Histogram count={self.count} sum={self.sum:.4f}>'
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class MetricsRegistry:
+    """
+    An in-process registry of histograms and counters, filled from the events of a `uberduck.Instrumentation`.
+
+    The events are recorded as:
+        `uberduck.phase.duration` - A histogram of the duration of each phase in seconds, labelled with `phase`.
+        `uberduck.responses` - A counter of responses, labelled with `phase` and `status_code`. The responses of the `poll` phase are the number of status checks.
+        `uberduck.bytes` - A counter of the bytes downloaded and written, labelled with `phase`.
+        `uberduck.errors` - A counter of the phases that failed, labelled with `phase` and `error` (the exception class).
+
+    Initialization parameters:
+        `boundaries (tuple)` - The bucket boundaries of the histograms, in seconds. Defaults to `uberduck.DEFAULT_BOUNDARIES` (5 milliseconds to 60 seconds).
+
+    Functions:
+        `record(event: uberduck.PhaseEvent)` - Records an event. This is the hook added by `uberduck.Instrumentation`.
+        `observe(name: str, value: float, **labels)` - Adds a value to a histogram.
+        `increment(name: str, value: float = 1, **labels)` - Adds to a counter.
+        `histogram(name: str, **labels)` - Returns a copy of a histogram, or None.
+        `counter(name: str, **labels)` - Returns the value of a counter.
+        `snapshot()` - Returns every histogram and counter as a dictionary.
+        `to_otlp(service_name: str = 'uberduck')` - Returns the metrics in the OTLP/JSON format of OpenTelemetry.
+        `reset()` - Clears every metric.
+    """
+    def __init__(self, boundaries: Tuple[float, ...] = DEFAULT_BOUNDARIES) -> None:
+        self.boundaries = tuple(boundaries)
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._lock = Lock()
+        self._started = time()
+
+    def __repr__(self):
+        return f'<MetricsRegistry histograms={len(self._histograms)} counters={len(self._counters)}>'
+
+    @staticmethod
+    def _labels(labels: dict) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, self._labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.boundaries)
+            histogram.record(value)
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def record(self, event: PhaseEvent) -> None:
+        """
+        Records a `uberduck.PhaseEvent` into the histograms and counters described above.
+        """
+        self.observe('uberduck.phase.duration', event.duration, phase = event.phase)
+        if event.status_code is not None:
+            self.increment('uberduck.responses', phase = event.phase, status_code = event.status_code)
+        if event.size:
+            self.increment('uberduck.bytes', event.size, phase = event.phase)
+        if event.error is not None:
+            self.increment('uberduck.errors', phase = event.phase, error = event.error)
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        """
+        Returns a copy of the histogram `name` with exactly these labels, or None if nothing was recorded in it.
+        """
+        with self._lock:
+            histogram = self._histograms.get((name, self._labels(labels)))
+            if histogram is None:
+                return None
+            copy = Histogram(histogram.boundaries)
+            copy.bucket_counts = list(histogram.bucket_counts)
+            copy.count, copy.sum, copy.min, copy.max = histogram.count, histogram.sum, histogram.min, histogram.max
+            return copy
+
+    def counter(self, name: str, **labels) -> float:
+        """
+        Returns the value of the counter `name` with exactly these labels, 0 if nothing was counted.
+        """
+        with self._lock:
+            return self._counters.get((name, self._labels(labels)), 0)
+
+    def snapshot(self) -> dict:
+        """
+        Returns `{'histograms': {name: [{'labels': {...}, 'count': ..., 'p99': ..., ...}]}, 'counters': {name: [{'labels': {...}, 'value': ...}]}}`.
+        """
+        histograms, counters = {}, {}
+        with self._lock:
+            for (name, labels), histogram in self._histograms.items():
+                histograms.setdefault(name, []).append({'labels': dict(labels), **histogram.to_dict()})
+            for (name, labels), value in self._counters.items():
+                counters.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+        return {'histograms': histograms, 'counters': counters}
+
+    def to_otlp(self, service_name: str = 'uberduck') -> dict:
+        """
+        Returns the metrics as an OTLP/JSON `ExportMetricsServiceRequest` with cumulative temporality, which an OpenTelemetry collector accepts on `/v1/metrics`.
+        """
+        start, now = str(int(self._started * 1e9)), str(int(time() * 1e9))
+        attributes = lambda labels: [{'key': key, 'value': {'stringValue': value}} for key, value in labels]
+        metrics: Dict[str, dict] = {}
+        with self._lock:
+            for (name, labels), histogram in self._histograms.items():
+                metric = metrics.setdefault(name, {'name': name, 'unit': 's', 'histogram': {'aggregationTemporality': 2, 'dataPoints': []}})
+                point = {
+                    'attributes': attributes(labels), 'startTimeUnixNano': start, 'timeUnixNano': now,
+                    'count': str(histogram.count), 'sum': histogram.sum,
+                    'bucketCounts': [str(count) for count in histogram.bucket_counts], 'explicitBounds': list(histogram.boundaries)
+                }
+                if histogram.count:
+                    point.update(min = histogram.min, max = histogram.max)
+                metric['histogram']['dataPoints'].append(point)
+            for (name, labels), value in self._counters.items():
+                metric = metrics.setdefault(name, {'name': name, 'unit': 'By' if name == 'uberduck.bytes' else '1', 'sum': {'aggregationTemporality': 2, 'isMonotonic': True, 'dataPoints': []}})
+                metric['sum']['dataPoints'].append({'attributes': attributes(labels), 'startTimeUnixNano': start, 'timeUnixNano': now, 'asDouble': value})
+        return {'resourceMetrics': [{
+            'resource': {'attributes': attributes((('service.name', service_name),))},
+            'scopeMetrics': [{'scope': {'name': 'uberduck'}, 'metrics': list(metrics.values())}]
+        }]}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._started = time()
+
+class OTLPExporter:
+    """
+    Sends the metrics of a `uberduck.MetricsRegistry` to an OpenTelemetry collector (or any backend accepting OTLP/HTTP with JSON), once or every `interval` seconds from a background thread.
+
+    Initialization parameters:
+        `registry (uberduck.MetricsRegistry)` - The registry to export.
+        `endpoint (str)` - The OTLP/HTTP metrics endpoint. Defaults to `http://localhost:4318/v1/metrics`.
+        `interval (float)` - The number of seconds between exports once started. Defaults to 60.
+        `headers (dict)` - Extra headers, like an API key of the backend.
+        `service_name (str)` - The `service.name` resource attribute. Defaults to `uberduck`.
+        `timeout (float)` - The timeout of each export in seconds. Defaults to 10.
+
+    Functions:
+        `export()` - Sends the metrics now. Returns True if they were accepted. Failures are logged, not raised.
+        `start()` - Starts exporting every `interval` seconds.
+        `stop()` - Stops the background thread after a last export. Called automatically when the exporter is used as a context manager.
+    """
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        endpoint: str = 'http://localhost:4318/v1/metrics',
+        *,
+        interval: float = 60.0,
+        headers: Optional[Dict[str, str]] = None,
+        service_name: str = 'uberduck',
+        timeout: float = 10.0
+    ) -> None:
+        self.registry = registry
+        self.endpoint = endpoint
+        self.interval = interval
+        self.headers = headers or {}
+        self.service_name = service_name
+        self.timeout = timeout
+        self._stopped = Event()
+        self._thread: Optional[Thread] = None
+
+    def __repr__(self):
+        return f'<OTLPExporter endpoint=\'{self.endpoint}\' interval={self.interval}>'
+
+    def __enter__(self) -> 'OTLPExporter':
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def export(self) -> bool:
+        from requests import post # only the exporter needs requests, so importing this module stays cheap
+        try:
+            response = post(self.endpoint, json = self.registry.to_otlp(self.service_name), headers = self.headers, timeout = self.timeout)
+        except Exception as e:
+            log.warning('Could not export metrics to %s: %r.', self.endpoint, e)
+            return False
+        if response.status_code >= 400:
+            log.warning('Exporting metrics to %s failed with status code %s.', self.endpoint, response.status_code)
+            return False
+        return True
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.export()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = Thread(target = self._run, name = 'uberduck-otlp-exporter', daemon = True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+            self.export()
@@ -0,0 +1,104 @@
+"""
+Copyright 2022-present ImNimboss
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from asyncio import wrap_future
+from concurrent.futures import Future
+from typing import Any, Callable, Optional, Union
+from uberduck.classes import JobHandle
+
+class SpeechJob:
+    """
+    A speech that has been submitted with `UberDuck.submit` or `UberDuck.submit_async` and is being completed in the background.
+
+    Attributes:
+        `uuid (str | None)` - The UUID of the audio, or None if the audio was found in the cache.
+        `speech (str)` - The text that is spoken.
+        `voice (str)` - The name of the voice that is used.
+        `handle (uberduck.JobHandle)` - The state of the job, which can be saved and given to `UberDuck.resume_job` if the process stops before the job is done.
+        `status (str)` - `'submitted'`, `'ready'` (the audio is being downloaded), `'downloaded'`, `'failed'` or `'cancelled'`.
+
+    Functions:
+        `result(timeout: float = None)` - Waits for the bytes or the URL of the audio (depending on `return_bytes`) and returns it, or raises the exception of the job.
+        `exception(timeout: float = None)` - Waits for the job and returns its exception, or None.
+        `done()` - Returns whether the job has finished, failed or been cancelled.
+        `cancelled()` - Returns whether the job has been cancelled.
+        `cancel()` - Stops polling for and downloading the audio. Returns False if the job had already finished.
+        `add_done_callback(callback: Callable[[SpeechJob], Any])` - Calls `callback` with the job once it is done.
+
+    Jobs submitted with `submit_async` belong to their event loop and `result` does not wait for them, `await job` instead. Jobs submitted with `submit` can be awaited from any event loop too.
+    """
+    __slots__ = ('handle', '_future', '_on_cancel')
+
+    def __init__(self, handle: JobHandle, future, on_cancel: Optional[Callable[[], Any]] = None) -> None:
+        self.handle = handle
+        self._future = future
+        self._on_cancel = on_cancel
+
+    @property
+    def uuid(self) -> Optional[str]:
+        return self.handle.uuid
+
+    @property
+    def speech(self) -> str:
+        return self.handle.speech
+
+    @property
+    def voice(self) -> str:
+        return self.handle.voice
+
+    @property
+    def status(self) -> str:
+        return 'cancelled' if self._future.cancelled() else self.handle.state
+
+    def result(self, timeout: Optional[float] = None) -> Union[bytes, str]:
+        """
+        Waits up to `timeout` seconds for the job and returns the bytes or the URL of its audio, or raises its exception.
+        Raises `concurrent.futures.TimeoutError` if the job is still running after `timeout` seconds, and `concurrent.futures.CancelledError` if it was cancelled.
+        """
+        if isinstance(self._future, Future):
+            return self._future.result(timeout)
+        return self._future.result() # an asyncio future cannot be waited for synchronously
+
+    def exception(self, timeout: Optional[float] = None) -> Optional[BaseException]:
+        """
+        Waits up to `timeout` seconds for the job and returns its exception, or None if it succeeded.
+        """
+        if isinstance(self._future, Future):
+            return self._future.exception(timeout)
+        return self._future.exception()
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def cancelled(self) -> bool:
+        return self._future.cancelled()
+
+    def cancel(self) -> bool:
+        """
+        Stops polling for and downloading the audio, returning False if the job had already finished. A download in progress stops after its current chunk.
+        The audio is still generated by the API.
+        """
+        if not self._future.cancel():
+            return False
+        if self._on_cancel is not None:
+            self._on_cancel()
+        return True
+
+    def add_done_callback(self, callback: Callable[['SpeechJob'], Any]) -> None:
+        """
+        Calls `callback` with the job once it has finished, failed or been cancelled, right away if it already has.
+        """
+        self._future.add_done_callback(lambda _: callback(self))
+
+    def __await__(self):
+        future = wrap_future(self._future) if isinstance(self._future, Future) else self._future
+        return future.__await__()
+
+    def __repr__(self):
+        return f'<SpeechJob uuid={self.uuid!r} status=\'{self.status}\' voice=\'{self.voice}\'>'
@@ -0,0 +1,75 @@
+"""
+Copyright 2022-present ImNimboss
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from re import compile as _compile
+from typing import Iterator, List
+
+_SENTENCE_END = _compile(r'(?<=[.!?…])\s+|(?<=[.!?…]["\'”’)\]])\s+')
+_CLAUSE_END = _compile(r'(?<=[,;:–—])\s+')
+
+def _words(text: str, max_length: int) -> Iterator[str]:
+    """
+    A private generator packing the words of `text` into pieces of at most `max_length` characters, cutting words that are longer than that.
+    """
+    piece = ''
+    for word in text.split(' '):
+        while len(word) > max_length:
+            if piece:
+                yield piece
+                piece = ''
+            yield word[:max_length]
+            word = word[max_length:]
+        if piece and len(piece) + 1 + len(word) > max_length:
+            yield piece
+            piece = word
+        else:
+            piece = f'{piece} {word}' if piece else word
+    if piece:
+        yield piece
+
+def _pieces(text: str, max_length: int) -> Iterator[str]:
+    """
+    A private generator splitting `text` into sentences, sentences that are too long into clauses, and clauses that are too long into words.
+    """
+    for sentence in _SENTENCE_END.split(text):
+        if len(sentence) <= max_length:
+            yield sentence
+            continue
+        for clause in _CLAUSE_END.split(sentence):
+            if len(clause) <= max_length:
+                yield clause
+            else:
+                yield from _words(clause, max_length)
+
+def split_text(text: str, max_length: int = 300) -> List[str]:
+    """
+    Splits `text` into chunks of at most `max_length` characters, used by `UberDuck.speak_long` to generate long texts in parallel.
+    Chunks end at sentence boundaries where possible, then at clause boundaries (commas, semicolons, colons and dashes), then between words. Consecutive sentences are packed into one chunk while they fit, so that the voice keeps its intonation.
+
+    Parameters:
+        `text (str)` - The text to split. Runs of whitespace are collapsed into single spaces.
+
+        `max_length (int)` - The maximum number of characters of each chunk. Defaults to 300.
+
+    Returns:
+        The chunks, in order.
+    """
+    if max_length < 1:
+        raise ValueError('`max_length` must be at least 1.')
+    chunks = []
+    chunk = ''
+    for piece in _pieces(' '.join(text.split()), max_length):
+        if chunk and len(chunk) + 1 + len(piece) > max_length:
+            chunks.append(chunk)
+            chunk = piece
+        else:
+            chunk = f'{chunk} {piece}' if chunk else piece
+    if chunk:
+        chunks.append(chunk)
+    return chunks
@@ -7,103 +7,392 @@ The above copyright notice and this permission notice shall be included in all c
 
 THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
-from requests import post, get
-from aiohttp import request, BasicAuth
-from asyncio import get_event_loop, AbstractEventLoop
-from typing import Union, Optional, List
+from requests import Session, get, Timeout as RequestsTimeout
+from requests.adapters import HTTPAdapter
+from asyncio import get_event_loop, new_event_loop, run_coroutine_threadsafe, ensure_future, sleep as async_sleep, wait, FIRST_COMPLETED, AbstractEventLoop, TimeoutError as AsyncTimeoutError
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, wait as wait_futures, FIRST_COMPLETED as FIRST_COMPLETED_FUTURE, TimeoutError as FutureTimeoutError
+from contextlib import ExitStack, closing, contextmanager
+from email.utils import parsedate_to_datetime
+from functools import wraps
+from inspect import isawaitable
+from itertools import islice
+from os import PathLike, fspath, remove, replace
+from shutil import copymode
+from threading import Lock, local
+from time import monotonic, perf_counter, sleep, time
+from uuid import uuid4
+from typing import Any, BinaryIO, Callable, Union, Optional, List, Tuple, Iterable, Iterator, AsyncIterator, TYPE_CHECKING
 try:
     from typing import Literal
 except ImportError:
     from typing_extensions import Literal
 from uberduck.classes import *
-from polling import poll
-from pydub import AudioSegment
-from pydub.playback import play
+from uberduck.poller import StatusPoller, AsyncStatusPoller, _settle
+from uberduck.job import SpeechJob
+from uberduck.audio import SpeechAudio
+from uberduck.playback import PlaybackQueue, Playback
+from uberduck.longform import split_text
+from uberduck.strategies import PollStrategy, FixedInterval
+from uberduck.cache import SpeechCache, cache_key
+from uberduck.ratelimit import RateLimiter
+from uberduck.retry import RetryPolicy
+from uberduck.singleflight import SingleFlight
+from uberduck.instrumentation import Instrumentation, NO_SPAN
 from io import BytesIO
+from json import loads
 from logging import getLogger
+if TYPE_CHECKING: # aiohttp and pydub are imported when they are first used, see `_play` and `_get_async_session`
+    from aiohttp import ClientSession
+    from uberduck.catalog import VoiceCatalog
+    from uberduck.postprocess import Pipeline
 
 log = getLogger(__name__)
 
+API_URL: str = 'https://api.uberduck.ai'
+CHUNK_SIZE: int = 64 * 1024 # the size of the chunks audio is downloaded in
+PLAYBACK_CHUNK_SIZE: int = 4096 # smaller chunks for audio that is played while it is downloaded, so that the first frames are not held back
+
+AsyncByteSink = Any # any object with a `write(bytes)` method returning an awaitable, like `aiofiles` files or `asyncio.StreamWriter`-like wrappers
+
+def _retry_after(headers) -> Optional[float]:
+    """
+    A private function that returns the seconds to wait given by the `Retry-After` header of a response (in seconds or as an HTTP date), or None.
+    """
+    value = headers.get('Retry-After') if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time())
+    except (TypeError, ValueError):
+        return None
+
 def _handle_exceptions(
     status_code: int,
     data: dict,
-    voice: str = None
+    voice: str = None,
+    headers = None
 ):
     """
     A private function to handle all HTTP exceptions received by the API, if any.
     """
     if 299 >= status_code >= 200:
-        log.debug(f'Checked for HTTP exceptions, none found (status code {status_code}).')
+        log.debug('Checked for HTTP exceptions, none found (status code %s).', status_code)
         return
     detail = data.get('detail')
     if detail == 'That voice does not exist':
-        log.error(f'The voice "{voice}" does not exist. Status code {status_code}, detail {data}.')
+        log.error('The voice "%s" does not exist. Status code %s, detail %s.', voice, status_code, data)
         raise InvalidVoice(voice)
     elif status_code == 401 and detail == 'Could not validate credentials':
-        log.error(f'The API key and/or secret is invalid. Status code {status_code}, detail {data}.')
+        log.error('The API key and/or secret is invalid. Status code %s, detail %s.', status_code, data)
         raise Unauthorized()
     elif status_code == 429:
-        log.error(f'The API key has been rate-limited. Status code {status_code}, detail {data}.')
-        raise Ratelimited()
+        log.error('The API key has been rate-limited. Status code %s, detail %s.', status_code, data)
+        raise Ratelimited(_retry_after(headers))
     else:
-        log.error(f'An error has occurred. Status code {status_code}, detail {data}.')
+        log.error('An error has occurred. Status code %s, detail %s.', status_code, data)
         raise HTTPException(status_code, data)
 
-def _write_to_file(file_path: str, bytes_to_write: bytes):
+def _response_json(response) -> dict:
+    """
+    A private function that returns the JSON body of a `requests` response, or the text of the body as its `detail` if it is not JSON (like the error pages of proxies).
+    """
+    try:
+        return response.json()
+    except ValueError:
+        return {'detail': response.text}
+
+async def _response_json_async(response) -> dict:
     """
-    A private function to assist in saving files.
+    The asynchronous version of `_response_json`, for `aiohttp` responses.
     """
-    with open(file_path, 'wb') as file:
+    text = await response.text()
+    try:
+        return loads(text)
+    except ValueError:
+        return {'detail': text}
+
+def _write_to_file(file_path: Union[str, PathLike, BinaryIO], bytes_to_write: bytes):
+    """
+    A private function to assist in saving files, given either a path or an open binary file object.
+    """
+    if not isinstance(file_path, (str, PathLike)):
+        file_path.write(bytes_to_write)
+        return
+    with _AtomicFile(file_path) as file:
         file.write(bytes_to_write)
+        file.commit()
 
-def _get_audio(uuid: str) -> Union[str, Literal[False]]:
+class _AtomicFile:
     """
-    A private function to recieve audio from the API using a UUID. This function is polled until the desired audio is available.
+    A private class writing to a temporary file next to `path`, which only replaces `path` when `commit` is called.
+    A download that fails or is cancelled is closed without committing, so it never truncates or partly overwrites an existing file.
     """
-    response = get(
-        url = f'https://api.uberduck.ai/speak-status?uuid={uuid}'
-    )
-    json: dict = response.json()
-    log.debug(f'Polling for audio with UUID {uuid} - received status code {response.status_code}, got audio: {bool(json.get("path"))}.')
-    _handle_exceptions(response.status_code, json)
-    return json if json.get('path') else False
+    __slots__ = ('path', 'temporary_path', 'file')
+
+    def __init__(self, path: Union[str, PathLike]) -> None:
+        self.path = fspath(path)
+        self.temporary_path = f'{self.path}.{uuid4().hex[:8]}.part' # opened like `path` would be, so it gets the same permissions
+        self.file = open(self.temporary_path, 'xb')
+
+    def write(self, chunk: bytes) -> int:
+        return self.file.write(chunk)
+
+    def commit(self) -> None:
+        self.file.close()
+        try:
+            copymode(self.path, self.temporary_path) # keep the permissions of a file that is overwritten
+        except OSError:
+            pass
+        replace(self.temporary_path, self.path)
+        self.temporary_path = None
+
+    def close(self) -> None:
+        self.file.close()
+        if self.temporary_path is not None:
+            try:
+                remove(self.temporary_path)
+            except FileNotFoundError:
+                pass
+            self.temporary_path = None
+
+    def __enter__(self) -> '_AtomicFile':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+def _play(bytes_: bytes, format_: str = 'wav') -> None:
+    """
+    A private function that plays audio through pydub, which is only imported the first time a sound is played.
+    """
+    from pydub import AudioSegment
+    from pydub.playback import play
+    play(AudioSegment.from_file(BytesIO(bytes_), format = format_))
+
+@contextmanager
+def _streaming(playback_queue: PlaybackQueue) -> Iterator[Playback]:
+    """
+    A private context manager queueing a clip whose chunks are written to it while they are downloaded, and ending the clip when the download ends or fails.
+    """
+    playback = playback_queue.open()
+    try:
+        yield playback
+    except BaseException as e:
+        playback.finish(e)
+        raise
+    playback.finish()
+
+class _Batch:
+    """
+    A private class through which `speak_many` stops the items that are still in flight when it is closed early.
+    Its threads register themselves with `_current`, so that `_wait` and `_download` of an item can tell that it is no longer wanted.
+    """
+    __slots__ = ('stopped', 'polls', 'lock')
+
+    _current = local() # the batch of the item a thread is working on
+
+    def __init__(self) -> None:
+        self.stopped = False
+        self.polls = set()
+        self.lock = Lock()
+
+    @classmethod
+    def current(cls) -> Optional['_Batch']:
+        return getattr(cls._current, 'batch', None)
+
+    @classmethod
+    def current_stopped(cls) -> bool:
+        batch = getattr(cls._current, 'batch', None)
+        return batch is not None and batch.stopped
+
+    def track(self, poll: Future) -> Future:
+        """
+        Cancels `poll` when the batch is stopped, right away if it already is.
+        """
+        with self.lock:
+            if not self.stopped:
+                self.polls.add(poll)
+                poll.add_done_callback(self._forget)
+                return poll
+        poll.cancel()
+        return poll
+
+    def _forget(self, poll: Future) -> None:
+        with self.lock:
+            self.polls.discard(poll)
+
+    def stop(self) -> None:
+        with self.lock:
+            self.stopped = True
+            polls, self.polls = self.polls, set()
+        for poll in polls:
+            poll.cancel()
+
+class _AsyncSink:
+    """
+    A private class giving the asynchronous functions one way to write chunks to a path (in the default executor), a binary file object or an asynchronous byte sink.
+    """
+    __slots__ = ('file', 'loop', 'opened')
+
+    def __init__(self, file, loop: AbstractEventLoop, opened: bool) -> None:
+        self.file = file
+        self.loop = loop
+        self.opened = opened
+
+    async def __call__(self, chunk: bytes) -> None:
+        if self.opened:
+            await self.loop.run_in_executor(None, self.file.write, chunk)
+            return
+        written = self.file.write(chunk)
+        if isawaitable(written):
+            await written
+
+    async def commit(self) -> None:
+        """
+        Replaces the file given by path with what was written. Does nothing for file objects and sinks, which are written to directly.
+        """
+        if self.opened:
+            await self.loop.run_in_executor(None, self.file.commit)
+
+    async def close(self) -> None:
+        if self.opened:
+            await self.loop.run_in_executor(None, self.file.close)
+
+async def _open_sink_async(file, loop: AbstractEventLoop) -> Optional[_AsyncSink]:
+    """
+    A private function that wraps `file` in an `_AsyncSink`, opening an `_AtomicFile` first if it is a path. Returns None if `file` is None.
+    """
+    if file is None:
+        return None
+    if isinstance(file, (str, PathLike)):
+        return _AsyncSink(await loop.run_in_executor(None, _AtomicFile, file), loop, True)
+    return _AsyncSink(file, loop, False)
+
+def _time_left(deadline: Optional[float], timeout: Optional[float], uuid: Optional[str] = None, phase: Optional[str] = None) -> Optional[float]:
+    """
+    A private function that returns the seconds left until `deadline` (a `time.monotonic` value), or None if there is no deadline.
+    Raises `uberduck.TimedOut` for `phase` (see `uberduck.TimedOut`) if the deadline has passed.
+    """
+    if deadline is None:
+        return None
+    remaining = deadline - monotonic()
+    if remaining <= 0:
+        log.error('Timed out after %s seconds (UUID %s, %s).', timeout, uuid, phase)
+        raise TimedOut(uuid, timeout, phase)
+    return remaining
+
+def _playback_queue(play_sound: Union[bool, PlaybackQueue], postprocess: Optional['Pipeline']) -> Optional[PlaybackQueue]:
+    """
+    A private function returning the queue that `play_sound` streams the audio to, if it is one. Raises ValueError if the audio will not be a WAV file.
+    """
+    if not isinstance(play_sound, PlaybackQueue):
+        return None
+    if postprocess is not None and postprocess.format != 'wav':
+        raise ValueError(f'A `PlaybackQueue` can only play WAV audio, but the pipeline encodes it as {postprocess.format}.')
+    return play_sound
+
+def _check_audio_format(return_audio: bool, postprocess: Optional['Pipeline']) -> None:
+    """
+    A private function that raises ValueError before anything is submitted if `return_audio` is True but the pipeline will not output a WAV file.
+    """
+    if return_audio and postprocess is not None and postprocess.format != 'wav':
+        raise ValueError(f'`return_audio` needs WAV audio, but the pipeline encodes it as {postprocess.format}.')
 
-def get_voices(*, return_only_names: bool = False) -> Union[List[Voice], List[str]]:
+def _voice_name(voice: Union[str, Voice]) -> str:
+    """
+    A private function that returns the name of a voice given either its name or a `uberduck.Voice` object.
+    """
+    return voice.name if isinstance(voice, Voice) else voice
+
+def _collect_results(finished: List[SpeechResult], buffered: dict, next_index: int, ordered: bool) -> Tuple[List[SpeechResult], int]:
+    """
+    A private function used by the batch functions to decide which finished results can be yielded.
+    When `ordered` is True, results are held in `buffered` until every result before them has been yielded.
+    """
+    finished.sort(key = lambda result: result.index)
+    if not ordered:
+        return finished, next_index
+    for result in finished:
+        buffered[result.index] = result
+    ready = []
+    while next_index in buffered:
+        ready.append(buffered.pop(next_index))
+        next_index += 1
+    return ready, next_index
+
+def get_voices(*, return_only_names: bool = False, columnar: bool = False) -> Union[List[Voice], List[str], VoiceColumns]:
     """
     A synchronous function that returns every possible voice that can be used by the API for text-to-speech.
 
     Parameters:
         `return_only_names (bool)` - If True, the function will return a list of string names instead of `uberduck.Voice` objects containing the full details of voices. Defaults to False.
 
+        `columnar (bool)` - If True, the function will return a `uberduck.VoiceColumns` object that stores the details column by column and only builds `uberduck.Voice` objects for the rows you access. Defaults to False.
+
     Returns:
-        Either a list of strings or a list of `uberduck.Voice` objects depending on the `return_only_names` parameter.
+        Either a list of strings, a list of `uberduck.Voice` objects or a `uberduck.VoiceColumns` object depending on the `return_only_names` and `columnar` parameters.
     """
-    response = get('https://api.uberduck.ai/voices?mode=tts-basic')
+    response = get(f'{API_URL}/voices?mode=tts-basic')
     json: list = response.json()
-    log.debug(f'Got voice data - status code {response.status_code}.')
+    log.debug('Got voice data - status code %s.', response.status_code)
     _handle_exceptions(response.status_code, json)
     if return_only_names:
         return [voice['name'] for voice in json]
+    if columnar:
+        return VoiceColumns(json)
     return [Voice(**voice) for voice in json]
 
-async def get_voices_async(*, return_only_names: bool = False) -> Union[List[Voice], List[str]]:
+async def get_voices_async(*, return_only_names: bool = False, columnar: bool = False) -> Union[List[Voice], List[str], VoiceColumns]:
     """
     An asynchronous function that returns every possible voice that can be used by the API for text-to-speech.
 
     Parameters:
         `return_only_names (bool)` - If True, the function will return a list of string names instead of `uberduck.Voice` objects containing the full details of voices. Defaults to False.
 
+        `columnar (bool)` - If True, the function will return a `uberduck.VoiceColumns` object that stores the details column by column and only builds `uberduck.Voice` objects for the rows you access. Defaults to False.
+
     Returns:
-        Either a list of strings or a list of `uberduck.Voice` objects depending on the `return_only_names` parameter.
+        Either a list of strings, a list of `uberduck.Voice` objects or a `uberduck.VoiceColumns` object depending on the `return_only_names` and `columnar` parameters.
     """
-    async with request('GET', 'https://api.uberduck.ai/voices?mode=tts-basic') as response:
+    from aiohttp import request
+    async with request('GET', f'{API_URL}/voices?mode=tts-basic') as response:
         json: list = await response.json()
-        log.debug(f'Got voice data asynchronously - status code {response.status}.')
+        log.debug('Got voice data asynchronously - status code %s.', response.status)
         _handle_exceptions(response.status, json)
     if return_only_names:
         return [voice['name'] for voice in json]
+    if columnar:
+        return VoiceColumns(json)
     return [Voice(**voice) for voice in json]
 
+def _timed(function):
+    """
+    A private decorator emitting a `speak` event for every call of `speak` when the instance has `instrumentation`. Without it, the only cost is one extra call.
+    """
+    @wraps(function)
+    def wrapper(self, speech, voice, *args, **kwargs):
+        if self.instrumentation is None:
+            return function(self, speech, voice, *args, **kwargs)
+        with self.instrumentation.span('speak', voice = _voice_name(voice)):
+            return function(self, speech, voice, *args, **kwargs)
+    return wrapper
+
+def _timed_async(function):
+    """
+    The asynchronous version of `_timed`.
+    """
+    @wraps(function)
+    async def wrapper(self, speech, voice, *args, **kwargs):
+        if self.instrumentation is None:
+            return await function(self, speech, voice, *args, **kwargs)
+        with self.instrumentation.span('speak', voice = _voice_name(voice)):
+            return await function(self, speech, voice, *args, **kwargs)
+    return wrapper
+
 class UberDuck:
     """
     The class used to interact with the UberDuck text-to-speech API.
@@ -112,23 +401,745 @@ class UberDuck:
         `api_key (str)` - The API key used to authenticate with the API.`
         
         `api_secret (str)` - The API secret used to authenticate with the API.
+
+        `pool_size (int)` - The maximum number of connections kept open to the API by each of the synchronous and asynchronous sessions. Defaults to 10.
+
+        `keepalive_timeout (float)` - The number of seconds an idle connection of the asynchronous session is kept open for reuse. Defaults to 15.
+
+        `base_url (str)` - The URL of the API. Defaults to `https://api.uberduck.ai`.
+
+        `poll_concurrency (int)` - The maximum number of status checks that are sent at the same time by the shared poller. Defaults to `pool_size`.
+
+        `poll_strategy (uberduck.PollStrategy)` - The default strategy deciding when the status of pending audio is checked. If not specified, `check_every` is used.
+
+        `cache (uberduck.SpeechCache)` - A cache of generated audio. When the audio of a (speech, voice) pair is cached, calls that return bytes do not use the network at all. If not specified, nothing is cached.
+
+        `voice_catalog (uberduck.VoiceCatalog)` - A cached list of voices used to reject unknown voices before sending a request. It is refreshed automatically when it is older than its `ttl`. If not specified, voices are only validated by the API.
+
+        `rate_limiter (uberduck.RateLimiter)` - A client-side rate limiter that spreads out submissions and status checks and slows down when the API answers with a 429. If not specified, requests are sent as soon as possible.
+
+        `retry_policy (uberduck.RetryPolicy)` - Decides which failed submissions, status checks and downloads are sent again. If not specified, nothing is retried.
+
+        `instrumentation (uberduck.Instrumentation)` - Times every phase of every request (waiting for the rate limiter, submitting, each status check, rendering, downloading, writing files, playing) and gives the events to its hooks and metrics registry. If not specified, nothing is timed.
+
+        `single_flight (uberduck.SingleFlight)` - Coalesces identical (speech, voice) calls of `speak` and `speak_async` that are in flight at the same time into one submission and one download, whose bytes are shared. It can be shared by several instances. If not specified, every call is sent separately.
     
     Attributes:
         `api_key` - The API key used to authenticate with the API. Using this attribute, you can change it later on.
         
         `api_secret` - The API secret used to authenticate with the API. Using this attribute, you can change it later on.
 
+        `base_url` - The URL of the API.
+
+        `poll_strategy` - The default strategy deciding when the status of pending audio is checked.
+
+        `cache` - The cache of generated audio, or None.
+
+        `voice_catalog` - The cached list of voices used to validate voices, or None.
+
+        `rate_limiter` - The client-side rate limiter, or None. Its `stats()` returns the current rates and the number of waiting requests.
+
+        `retry_policy` - The policy deciding which failed requests are retried, or None.
+
+        `instrumentation` - The hooks and metrics registry receiving the timing of every phase, or None.
+
+        `single_flight` - The layer coalescing identical calls in flight, or None. Its `stats()` returns the number of calls that were coalesced.
+
+        `poll_stats` - The number of pending and completed jobs, the number of status checks sent, and how many jobs needed each number of checks.
+
     Functions:
-        `speak(speech: str, voice: str | uberduck.Voice, *, return_bytes: bool = True, check_every: int = 1, file_path: str = None, play_sound: bool = False)` - This function is synchronous and returns the bytes/string of the audio that is generated by the API (depending on the `return_bytes` argument).
+        `speak(speech: str, voice: str | uberduck.Voice, *, return_bytes: bool = True, check_every: int = 1, file_path: str | BinaryIO = None, play_sound: bool | uberduck.PlaybackQueue = False, timeout: float = None, poll_strategy: uberduck.PollStrategy = None, postprocess: uberduck.Pipeline = None, return_audio: bool = False)` - This function is synchronous and returns the bytes/string of the audio that is generated by the API (depending on the `return_bytes` argument).
         
-        `speak_async(speech: str, voice: str | uberduck.Voice, *, return_bytes: bool = True, check_every: int = 1, file_path: str = None, play_sound: bool = False, asyncio_loop: AbstractEventLoop = None)` - This function is asynchronous and returns the bytes/string of the audio that is generated by the API (depending on the `return_bytes` argument).
+        `speak_async(speech: str, voice: str | uberduck.Voice, *, return_bytes: bool = True, check_every: int = 1, file_path: str | BinaryIO | AsyncByteSink = None, play_sound: bool | uberduck.PlaybackQueue = False, timeout: float = None, poll_strategy: uberduck.PollStrategy = None, postprocess: uberduck.Pipeline = None, return_audio: bool = False, asyncio_loop: AbstractEventLoop = None)` - This function is asynchronous and returns the bytes/string of the audio that is generated by the API (depending on the `return_bytes` argument).
+
+        `speak_stream(speech: str, voice: str | uberduck.Voice, *, chunk_size: int = 65536, check_every: int = 1, timeout: float = None, poll_strategy: uberduck.PollStrategy = None)` - This function is a synchronous generator that yields the audio in chunks while it is downloaded.
+
+        `speak_stream_async(speech: str, voice: str | uberduck.Voice, *, chunk_size: int = 65536, check_every: int = 1, timeout: float = None, poll_strategy: uberduck.PollStrategy = None)` - This function is an asynchronous generator that does the same as `speak_stream`.
+
+        `submit(speech: str, voice: str | uberduck.Voice, *, return_bytes: bool = True, check_every: int = 1, file_path: str | BinaryIO = None, timeout: float = None, poll_strategy: uberduck.PollStrategy = None)` - This function is synchronous, submits the speech and returns a `uberduck.SpeechJob` right away, which is completed in the background.
+
+        `submit_async(speech: str, voice: str | uberduck.Voice, *, return_bytes: bool = True, check_every: int = 1, file_path: str | BinaryIO | AsyncByteSink = None, timeout: float = None, poll_strategy: uberduck.PollStrategy = None)` - This function is asynchronous and does the same as `submit`. The job is awaited with `await job`.
+
+        `start_job(speech: str, voice: str | uberduck.Voice, *, timeout: float = None)` - This function is synchronous, submits the speech without waiting for its audio and returns a `uberduck.JobHandle`.
+
+        `start_job_async(speech: str, voice: str | uberduck.Voice, *, timeout: float = None)` - This function is asynchronous and does the same as `start_job`.
+
+        `resume_job(job: uberduck.JobHandle | str, *, return_bytes: bool = True, check_every: int = 1, file_path: str | BinaryIO = None, timeout: float = None, poll_strategy: uberduck.PollStrategy = None)` - This function is synchronous, polls for and downloads the audio of an already submitted speech and returns its bytes/string.
+
+        `resume_job_async(job: uberduck.JobHandle | str, *, return_bytes: bool = True, check_every: int = 1, file_path: str | BinaryIO | AsyncByteSink = None, timeout: float = None, poll_strategy: uberduck.PollStrategy = None, asyncio_loop: AbstractEventLoop = None)` - This function is asynchronous and does the same as `resume_job`.
+
+        `speak_many(items: Iterable[tuple[str, str | uberduck.Voice]], *, concurrency: int = 5, ordered: bool = True, return_bytes: bool = True, check_every: int = 1, timeout: float = None, poll_strategy: uberduck.PollStrategy = None, postprocess: uberduck.Pipeline = None)` - This function is a synchronous generator that speaks many (speech, voice) items with at most `concurrency` of them in flight and yields a `uberduck.SpeechResult` for each.
+
+        `speak_many_async(items: Iterable[tuple[str, str | uberduck.Voice]], *, concurrency: int = 5, ordered: bool = True, return_bytes: bool = True, check_every: int = 1, timeout: float = None, poll_strategy: uberduck.PollStrategy = None, postprocess: uberduck.Pipeline = None)` - This function is an asynchronous generator that does the same as `speak_many`.
+
+        `speak_long(speech: str, voice: str | uberduck.Voice, *, max_length: int = 300, concurrency: int = 5, padding_ms: float = 0, crossfade_ms: float = 0, file_path: str | BinaryIO = None, return_audio: bool = False, check_every: int = 1, timeout: float = None, poll_strategy: uberduck.PollStrategy = None)` - This function is synchronous, splits a long text into chunks that are generated in parallel and returns the bytes of the stitched audio.
+
+        `speak_long_async(speech: str, voice: str | uberduck.Voice, *, max_length: int = 300, concurrency: int = 5, padding_ms: float = 0, crossfade_ms: float = 0, file_path: str | BinaryIO | AsyncByteSink = None, return_audio: bool = False, check_every: int = 1, timeout: float = None, poll_strategy: uberduck.PollStrategy = None)` - This function is asynchronous and does the same as `speak_long`.
+
+        `speak_long_stream(speech: str, voice: str | uberduck.Voice, *, max_length: int = 300, concurrency: int = 5, check_every: int = 1, timeout: float = None, poll_strategy: uberduck.PollStrategy = None)` - This function is a synchronous generator that yields the audio of each chunk of a long text as a `uberduck.SpeechAudio`, in order, while the later chunks are still being generated.
+
+        `speak_long_stream_async(speech: str, voice: str | uberduck.Voice, *, max_length: int = 300, concurrency: int = 5, check_every: int = 1, timeout: float = None, poll_strategy: uberduck.PollStrategy = None)` - This function is an asynchronous generator that does the same as `speak_long_stream`.
+
+        `close()` - Closes both sessions (the asynchronous one only in the background if its event loop is running). Called automatically when the instance is used as a context manager (`with UberDuck(...) as client:`).
+
+        `close_async()` - Closes both sessions. Called automatically when the instance is used as an asynchronous context manager (`async with UberDuck(...) as client:`).
 
         Read more about the functions in the [documentation](https://github.com/ImNimboss/uberduck/tree/main/Documentation/Basics.md).
     """
-    def __init__(self, api_key: str, api_secret: str) -> None:
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        *,
+        pool_size: int = 10,
+        keepalive_timeout: float = 15,
+        base_url: str = API_URL,
+        poll_concurrency: Optional[int] = None,
+        poll_strategy: Optional[PollStrategy] = None,
+        cache: Optional[SpeechCache] = None,
+        voice_catalog: Optional['VoiceCatalog'] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        single_flight: Optional[SingleFlight] = None,
+        instrumentation: Optional[Instrumentation] = None
+    ) -> None:
         self.api_key = api_key
         self.api_secret = api_secret
+        self.base_url = base_url.rstrip('/')
+        self.poll_strategy = poll_strategy
+        self.cache = cache
+        self.voice_catalog = voice_catalog
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.single_flight = single_flight
+        self.instrumentation = instrumentation
+        self._pool_size = pool_size
+        self._keepalive_timeout = keepalive_timeout
+        self._session: Optional[Session] = None
+        self._async_session: Optional['ClientSession'] = None
+        self._async_session_loop: Optional[AbstractEventLoop] = None
+        self._poll_concurrency = poll_concurrency or pool_size
+        self._poller = StatusPoller(self._get_audio, self._poll_concurrency, self._retry_delay)
+        self._async_poller: Optional[AsyncStatusPoller] = None
+        self._download_executor: Optional[ThreadPoolExecutor] = None
+        self._download_lock = Lock() # `_on_ready` runs in several status-check threads at once
+
+    def __enter__(self) -> 'UberDuck':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    async def __aenter__(self) -> 'UberDuck':
+        return self
 
+    async def __aexit__(self, *args) -> None:
+        await self.close_async()
+
+    @property
+    def session(self) -> Session:
+        """
+        The `requests.Session` used by the synchronous functions. It is created on first use and its connections are reused between requests.
+        """
+        if self._session is None:
+            self._session = Session()
+            adapter = HTTPAdapter(pool_connections = self._pool_size, pool_maxsize = self._pool_size)
+            self._session.mount('http://', adapter)
+            self._session.mount('https://', adapter)
+        return self._session
+
+    def _get_async_session(self) -> 'ClientSession':
+        """
+        A private function that returns the `aiohttp.ClientSession` used by the asynchronous functions, creating it if it does not exist yet for the running event loop.
+        """
+        loop = get_event_loop()
+        if self._async_session is None or self._async_session.closed or self._async_session_loop is not loop:
+            from aiohttp import ClientSession, TCPConnector
+            if self._async_session is not None and not self._async_session.closed:
+                log.warning('The event loop has changed, creating a new asynchronous session. Use `close_async` before switching event loops.')
+            self._async_session = ClientSession(
+                connector = TCPConnector(limit = self._pool_size, keepalive_timeout = self._keepalive_timeout)
+            )
+            self._async_session_loop = loop
+            self._async_poller = AsyncStatusPoller(self._get_audio_async, self._poll_concurrency, self._retry_delay)
+        return self._async_session
+
+    @property
+    def poll_stats(self) -> dict:
+        """
+        The number of pending and completed jobs, the number of status checks sent, and how many jobs needed each number of checks (`polls_per_job`), for synchronous and asynchronous calls combined.
+        """
+        stats = self._poller.stats()
+        if self._async_poller is not None:
+            for key, value in self._async_poller.stats().items():
+                if key == 'polls_per_job':
+                    for polls, count in value.items():
+                        stats[key][polls] = stats[key].get(polls, 0) + count
+                else:
+                    stats[key] += value
+        return stats
+
+    def _poll_strategy(self, poll_strategy: Optional[PollStrategy], check_every: Union[int, float]) -> PollStrategy:
+        """
+        A private function that returns the poll strategy to use for a call.
+        """
+        return poll_strategy or self.poll_strategy or FixedInterval(check_every)
+
+    def _get_async_poller(self) -> AsyncStatusPoller:
+        """
+        A private function that returns the shared status poller of the running event loop.
+        """
+        self._get_async_session()
+        return self._async_poller
+
+    def close(self) -> None:
+        """
+        Closes the synchronous session and its pooled connections, cancelling any audio that is still being polled for.
+        The asynchronous session is closed too, but from a running event loop only in the background, so prefer `close_async` there.
+        """
+        self._close_async_session()
+        self._poller.close()
+        with self._download_lock:
+            executor, self._download_executor = self._download_executor, None
+        if executor is not None:
+            executor.shutdown(wait = False)
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    async def close_async(self) -> None:
+        """
+        Closes both the synchronous and the asynchronous sessions and their pooled connections.
+        """
+        if self._async_poller is not None:
+            self._async_poller.close()
+            self._async_poller = None
+        if self._async_session is not None:
+            await self._async_session.close()
+            self._async_session = None
+            self._async_session_loop = None
+        self.close()
+
+    def _close_async_session(self) -> None:
+        """
+        A private function that closes the asynchronous session from synchronous code: on its event loop if that loop is not running,
+        on a temporary event loop if it was closed (for example by `asyncio.run`), and in the background if it is running.
+        """
+        session, loop = self._async_session, self._async_session_loop
+        self._async_session = self._async_session_loop = None
+        if session is None or session.closed:
+            return
+        if loop.is_running():
+            run_coroutine_threadsafe(session.close(), loop)
+            return
+        if self._async_poller is not None:
+            self._async_poller.close()
+            self._async_poller = None
+        if not loop.is_closed():
+            loop.run_until_complete(session.close())
+            return
+        loop = new_event_loop()
+        try:
+            loop.run_until_complete(session.close())
+        finally:
+            loop.close()
+
+    def _span(self, phase: str, **fields):
+        """
+        A private function returning a context manager that times `phase` if `instrumentation` is set, and does nothing otherwise.
+        """
+        return NO_SPAN if self.instrumentation is None else self.instrumentation.span(phase, **fields)
+
+    def _queued(self, endpoint: str, waited: float, **fields) -> None:
+        """
+        A private function that emits the time a request waited for the rate limiter.
+        """
+        if self.instrumentation is not None:
+            self.instrumentation.emit('queue_wait', waited, endpoint = endpoint, **fields)
+
+    def _observe(self, endpoint: str, status_code: int, headers) -> bool:
+        """
+        A private function that adapts the rate limiter to a response. Returns True if a status check was rate-limited and should simply be retried later.
+        """
+        if self.rate_limiter is None:
+            return False
+        self.rate_limiter.observe(endpoint, status_code, _retry_after(headers) if status_code == 429 else None)
+        return endpoint == 'status' and status_code == 429
+
+    def _get_audio(self, uuid: str) -> Union[dict, Literal[False]]:
+        """
+        A private function to recieve audio from the API using a UUID. This function is polled by the shared `StatusPoller` until the desired audio is available.
+        """
+        if self.rate_limiter is not None:
+            self._queued('status', self.rate_limiter.acquire('status'), uuid = uuid)
+        with self._span('poll', uuid = uuid) as span:
+            response = self.session.get(f'{self.base_url}/speak-status', params = {'uuid': uuid})
+            span.set(status_code = response.status_code)
+            if self._observe('status', response.status_code, response.headers):
+                log.debug('Polling for audio with UUID %s was rate-limited, checking again later.', uuid)
+                return False
+            json: dict = _response_json(response)
+            log.debug('Polling for audio with UUID %s - received status code %s, got audio: %s.', uuid, response.status_code, bool(json.get("path")))
+            _handle_exceptions(response.status_code, json, headers = response.headers)
+        if self.retry_policy is not None:
+            self.retry_policy.record_success()
+        return json if json.get('path') else False
+
+    async def _get_audio_async(self, uuid: str) -> Union[dict, Literal[False]]:
+        """
+        A private function to asynchronously recieve audio from the API using a UUID. This is the asynchronous counterpart of `_get_audio`.
+        """
+        if self.rate_limiter is not None:
+            self._queued('status', await self.rate_limiter.acquire_async('status'), uuid = uuid)
+        with self._span('poll', uuid = uuid) as span:
+            async with self._get_async_session().get(f'{self.base_url}/speak-status', params = {'uuid': uuid}) as response:
+                span.set(status_code = response.status)
+                if self._observe('status', response.status, response.headers):
+                    log.debug('Polling for audio with UUID %s asynchronously was rate-limited, checking again later.', uuid)
+                    return False
+                json: dict = await _response_json_async(response)
+                log.debug('Polling for audio with UUID %s asynchronously - received status code %s, got audio: %s.', uuid, response.status, bool(json.get("path")))
+                _handle_exceptions(response.status, json, headers = response.headers)
+        if self.retry_policy is not None:
+            self.retry_policy.record_success()
+        return json if json.get('path') else False
+
+    def _check_voice(self, voice: str) -> None:
+        """
+        A private function that raises `uberduck.InvalidVoice` if `voice_catalog` is set and does not contain the voice, refreshing the catalog first if it is stale.
+        """
+        if self.voice_catalog is None:
+            return
+        try:
+            self.voice_catalog.refresh(self.session)
+        except Exception as e:
+            log.warning('Could not refresh the voice catalog, using the cached voices: %r.', e)
+        if self.voice_catalog.loaded and voice not in self.voice_catalog:
+            log.error('The voice "%s" is not in the voice catalog.', voice)
+            raise InvalidVoice(voice)
+
+    async def _check_voice_async(self, voice: str) -> None:
+        """
+        The asynchronous version of `_check_voice`.
+        """
+        if self.voice_catalog is None:
+            return
+        try:
+            await self.voice_catalog.refresh_async(self._get_async_session())
+        except Exception as e:
+            log.warning('Could not refresh the voice catalog, using the cached voices: %r.', e)
+        if self.voice_catalog.loaded and voice not in self.voice_catalog:
+            log.error('The voice "%s" is not in the voice catalog.', voice)
+            raise InvalidVoice(voice)
+
+    def _submit(self, speech: str, voice: str, deadline: Optional[float], timeout: Optional[float]) -> str:
+        """
+        A private function that submits the speech, retrying according to `retry_policy`, and returns the UUID of the audio.
+        Every attempt sends the same `Idempotency-Key` header so that the API can recognize a resubmission, but the header is only advisory:
+        the API is not known to deduplicate on it, so a retry after a timeout or a reset connection may generate the audio twice.
+        """
+        idempotency_key = str(uuid4())
+        def attempt() -> str:
+            if self.rate_limiter is not None:
+                try:
+                    waited = self.rate_limiter.acquire('speak', _time_left(deadline, timeout))
+                except TimedOut:
+                    raise TimedOut(None, timeout, 'rate_limit') from None
+                self._queued('speak', waited, voice = voice)
+            with self._span('submit', voice = voice) as span:
+                try:
+                    response = self.session.post(
+                        url = f'{self.base_url}/speak',
+                        auth = (self.api_key, self.api_secret),
+                        json = {'speech': speech, 'voice': voice.lower()},
+                        headers = {'Idempotency-Key': idempotency_key},
+                        timeout = _time_left(deadline, timeout)
+                    )
+                except RequestsTimeout:
+                    raise TimedOut(None, timeout)
+                span.set(status_code = response.status_code)
+                json = _response_json(response)
+                log.debug('UUID request sent - status code %s, data %s.', response.status_code, json)
+                self._observe('speak', response.status_code, response.headers)
+                _handle_exceptions(response.status_code, json, voice, response.headers)
+                span.set(uuid = json['uuid'])
+                return json['uuid']
+        if self.retry_policy is None:
+            return attempt()
+        return self.retry_policy.call(attempt, deadline)
+
+    async def _submit_async(self, speech: str, voice: str, deadline: Optional[float], timeout: Optional[float]) -> str:
+        """
+        The asynchronous version of `_submit`.
+        """
+        from aiohttp import BasicAuth, ClientTimeout
+        idempotency_key = str(uuid4())
+        async def attempt() -> str:
+            if self.rate_limiter is not None:
+                try:
+                    waited = await self.rate_limiter.acquire_async('speak', _time_left(deadline, timeout))
+                except TimedOut:
+                    raise TimedOut(None, timeout, 'rate_limit') from None
+                self._queued('speak', waited, voice = voice)
+            with self._span('submit', voice = voice) as span:
+                try:
+                    async with self._get_async_session().post(
+                        f'{self.base_url}/speak',
+                        json = {'speech': speech, 'voice': voice.lower()},
+                        auth = BasicAuth(self.api_key, self.api_secret),
+                        headers = {'Idempotency-Key': idempotency_key},
+                        timeout = ClientTimeout(total = _time_left(deadline, timeout))
+                    ) as response:
+                        span.set(status_code = response.status)
+                        json = await _response_json_async(response)
+                        log.debug('Asynchronous UUID request sent - status code %s, data %s.', response.status, json)
+                        self._observe('speak', response.status, response.headers)
+                        _handle_exceptions(response.status, json, voice, response.headers)
+                except AsyncTimeoutError:
+                    raise TimedOut(None, timeout)
+                span.set(uuid = json['uuid'])
+                return json['uuid']
+        if self.retry_policy is None:
+            return await attempt()
+        return await self.retry_policy.call_async(attempt, deadline)
+
+    def _wait(
+        self,
+        uuid: str,
+        speech: str,
+        voice: str,
+        deadline: Optional[float],
+        timeout: Optional[float],
+        check_every: Union[int, float],
+        poll_strategy: Optional[PollStrategy]
+    ) -> dict:
+        """
+        A private function that waits for the shared poller to find the audio of `uuid`, returning its status data.
+        """
+        poll = self._poller.add(
+            uuid,
+            self._poll_strategy(poll_strategy, check_every),
+            timeout,
+            speech, voice,
+            time_left = _time_left(deadline, timeout, uuid)
+        )
+        batch = _Batch.current()
+        if batch is not None:
+            batch.track(poll)
+        return poll.result()
+
+    async def _wait_async(
+        self,
+        uuid: str,
+        speech: str,
+        voice: str,
+        deadline: Optional[float],
+        timeout: Optional[float],
+        check_every: Union[int, float],
+        poll_strategy: Optional[PollStrategy]
+    ) -> dict:
+        """
+        The asynchronous version of `_wait`.
+        """
+        return await self._get_async_poller().add(
+            uuid,
+            self._poll_strategy(poll_strategy, check_every),
+            timeout,
+            speech, voice,
+            time_left = _time_left(deadline, timeout, uuid)
+        )
+
+    def _render(
+        self,
+        speech: str,
+        voice: str,
+        deadline: Optional[float],
+        timeout: Optional[float],
+        check_every: Union[int, float],
+        poll_strategy: Optional[PollStrategy]
+    ) -> dict:
+        """
+        A private function that submits the speech and waits for the shared poller to find the generated audio, returning its status data.
+        """
+        uuid = self._submit(speech, voice, deadline, timeout)
+        with self._span('render', uuid = uuid, voice = voice):
+            return self._wait(uuid, speech, voice, deadline, timeout, check_every, poll_strategy)
+
+    async def _render_async(
+        self,
+        speech: str,
+        voice: str,
+        deadline: Optional[float],
+        timeout: Optional[float],
+        check_every: Union[int, float],
+        poll_strategy: Optional[PollStrategy]
+    ) -> dict:
+        """
+        The asynchronous version of `_render`.
+        """
+        uuid = await self._submit_async(speech, voice, deadline, timeout)
+        with self._span('render', uuid = uuid, voice = voice):
+            return await self._wait_async(uuid, speech, voice, deadline, timeout, check_every, poll_strategy)
+
+    def _retry_delay(self, exception: Exception, attempt: int, deadline: Optional[float]) -> Optional[float]:
+        """
+        A private function that returns the seconds to wait before retrying after `exception`, or None if it should be raised.
+        """
+        return None if self.retry_policy is None else self.retry_policy.delay(exception, attempt, deadline)
+
+    def _iter_download(
+        self,
+        url: str,
+        deadline: Optional[float] = None,
+        timeout: Optional[float] = None,
+        chunk_size: int = CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        A private function that downloads the generated audio in chunks using the pooled synchronous session.
+        When a retried download fails part way, it is resumed with a `Range` request and the bytes already yielded are never yielded again.
+        """
+        received = attempt = 0
+        while True:
+            attempt += 1
+            if self.rate_limiter is not None: # downloads, and every resumed download, take a token of the status bucket
+                try:
+                    self._queued('status', self.rate_limiter.acquire('status', _time_left(deadline, timeout, phase = 'download')))
+                except TimedOut:
+                    raise TimedOut(None, timeout, 'download') from None
+            try:
+                headers = {'Range': f'bytes={received}-'} if received else None
+                with self.session.get(url, stream = True, headers = headers, timeout = _time_left(deadline, timeout, phase = 'download')) as response:
+                    self._observe('status', response.status_code, response.headers)
+                    if response.status_code >= 400:
+                        _handle_exceptions(response.status_code, _response_json(response), headers = response.headers)
+                    skip = received if response.status_code != 206 else 0 # the server ignored the range
+                    for chunk in response.iter_content(chunk_size):
+                        _time_left(deadline, timeout, phase = 'download')
+                        if skip:
+                            chunk, skip = chunk[skip:], max(0, skip - len(chunk))
+                            if not chunk:
+                                continue
+                        received += len(chunk)
+                        yield chunk
+                if self.retry_policy is not None:
+                    self.retry_policy.record_success()
+                return
+            except RequestsTimeout:
+                raise TimedOut(None, timeout, 'download')
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, deadline)
+                if delay is None:
+                    raise
+                sleep(delay)
+
+    async def _iter_download_async(
+        self,
+        url: str,
+        deadline: Optional[float] = None,
+        timeout: Optional[float] = None,
+        chunk_size: int = CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """
+        A private function that asynchronously downloads the generated audio in chunks using the pooled asynchronous session. Retried downloads are resumed like in `_iter_download`.
+        """
+        from aiohttp import ClientTimeout
+        received = attempt = 0
+        while True:
+            attempt += 1
+            if self.rate_limiter is not None:
+                try:
+                    self._queued('status', await self.rate_limiter.acquire_async('status', _time_left(deadline, timeout, phase = 'download')))
+                except TimedOut:
+                    raise TimedOut(None, timeout, 'download') from None
+            try:
+                headers = {'Range': f'bytes={received}-'} if received else None
+                async with self._get_async_session().get(url, headers = headers, timeout = ClientTimeout(total = _time_left(deadline, timeout, phase = 'download'))) as response:
+                    self._observe('status', response.status, response.headers)
+                    if response.status >= 400:
+                        _handle_exceptions(response.status, await _response_json_async(response), headers = response.headers)
+                    skip = received if response.status != 206 else 0
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        if skip:
+                            chunk, skip = chunk[skip:], max(0, skip - len(chunk))
+                            if not chunk:
+                                continue
+                        received += len(chunk)
+                        yield chunk
+                if self.retry_policy is not None:
+                    self.retry_policy.record_success()
+                return
+            except AsyncTimeoutError:
+                raise TimedOut(None, timeout, 'download')
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, deadline)
+                if delay is None:
+                    raise
+                await async_sleep(delay)
+
+    def _download(
+        self,
+        url: str,
+        deadline: Optional[float] = None,
+        timeout: Optional[float] = None,
+        file: Union[str, PathLike, BinaryIO, None] = None,
+        keep: bool = True,
+        playback_queue: Optional[PlaybackQueue] = None,
+        cancelled: Optional[Callable[[], bool]] = None
+    ) -> Optional[bytes]:
+        """
+        A private function that downloads the generated audio, writing every chunk to `file` as it arrives.
+        The chunks are only joined into bytes (the only copy made) if `keep` is True. With `playback_queue`, every chunk is also queued for playback as it arrives.
+        If `cancelled` returns True between two chunks, the download is stopped and `concurrent.futures.CancelledError` is raised.
+        """
+        chunks = [] if keep else None
+        timed = self.instrumentation is not None
+        received = 0
+        writing = 0.0
+        with self._span('download') as span, ExitStack() as stack:
+            sink = stack.enter_context(_AtomicFile(file)) if isinstance(file, (str, PathLike)) else file
+            playback = None if playback_queue is None else stack.enter_context(_streaming(playback_queue))
+            download = stack.enter_context(closing(self._iter_download(url, deadline, timeout, CHUNK_SIZE if playback is None else PLAYBACK_CHUNK_SIZE)))
+            for chunk in download:
+                if cancelled is not None and cancelled():
+                    log.debug('Stopped downloading %s after %s bytes because it was cancelled.', url, received)
+                    raise CancelledError()
+                received += len(chunk)
+                if playback is not None:
+                    playback.write(chunk)
+                if sink is not None:
+                    if timed:
+                        started = perf_counter()
+                        sink.write(chunk)
+                        writing += perf_counter() - started
+                    else:
+                        sink.write(chunk)
+                if chunks is not None:
+                    chunks.append(chunk)
+            if isinstance(sink, _AtomicFile):
+                sink.commit()
+            span.set(size = received)
+        if file is not None:
+            if timed:
+                self.instrumentation.emit('file_write', writing, size = received)
+            log.debug('Wrote audio to file %s.', file)
+        return None if chunks is None else b''.join(chunks)
+
+    async def _download_async(
+        self,
+        url: str,
+        deadline: Optional[float] = None,
+        timeout: Optional[float] = None,
+        file: Union[str, PathLike, BinaryIO, AsyncByteSink, None] = None,
+        keep: bool = True,
+        asyncio_loop: AbstractEventLoop = None,
+        playback_queue: Optional[PlaybackQueue] = None
+    ) -> Optional[bytes]:
+        """
+        The asynchronous version of `_download`. Files given by path are written in the default executor, `file` objects whose `write` returns an awaitable are awaited.
+        """
+        asyncio_loop = asyncio_loop or get_event_loop()
+        chunks = [] if keep else None
+        timed = self.instrumentation is not None
+        received = 0
+        writing = 0.0
+        sink = await _open_sink_async(file, asyncio_loop)
+        try:
+            with self._span('download') as span, ExitStack() as stack:
+                playback = None if playback_queue is None else stack.enter_context(_streaming(playback_queue))
+                async for chunk in self._iter_download_async(url, deadline, timeout, CHUNK_SIZE if playback is None else PLAYBACK_CHUNK_SIZE):
+                    received += len(chunk)
+                    if playback is not None:
+                        playback.write(chunk) # never blocks the event loop
+                    if sink is not None:
+                        if timed:
+                            started = perf_counter()
+                            await sink(chunk)
+                            writing += perf_counter() - started
+                        else:
+                            await sink(chunk)
+                    if chunks is not None:
+                        chunks.append(chunk)
+                if sink is not None:
+                    await sink.commit()
+                span.set(size = received)
+        finally:
+            if sink is not None:
+                await sink.close()
+        if file is not None:
+            if timed:
+                self.instrumentation.emit('file_write', writing, size = received)
+            log.debug('Wrote audio to %s asynchronously.', file)
+        return None if chunks is None else b''.join(chunks)
+
+    def _save(self, file_path: Union[str, PathLike, BinaryIO], bytes_: bytes) -> None:
+        """
+        A private function that writes audio that is already in memory to `file_path`, timing it as a `file_write`.
+        """
+        with self._span('file_write', size = len(bytes_)):
+            _write_to_file(file_path, bytes_)
+
+    async def _cache_set_async(self, key: str, bytes_: bytes, asyncio_loop: AbstractEventLoop) -> None:
+        """
+        A private function that caches audio, in the default executor if the cache writes to disk.
+        """
+        if self.cache.directory is None:
+            self.cache.set(key, bytes_)
+        else:
+            await asyncio_loop.run_in_executor(None, self.cache.set, key, bytes_)
+
+    def _fetch_shared(
+        self,
+        speech: str,
+        voice: str,
+        deadline: Optional[float],
+        timeout: Optional[float],
+        check_every: Union[int, float],
+        poll_strategy: Optional[PollStrategy],
+        key: Optional[str]
+    ) -> Tuple[str, bytes]:
+        """
+        A private function that renders and downloads the audio of a speech through `single_flight`, so that identical calls in flight share one submission and one download.
+        Returns the URL and the bytes of the audio.
+        """
+        def fetch() -> Tuple[str, bytes]:
+            path = self._render(speech, voice, deadline, timeout, check_every, poll_strategy)['path']
+            bytes_ = self._download(path, deadline, timeout)
+            if key is not None:
+                self.cache.set(key, bytes_)
+            return path, bytes_
+        try:
+            return self.single_flight.do(cache_key(speech, voice), fetch, _time_left(deadline, timeout, phase = 'coalesced'))
+        except FutureTimeoutError:
+            log.error('Timed out after %s seconds waiting for a coalesced call.', timeout)
+            raise TimedOut(None, timeout, 'coalesced') from None
+
+    async def _fetch_shared_async(
+        self,
+        speech: str,
+        voice: str,
+        deadline: Optional[float],
+        timeout: Optional[float],
+        check_every: Union[int, float],
+        poll_strategy: Optional[PollStrategy],
+        key: Optional[str],
+        asyncio_loop: AbstractEventLoop
+    ) -> Tuple[str, bytes]:
+        """
+        A private function that does the same as `_fetch_shared` asynchronously. Calls from threads and from event loops are coalesced together.
+        """
+        async def fetch() -> Tuple[str, bytes]:
+            path = (await self._render_async(speech, voice, deadline, timeout, check_every, poll_strategy))['path']
+            bytes_ = await self._download_async(path, deadline, timeout, asyncio_loop = asyncio_loop)
+            if key is not None:
+                await self._cache_set_async(key, bytes_, asyncio_loop)
+            return path, bytes_
+        try:
+            return await self.single_flight.do_async(cache_key(speech, voice), fetch, _time_left(deadline, timeout, phase = 'coalesced'))
+        except AsyncTimeoutError:
+            log.error('Timed out after %s seconds waiting for a coalesced call.', timeout)
+            raise TimedOut(None, timeout, 'coalesced') from None
+
+    @_timed
     def speak(
         self,
         speech: str,
@@ -136,9 +1147,13 @@ class UberDuck:
         *,
         return_bytes: bool = True,
         check_every: Union[int, float] = 1,
-        file_path: Optional[str] = None,
-        play_sound: bool = False
-    ) -> Union[bytes, str]:
+        file_path: Union[str, PathLike, BinaryIO, None] = None,
+        play_sound: Union[bool, PlaybackQueue] = False,
+        timeout: Optional[float] = None,
+        poll_strategy: Optional[PollStrategy] = None,
+        postprocess: Optional['Pipeline'] = None,
+        return_audio: bool = False
+    ) -> Union[bytes, str, SpeechAudio]:
         """
         Parameters:
             `speech (str)` - The text that will be spoken.
@@ -149,60 +1164,90 @@ class UberDuck:
 
             `check_every (int | float)` - The number of seconds that the function will wait between checking if the audio is available. Defaults to 1.
 
-            `file_path (str)` - The path of the file that the audio will be saved to. If not specified, the function will not save the audio.
+            `file_path (str | os.PathLike | BinaryIO)` - The path of the file, or an open binary file object, that the audio will be saved to. The audio is written chunk by chunk while it is downloaded. If not specified, the function will not save the audio.
+
+            `play_sound (bool | uberduck.PlaybackQueue)` - If True, the function will play the audio that is generated by the API and return once it has been played. If a `uberduck.PlaybackQueue`, the audio is queued on it and starts playing as soon as its first frames are downloaded, and the function does not wait for it to be played. Defaults to False.
+
+            `timeout (float)` - The maximum number of seconds for submitting, generating and downloading the audio. If not specified, the function will wait forever.
 
-            `play_sound (bool)` - If True, the function will play the audio that is generated by the API. Defaults to False.
+            `poll_strategy (uberduck.PollStrategy)` - The strategy deciding when the status of the audio is checked. Takes precedence over `check_every`. Defaults to the instance's `poll_strategy`.
+
+            `postprocess (uberduck.Pipeline)` - Post-processing steps (resampling, normalizing, trimming, encoding) run on the audio in worker processes before it is returned, saved or played. The cache keeps the original audio. If not specified, the audio is returned as generated.
+
+            `return_audio (bool)` - If True, the function will return a `uberduck.SpeechAudio` instead of bytes, giving the duration, format and samples of the audio without copying them. If `file_path` is a path, the saved file is memory-mapped and the audio is not kept in memory unless `return_bytes` or `play_sound` need it. The audio must be WAV, so it cannot be combined with a `postprocess` pipeline encoding another format. Defaults to False.
 
         Returns:
-            Either the bytes of the audio that is generated by the API or the URL of the audio that is generated by the API depending on the `return_bytes` argument.
+            Either the bytes of the audio that is generated by the API or the URL of the audio that is generated by the API depending on the `return_bytes` argument, or a `uberduck.SpeechAudio` if `return_audio` is True.
 
         Raises:
-            `uberduck.InvalidVoice` - If the voice is not valid.
+            `uberduck.InvalidVoice` - If the voice is not valid or not in `voice_catalog`.
             `uberduck.Unauthorized` - If the API key or secret is invalid.
             `uberduck.Ratelimited` - If you got ratelimited by the API.
             `uberduck.HTTPException` - If the HTTP request failed from an unknown cause.
+            `uberduck.TimedOut` - If the audio was not submitted, generated and downloaded within `timeout` seconds.
+            `ValueError` - If `return_audio` is True and `postprocess` does not output WAV audio, before the speech is submitted.
         """
-        if isinstance(voice, Voice):
-            voice = voice.name
-        response = post(
-            url = 'https://api.uberduck.ai/speak',
-            auth = (self.api_key, self.api_secret),
-            json = {'speech': speech, 'voice': voice.lower()}
-        )
-        json = response.json()
-        log.debug(f'UUID request sent - status code {response.status_code}, data {json}.')
-        _handle_exceptions(response.status_code, json, voice)
+        voice = _voice_name(voice)
+        _check_audio_format(return_audio, postprocess)
+        map_file = return_audio and isinstance(file_path, (str, PathLike))
+        queue = _playback_queue(play_sound, postprocess)
+        streamed = False
+        key = cache_key(speech, voice) if self.cache is not None and return_bytes else None
+        bytes_ = None if key is None else self.cache.get(key)
+        if bytes_ is not None:
+            log.debug('Got audio for "%s" by voice "%s" from the cache.', speech, voice)
+            if file_path is not None and postprocess is None:
+                self._save(file_path, bytes_)
+        else:
+            self._check_voice(voice)
+            deadline = None if timeout is None else monotonic() + timeout
+            streamed = queue is not None and postprocess is None
+            keep = return_bytes or (bool(play_sound) and not streamed) or (postprocess is not None and file_path is not None) or (return_audio and not map_file)
+            if self.single_flight is not None and keep:
+                streamed = False
+                path, bytes_ = self._fetch_shared(speech, voice, deadline, timeout, check_every, poll_strategy, key)
+                if file_path is not None and postprocess is None:
+                    self._save(file_path, bytes_)
+            else:
+                path = self._render(speech, voice, deadline, timeout, check_every, poll_strategy)['path']
+                if keep or file_path is not None or streamed:
+                    bytes_ = self._download(
+                        path, deadline, timeout, None if postprocess else file_path, keep, queue if streamed else None, cancelled = _Batch.current_stopped
+                    )
+                if key is not None:
+                    self.cache.set(key, bytes_)
+        if postprocess is not None and bytes_ is not None:
+            bytes_ = postprocess.process(bytes_)
+            if file_path is not None:
+                self._save(file_path, bytes_)
         
-        result: dict = poll(
-            lambda: _get_audio(json['uuid']),
-            step = check_every,
-            poll_forever = True
-        )
-        
-        bytes_ = None
-        if file_path is not None:
-            bytes_ = get(result['path']).content
-            _write_to_file(file_path, bytes_)
-            log.debug(f'Wrote audio to file {file_path}.')
-        if play_sound:
-            bytes_ = bytes_ or get(result['path']).content
-            log.debug(f'Playing sound "{speech}" by voice "{voice}" with UUID "{json["uuid"]}" and URL "{result["path"]}".')
-            play(AudioSegment.from_file(BytesIO(bytes_), format = 'wav'))
-        if return_bytes:
-            return bytes_ or get(result['path']).content
-        return result['path']
+        if queue is not None:
+            if not streamed:
+                queue.play(bytes_)
+        elif play_sound:
+            log.debug('Playing sound "%s" by voice "%s".', speech, voice)
+            with self._span('playback', voice = voice):
+                _play(bytes_, postprocess.format if postprocess else 'wav')
+        if return_audio:
+            return SpeechAudio.from_file(file_path) if map_file else SpeechAudio(bytes_)
+        return bytes_ if return_bytes else path
 
+    @_timed_async
     async def speak_async(
         self,
         speech: str,
         voice: Union[str, Voice],
         *,
         return_bytes: bool = True,
-        check_every: int = 1,
-        file_path: Optional[str] = None,
-        play_sound: bool = False,
+        check_every: Union[int, float] = 1,
+        file_path: Union[str, PathLike, BinaryIO, AsyncByteSink, None] = None,
+        play_sound: Union[bool, PlaybackQueue] = False,
+        timeout: Optional[float] = None,
+        poll_strategy: Optional[PollStrategy] = None,
+        postprocess: Optional['Pipeline'] = None,
+        return_audio: bool = False,
         asyncio_loop: AbstractEventLoop = None
-    ) -> Union[bytes, str]:
+    ) -> Union[bytes, str, SpeechAudio]:
         """
         Parameters:
             `speech (str)` - The text that will be spoken.
@@ -213,64 +1258,751 @@ class UberDuck:
 
             `check_every (int | float)` - The number of seconds that the function will wait between checking if the audio is available. Defaults to 1.
 
-            `file_path (str)` - The path of the file that the audio will be saved to. If not specified, the function will not save the audio.
+            `file_path (str | os.PathLike | BinaryIO | AsyncByteSink)` - The path of the file, an open binary file object, or an object with an asynchronous `write` method that the audio will be saved to. The audio is written chunk by chunk while it is downloaded. If not specified, the function will not save the audio.
+
+            `play_sound (bool | uberduck.PlaybackQueue)` - If True, the function will play the audio that is generated by the API and return once it has been played. If a `uberduck.PlaybackQueue`, the audio is queued on it and starts playing as soon as its first frames are downloaded, and the function does not wait for it to be played. Defaults to False.
 
-            `play_sound (bool)` - If True, the function will play the audio that is generated by the API. Defaults to False.
+            `timeout (float)` - The maximum number of seconds for submitting, generating and downloading the audio. If not specified, the function will wait forever.
+
+            `poll_strategy (uberduck.PollStrategy)` - The strategy deciding when the status of the audio is checked. Takes precedence over `check_every`. Defaults to the instance's `poll_strategy`.
+
+            `postprocess (uberduck.Pipeline)` - Post-processing steps (resampling, normalizing, trimming, encoding) run on the audio in worker processes before it is returned, saved or played. The cache keeps the original audio. If not specified, the audio is returned as generated.
+
+            `return_audio (bool)` - If True, the function will return a `uberduck.SpeechAudio` instead of bytes, giving the duration, format and samples of the audio without copying them. If `file_path` is a path, the saved file is memory-mapped and the audio is not kept in memory unless `return_bytes` or `play_sound` need it. The audio must be WAV, so it cannot be combined with a `postprocess` pipeline encoding another format. Defaults to False.
 
             `asyncio_loop (AbstractEventLoop)` - The event loop that the function will use. Defaults to the creation of a new event loop.
 
         Returns:
-            Either the bytes of the audio that is generated by the API or the URL of the audio that is generated by the API depending on the `return_bytes` argument.
+            Either the bytes of the audio that is generated by the API or the URL of the audio that is generated by the API depending on the `return_bytes` argument, or a `uberduck.SpeechAudio` if `return_audio` is True.
 
         Raises:
-            `uberduck.InvalidVoice` - If the voice is not valid.
+            `uberduck.InvalidVoice` - If the voice is not valid or not in `voice_catalog`.
             `uberduck.Unauthorized` - If the API key or secret is invalid.
             `uberduck.Ratelimited` - If you got ratelimited by the API.
             `uberduck.HTTPException` - If the HTTP request failed from an unknown cause.
+            `uberduck.TimedOut` - If the audio was not submitted, generated and downloaded within `timeout` seconds.
+            `ValueError` - If `return_audio` is True and `postprocess` does not output WAV audio, before the speech is submitted.
         """
-        if isinstance(voice, Voice):
-            voice = voice.name
-        async with request(
-            'POST',
-            url = 'https://api.uberduck.ai/speak',
-            json = {'speech': speech, 'voice': voice.lower()},
-            auth = BasicAuth(self.api_key, self.api_secret)
-        ) as response:
-            json = await response.json()
-            log.debug(f'Asynchronous UUID request sent - status code {response.status}, data {json}.')
-            _handle_exceptions(response.status, json, voice)
-
+        voice = _voice_name(voice)
+        _check_audio_format(return_audio, postprocess)
         asyncio_loop = asyncio_loop or get_event_loop()
-        result = await asyncio_loop.run_in_executor(
-            None,
-            lambda: poll(
-                lambda: _get_audio(json['uuid']),
-                step = check_every,
-                poll_forever = True
-            )
-        )
+        map_file = return_audio and isinstance(file_path, (str, PathLike))
+        queue = _playback_queue(play_sound, postprocess)
+        streamed = False
+        key = cache_key(speech, voice) if self.cache is not None and return_bytes else None
+        bytes_ = None
+        if key is not None:
+            if self.cache.directory is None:
+                bytes_ = self.cache.get(key)
+            else:
+                bytes_ = await asyncio_loop.run_in_executor(None, self.cache.get, key)
+        write_cached = bytes_ is not None and file_path is not None
+        if bytes_ is not None:
+            log.debug('Got audio for "%s" by voice "%s" from the cache.', speech, voice)
+        else:
+            await self._check_voice_async(voice)
+            deadline = None if timeout is None else monotonic() + timeout
+            streamed = queue is not None and postprocess is None
+            keep = return_bytes or (bool(play_sound) and not streamed) or (postprocess is not None and file_path is not None) or (return_audio and not map_file)
+            if self.single_flight is not None and keep:
+                streamed = False
+                path, bytes_ = await self._fetch_shared_async(speech, voice, deadline, timeout, check_every, poll_strategy, key, asyncio_loop)
+                write_cached = file_path is not None
+            else:
+                path = (await self._render_async(speech, voice, deadline, timeout, check_every, poll_strategy))['path']
+                if keep or file_path is not None or streamed:
+                    bytes_ = await self._download_async(path, deadline, timeout, None if postprocess else file_path, keep, asyncio_loop, queue if streamed else None)
+                if key is not None:
+                    await self._cache_set_async(key, bytes_, asyncio_loop)
+        if postprocess is not None and bytes_ is not None:
+            bytes_ = await postprocess.process_async(bytes_, asyncio_loop)
+            write_cached = file_path is not None
+        if write_cached:
+            with self._span('file_write', size = len(bytes_)):
+                sink = await _open_sink_async(file_path, asyncio_loop)
+                try:
+                    await sink(bytes_)
+                    await sink.commit()
+                finally:
+                    await sink.close()
         
+        if queue is not None:
+            if not streamed:
+                queue.play(bytes_)
+        elif play_sound:
+            log.debug('Playing sound "%s" by voice "%s" asynchronously.', speech, voice)
+            with self._span('playback', voice = voice):
+                await asyncio_loop.run_in_executor(None, _play, bytes_, postprocess.format if postprocess else 'wav')
+        if return_audio:
+            return SpeechAudio.from_file(file_path) if map_file else SpeechAudio(bytes_)
+        return bytes_ if return_bytes else path
+
+    def speak_stream(
+        self,
+        speech: str,
+        voice: Union[str, Voice],
+        *,
+        chunk_size: int = CHUNK_SIZE,
+        check_every: Union[int, float] = 1,
+        timeout: Optional[float] = None,
+        poll_strategy: Optional[PollStrategy] = None
+    ) -> Iterator[bytes]:
+        """
+        A generator that speaks the text like `speak` and yields the audio in chunks while it is downloaded, without holding the whole audio in memory.
+        The speech is submitted when the first chunk is requested. Audio found in `cache` is yielded as one chunk, but streamed audio is not added to it.
+
+        Parameters:
+            `speech (str)` - The text that will be spoken.
+
+            `voice (str | uberduck.Voice)` - The voice that will be used to speak the text.
+
+            `chunk_size (int)` - The maximum size of each chunk in bytes. Defaults to 65536.
+
+            `check_every`, `timeout` and `poll_strategy` - The same as in `speak`.
+
+        Yields:
+            The audio (a `.wav` file) in chunks of bytes.
+        """
+        voice = _voice_name(voice)
+        cached = None if self.cache is None else self.cache.get(cache_key(speech, voice))
+        if cached is not None:
+            yield cached
+            return
+        self._check_voice(voice)
+        deadline = None if timeout is None else monotonic() + timeout
+        result = self._render(speech, voice, deadline, timeout, check_every, poll_strategy)
+        yield from self._iter_download(result['path'], deadline, timeout, chunk_size)
+
+    async def speak_stream_async(
+        self,
+        speech: str,
+        voice: Union[str, Voice],
+        *,
+        chunk_size: int = CHUNK_SIZE,
+        check_every: Union[int, float] = 1,
+        timeout: Optional[float] = None,
+        poll_strategy: Optional[PollStrategy] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        The asynchronous version of `speak_stream`, to be used with `async for`.
+        """
+        voice = _voice_name(voice)
+        cached = None if self.cache is None or self.cache.directory is not None else self.cache.get(cache_key(speech, voice))
+        if cached is None and self.cache is not None and self.cache.directory is not None:
+            cached = await get_event_loop().run_in_executor(None, self.cache.get, cache_key(speech, voice))
+        if cached is not None:
+            yield cached
+            return
+        await self._check_voice_async(voice)
+        deadline = None if timeout is None else monotonic() + timeout
+        result = await self._render_async(speech, voice, deadline, timeout, check_every, poll_strategy)
+        async for chunk in self._iter_download_async(result['path'], deadline, timeout, chunk_size):
+            yield chunk
+
+    def start_job(self, speech: str, voice: Union[str, Voice], *, timeout: Optional[float] = None) -> JobHandle:
+        """
+        Submits the speech without waiting for its audio and returns a `uberduck.JobHandle`, which can be saved (with `to_dict`) and given to `resume_job`, even by another process.
+
+        Parameters:
+            `speech (str)` - The text that will be spoken.
+
+            `voice (str | uberduck.Voice)` - The voice that will be used to speak the text.
+
+            `timeout (float)` - The maximum number of seconds for submitting the speech. If not specified, the function will wait forever.
+
+        Returns:
+            A `uberduck.JobHandle` in the `'submitted'` state.
+
+        Raises:
+            The same exceptions as `speak`.
+        """
+        voice = _voice_name(voice)
+        self._check_voice(voice)
+        deadline = None if timeout is None else monotonic() + timeout
+        return JobHandle(self._submit(speech, voice, deadline, timeout), speech, voice)
+
+    async def start_job_async(self, speech: str, voice: Union[str, Voice], *, timeout: Optional[float] = None) -> JobHandle:
+        """
+        The asynchronous version of `start_job`.
+        """
+        voice = _voice_name(voice)
+        await self._check_voice_async(voice)
+        deadline = None if timeout is None else monotonic() + timeout
+        return JobHandle(await self._submit_async(speech, voice, deadline, timeout), speech, voice)
+
+    def resume_job(
+        self,
+        job: Union[JobHandle, str],
+        *,
+        return_bytes: bool = True,
+        check_every: Union[int, float] = 1,
+        file_path: Union[str, PathLike, BinaryIO, None] = None,
+        timeout: Optional[float] = None,
+        poll_strategy: Optional[PollStrategy] = None
+    ) -> Union[bytes, str]:
+        """
+        Polls for and downloads the audio of a speech that was already submitted, without generating it again. The `state` and `path` of `job` are updated as it progresses.
+
+        Parameters:
+            `job (uberduck.JobHandle | str)` - The job returned by `start_job`, or the UUID of the audio.
+
+            `return_bytes`, `check_every`, `file_path`, `timeout` and `poll_strategy` - The same as in `speak`.
+
+        Returns:
+            Either the bytes of the audio or its URL depending on the `return_bytes` argument.
+
+        Raises:
+            The same exceptions as `speak`, except `uberduck.InvalidVoice`.
+        """
+        job = job if isinstance(job, JobHandle) else JobHandle(job)
+        deadline = None if timeout is None else monotonic() + timeout
         bytes_ = None
+        try:
+            if job.path is None:
+                job.path = self._wait(job.uuid, job.speech, job.voice, deadline, timeout, check_every, poll_strategy)['path']
+                job.state = 'ready'
+            if return_bytes or file_path is not None:
+                bytes_ = self._download(job.path, deadline, timeout, file_path, return_bytes)
+                job.state = 'downloaded'
+        except TimedOut:
+            raise
+        except Exception as e:
+            job.state, job.error = 'failed', repr(e)
+            raise
+        if bytes_ is not None and self.cache is not None and job.speech and job.voice:
+            self.cache.set(cache_key(job.speech, job.voice), bytes_)
+        return bytes_ if return_bytes else job.path
+
+    async def resume_job_async(
+        self,
+        job: Union[JobHandle, str],
+        *,
+        return_bytes: bool = True,
+        check_every: Union[int, float] = 1,
+        file_path: Union[str, PathLike, BinaryIO, AsyncByteSink, None] = None,
+        timeout: Optional[float] = None,
+        poll_strategy: Optional[PollStrategy] = None,
+        asyncio_loop: AbstractEventLoop = None
+    ) -> Union[bytes, str]:
+        """
+        The asynchronous version of `resume_job`.
+        """
+        job = job if isinstance(job, JobHandle) else JobHandle(job)
+        asyncio_loop = asyncio_loop or get_event_loop()
+        deadline = None if timeout is None else monotonic() + timeout
+        bytes_ = None
+        try:
+            if job.path is None:
+                job.path = (await self._wait_async(job.uuid, job.speech, job.voice, deadline, timeout, check_every, poll_strategy))['path']
+                job.state = 'ready'
+            if return_bytes or file_path is not None:
+                bytes_ = await self._download_async(job.path, deadline, timeout, file_path, return_bytes, asyncio_loop)
+                job.state = 'downloaded'
+        except TimedOut:
+            raise
+        except Exception as e:
+            job.state, job.error = 'failed', repr(e)
+            raise
+        if bytes_ is not None and self.cache is not None and job.speech and job.voice:
+            if self.cache.directory is None:
+                self.cache.set(cache_key(job.speech, job.voice), bytes_)
+            else:
+                await asyncio_loop.run_in_executor(None, self.cache.set, cache_key(job.speech, job.voice), bytes_)
+        return bytes_ if return_bytes else job.path
+
+    def submit(
+        self,
+        speech: str,
+        voice: Union[str, Voice],
+        *,
+        return_bytes: bool = True,
+        check_every: Union[int, float] = 1,
+        file_path: Union[str, PathLike, BinaryIO, None] = None,
+        timeout: Optional[float] = None,
+        poll_strategy: Optional[PollStrategy] = None
+    ) -> SpeechJob:
+        """
+        Submits the speech and returns a `uberduck.SpeechJob` as soon as the API has accepted it. The audio is polled for by the shared poller and downloaded by a pool of `pool_size` threads in the background.
+
+        Parameters:
+            `speech`, `voice`, `return_bytes`, `check_every`, `file_path`, `timeout` and `poll_strategy` - The same as in `speak`. `timeout` covers the whole job, not only the submission.
+
+        Returns:
+            A `uberduck.SpeechJob` whose `result()` is the bytes or the URL of the audio depending on the `return_bytes` argument.
+
+        Raises:
+            The exceptions of `speak` that happen while submitting. Later exceptions are raised by `SpeechJob.result()`.
+        """
+        voice = _voice_name(voice)
+        key = cache_key(speech, voice) if self.cache is not None and return_bytes else None
+        cached = None if key is None else self.cache.get(key)
+        if cached is not None:
+            log.debug('Got audio for "%s" by voice "%s" from the cache.', speech, voice)
+            if file_path is not None:
+                _write_to_file(file_path, cached)
+            future = Future()
+            future.set_result(cached)
+            return SpeechJob(JobHandle(None, speech, voice, 'downloaded'), future)
+        self._check_voice(voice)
+        deadline = None if timeout is None else monotonic() + timeout
+        handle = JobHandle(self._submit(speech, voice, deadline, timeout), speech, voice)
+        poll = self._poller.add(
+            handle.uuid, self._poll_strategy(poll_strategy, check_every), timeout, speech, voice, time_left = _time_left(deadline, timeout, handle.uuid)
+        )
+        job = SpeechJob(handle, Future(), poll.cancel)
+        poll.add_done_callback(lambda poll: self._on_ready(job, poll, return_bytes, file_path, deadline, timeout, key))
+        return job
+
+    def _on_ready(
+        self,
+        job: SpeechJob,
+        poll: Future,
+        return_bytes: bool,
+        file_path: Union[str, PathLike, BinaryIO, None],
+        deadline: Optional[float],
+        timeout: Optional[float],
+        key: Optional[str]
+    ) -> None:
+        """
+        A private function called by the poller once the audio of a submitted job is ready (or polling failed), which hands the download over to the download threads.
+        """
+        if poll.cancelled():
+            job._future.cancel()
+            return
+        if poll.exception() is not None:
+            job.handle.state, job.handle.error = 'failed', repr(poll.exception())
+            _settle(job._future, exception = poll.exception())
+            return
+        job.handle.path, job.handle.state = poll.result()['path'], 'ready'
+        if not return_bytes and file_path is None:
+            _settle(job._future, job.handle.path)
+            return
+        try:
+            self._downloads().submit(self._finish, job, return_bytes, file_path, deadline, timeout, key)
+        except RuntimeError: # the client was closed
+            job._future.cancel()
+
+    def _finish(
+        self,
+        job: SpeechJob,
+        return_bytes: bool,
+        file_path: Union[str, PathLike, BinaryIO, None],
+        deadline: Optional[float],
+        timeout: Optional[float],
+        key: Optional[str]
+    ) -> None:
+        """
+        A private function that downloads the audio of a submitted job in a download thread and resolves the job.
+        """
+        if job.done():
+            return
+        try:
+            bytes_ = self._download(job.handle.path, deadline, timeout, file_path, return_bytes, cancelled = job.cancelled)
+            if key is not None:
+                self.cache.set(key, bytes_)
+        except CancelledError: # the job was cancelled while downloading
+            return
+        except Exception as e:
+            if not isinstance(e, TimedOut):
+                job.handle.state, job.handle.error = 'failed', repr(e)
+            _settle(job._future, exception = e)
+            return
+        job.handle.state = 'downloaded'
+        _settle(job._future, bytes_ if return_bytes else job.handle.path)
+
+    def _downloads(self) -> ThreadPoolExecutor:
+        """
+        A private function that returns the threads downloading the audio of submitted jobs, creating them on first use.
+        """
+        with self._download_lock:
+            if self._download_executor is None:
+                self._download_executor = ThreadPoolExecutor(max_workers = self._pool_size, thread_name_prefix = 'uberduck-download')
+            return self._download_executor
+
+    async def submit_async(
+        self,
+        speech: str,
+        voice: Union[str, Voice],
+        *,
+        return_bytes: bool = True,
+        check_every: Union[int, float] = 1,
+        file_path: Union[str, PathLike, BinaryIO, AsyncByteSink, None] = None,
+        timeout: Optional[float] = None,
+        poll_strategy: Optional[PollStrategy] = None
+    ) -> SpeechJob:
+        """
+        The asynchronous version of `submit`. The returned `uberduck.SpeechJob` is completed by a task of the running event loop and is awaited with `await job`.
+        """
+        voice = _voice_name(voice)
+        loop = get_event_loop()
+        future = loop.create_future()
+        key = cache_key(speech, voice) if self.cache is not None and return_bytes else None
+        cached = None
+        if key is not None:
+            cached = self.cache.get(key) if self.cache.directory is None else await loop.run_in_executor(None, self.cache.get, key)
+        if cached is not None:
+            log.debug('Got audio for "%s" by voice "%s" from the cache.', speech, voice)
+            if file_path is not None:
+                sink = await _open_sink_async(file_path, loop)
+                try:
+                    await sink(cached)
+                    await sink.commit()
+                finally:
+                    await sink.close()
+            future.set_result(cached)
+            return SpeechJob(JobHandle(None, speech, voice, 'downloaded'), future)
+        await self._check_voice_async(voice)
+        deadline = None if timeout is None else monotonic() + timeout
+        handle = JobHandle(await self._submit_async(speech, voice, deadline, timeout), speech, voice)
+        job = SpeechJob(handle, future)
+        task = loop.create_task(self._complete_async(job, return_bytes, check_every, file_path, timeout, poll_strategy, deadline, key))
+        job._on_cancel = task.cancel
+        return job
+
+    async def _complete_async(
+        self,
+        job: SpeechJob,
+        return_bytes: bool,
+        check_every: Union[int, float],
+        file_path: Union[str, PathLike, BinaryIO, AsyncByteSink, None],
+        timeout: Optional[float],
+        poll_strategy: Optional[PollStrategy],
+        deadline: Optional[float],
+        key: Optional[str]
+    ) -> None:
+        """
+        A private task that polls for and downloads the audio of a job submitted with `submit_async`, and resolves the job.
+        """
+        handle = job.handle
+        try:
+            handle.path = (await self._wait_async(handle.uuid, handle.speech, handle.voice, deadline, timeout, check_every, poll_strategy))['path']
+            handle.state = 'ready'
+            bytes_ = None
+            if return_bytes or file_path is not None:
+                bytes_ = await self._download_async(handle.path, deadline, timeout, file_path, return_bytes)
+                handle.state = 'downloaded'
+            if key is not None:
+                if self.cache.directory is None:
+                    self.cache.set(key, bytes_)
+                else:
+                    await get_event_loop().run_in_executor(None, self.cache.set, key, bytes_)
+        except Exception as e:
+            if not isinstance(e, TimedOut):
+                handle.state, handle.error = 'failed', repr(e)
+            if not job.done():
+                job._future.set_exception(e)
+            return
+        if not job.done():
+            job._future.set_result(bytes_ if return_bytes else handle.path)
+
+    def _speak_item(self, batch: _Batch, index: int, speech: str, voice: Union[str, Voice], **kwargs) -> SpeechResult:
+        """
+        A private function that speaks one item of a batch, returning any exception as part of the `uberduck.SpeechResult` instead of raising it.
+        Once `batch` is stopped, the item stops waiting for and downloading its audio.
+        """
+        voice = _voice_name(voice)
+        _Batch._current.batch = batch
+        try:
+            if batch.stopped:
+                raise CancelledError()
+            return SpeechResult(index, speech, voice, result = self.speak(speech, voice, **kwargs))
+        except Exception as e:
+            log.debug('Item %s of batch failed with %r.', index, e)
+            return SpeechResult(index, speech, voice, exception = e)
+        finally:
+            _Batch._current.batch = None
+
+    async def _speak_item_async(self, index: int, speech: str, voice: Union[str, Voice], **kwargs) -> SpeechResult:
+        """
+        A private function that speaks one item of a batch asynchronously, returning any exception as part of the `uberduck.SpeechResult` instead of raising it.
+        """
+        voice = _voice_name(voice)
+        try:
+            return SpeechResult(index, speech, voice, result = await self.speak_async(speech, voice, **kwargs))
+        except Exception as e:
+            log.debug('Item %s of asynchronous batch failed with %r.', index, e)
+            return SpeechResult(index, speech, voice, exception = e)
+
+    def speak_many(
+        self,
+        items: Iterable[Tuple[str, Union[str, Voice]]],
+        *,
+        concurrency: int = 5,
+        ordered: bool = True,
+        return_bytes: bool = True,
+        check_every: Union[int, float] = 1,
+        timeout: Optional[float] = None,
+        poll_strategy: Optional[PollStrategy] = None,
+        postprocess: Optional['Pipeline'] = None
+    ) -> Iterator[SpeechResult]:
+        """
+        Parameters:
+            `items (Iterable[tuple[str, str | uberduck.Voice]])` - The (speech, voice) pairs that will be spoken. It is consumed lazily, so it can be a generator.
+
+            `concurrency (int)` - The maximum number of items that are being generated at the same time. Defaults to 5.
+
+            `ordered (bool)` - If True, results are yielded in the order of `items`. If False, results are yielded as soon as they are finished. Defaults to True.
+
+            `return_bytes (bool)` - If True, the results will contain the bytes of the audio. If False, the results will contain the URL of the audio. Defaults to True.
+
+            `check_every (int | float)` - The number of seconds that the function will wait between checking if the audio is available. Defaults to 1.
+
+            `timeout (float)` - The maximum number of seconds for submitting, generating and downloading each item. If not specified, the function will wait forever.
+
+            `poll_strategy (uberduck.PollStrategy)` - The strategy deciding when the status of each item is checked. Takes precedence over `check_every`. Defaults to the instance's `poll_strategy`.
+
+            `postprocess (uberduck.Pipeline)` - Post-processing steps run on the audio of each item in worker processes, overlapping with the generation of the other items. If not specified, the audio is returned as generated.
+
+        Yields:
+            A `uberduck.SpeechResult` for each item. Errors of a single item are stored in its `exception` attribute and do not stop the batch.
+        """
+        items = enumerate(items)
+        pending = set()
+        buffered = {}
+        next_index = 0
+        batch = _Batch()
+        executor = ThreadPoolExecutor(max_workers = concurrency, thread_name_prefix = 'uberduck-batch')
+        try:
+            while True:
+                for index, (speech, voice) in islice(items, concurrency - len(pending)):
+                    pending.add(executor.submit(
+                        self._speak_item, batch, index, speech, voice,
+                        return_bytes = return_bytes, check_every = check_every, timeout = timeout, poll_strategy = poll_strategy,
+                        postprocess = postprocess
+                    ))
+                if not pending:
+                    return
+                done, pending = wait_futures(pending, return_when = FIRST_COMPLETED_FUTURE)
+                ready, next_index = _collect_results([future.result() for future in done], buffered, next_index, ordered)
+                yield from ready
+        finally:
+            # if closed early, items that have not started are cancelled (`shutdown(cancel_futures = True)` needs Python 3.9)
+            # and items in flight stop polling and downloading instead of being waited for
+            for future in pending:
+                future.cancel()
+            batch.stop()
+            executor.shutdown(wait = False)
+
+    async def speak_many_async(
+        self,
+        items: Iterable[Tuple[str, Union[str, Voice]]],
+        *,
+        concurrency: int = 5,
+        ordered: bool = True,
+        return_bytes: bool = True,
+        check_every: Union[int, float] = 1,
+        timeout: Optional[float] = None,
+        poll_strategy: Optional[PollStrategy] = None,
+        postprocess: Optional['Pipeline'] = None
+    ) -> AsyncIterator[SpeechResult]:
+        """
+        Parameters:
+            `items (Iterable[tuple[str, str | uberduck.Voice]])` - The (speech, voice) pairs that will be spoken. It is consumed lazily, so it can be a generator.
+
+            `concurrency (int)` - The maximum number of items that are being generated at the same time. Defaults to 5.
+
+            `ordered (bool)` - If True, results are yielded in the order of `items`. If False, results are yielded as soon as they are finished. Defaults to True.
+
+            `return_bytes (bool)` - If True, the results will contain the bytes of the audio. If False, the results will contain the URL of the audio. Defaults to True.
+
+            `check_every (int | float)` - The number of seconds that the function will wait between checking if the audio is available. Defaults to 1.
+
+            `timeout (float)` - The maximum number of seconds for submitting, generating and downloading each item. If not specified, the function will wait forever.
+
+            `poll_strategy (uberduck.PollStrategy)` - The strategy deciding when the status of each item is checked. Takes precedence over `check_every`. Defaults to the instance's `poll_strategy`.
+
+            `postprocess (uberduck.Pipeline)` - Post-processing steps run on the audio of each item in worker processes, overlapping with the generation of the other items. If not specified, the audio is returned as generated.
+
+        Yields:
+            A `uberduck.SpeechResult` for each item. Errors of a single item are stored in its `exception` attribute and do not stop the batch.
+        """
+        items = enumerate(items)
+        pending = set()
+        buffered = {}
+        next_index = 0
+        try:
+            while True:
+                for index, (speech, voice) in islice(items, concurrency - len(pending)):
+                    pending.add(ensure_future(self._speak_item_async(
+                        index, speech, voice,
+                        return_bytes = return_bytes, check_every = check_every, timeout = timeout, poll_strategy = poll_strategy,
+                        postprocess = postprocess
+                    )))
+                if not pending:
+                    return
+                done, pending = await wait(pending, return_when = FIRST_COMPLETED)
+                ready, next_index = _collect_results([task.result() for task in done], buffered, next_index, ordered)
+                for result in ready:
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def speak_long_stream(
+        self,
+        speech: str,
+        voice: Union[str, Voice],
+        *,
+        max_length: int = 300,
+        concurrency: int = 5,
+        check_every: Union[int, float] = 1,
+        timeout: Optional[float] = None,
+        poll_strategy: Optional[PollStrategy] = None
+    ) -> Iterator[SpeechAudio]:
+        """
+        Parameters:
+            `speech (str)` - The text that will be spoken. It is split with `uberduck.split_text`, at sentence boundaries where possible.
+
+            `voice (str | uberduck.Voice)` - The voice that will be used to speak the text.
+
+            `max_length (int)` - The maximum number of characters of each chunk. Defaults to 300.
+
+            `concurrency (int)` - The maximum number of chunks that are being generated at the same time. Defaults to 5.
+
+            `check_every (int | float)` - The number of seconds that the function will wait between checking if the audio is available. Defaults to 1.
+
+            `timeout (float)` - The maximum number of seconds for submitting, generating and downloading each chunk. If not specified, the function will wait forever.
+
+            `poll_strategy (uberduck.PollStrategy)` - The strategy deciding when the status of each chunk is checked. Takes precedence over `check_every`. Defaults to the instance's `poll_strategy`.
+
+        Yields:
+            A `uberduck.SpeechAudio` for each chunk, in order. The first one is yielded as soon as it is downloaded, while the later chunks are still being generated.
+
+        Raises:
+            The exception of the first chunk that failed, after the chunks before it have been yielded. The chunks that have not been submitted are cancelled, and the ones in flight stop polling and downloading right away (the API still generates them).
+        """
+        chunks = split_text(speech, max_length)
+        log.debug('Split %s characters into %s chunks of at most %s.', len(speech), len(chunks), max_length)
+        results = self.speak_many(
+            ((chunk, voice) for chunk in chunks),
+            concurrency = concurrency, check_every = check_every, timeout = timeout, poll_strategy = poll_strategy
+        )
+        try:
+            for result in results:
+                if result.exception is not None:
+                    raise result.exception
+                yield SpeechAudio(result.result)
+        finally:
+            results.close()
+
+    async def speak_long_stream_async(
+        self,
+        speech: str,
+        voice: Union[str, Voice],
+        *,
+        max_length: int = 300,
+        concurrency: int = 5,
+        check_every: Union[int, float] = 1,
+        timeout: Optional[float] = None,
+        poll_strategy: Optional[PollStrategy] = None
+    ) -> AsyncIterator[SpeechAudio]:
+        """
+        Parameters:
+            `speech`, `voice`, `max_length`, `concurrency`, `check_every`, `timeout` and `poll_strategy` - The same as in `speak_long_stream`.
+
+        Yields:
+            A `uberduck.SpeechAudio` for each chunk, in order, as soon as it and the chunks before it are downloaded.
+
+        Raises:
+            The exception of the first chunk that failed, after the chunks before it have been yielded. The chunks that have not been submitted are cancelled, and the ones in flight stop polling and downloading right away (the API still generates them).
+        """
+        chunks = split_text(speech, max_length)
+        log.debug('Split %s characters into %s chunks of at most %s.', len(speech), len(chunks), max_length)
+        results = self.speak_many_async(
+            ((chunk, voice) for chunk in chunks),
+            concurrency = concurrency, check_every = check_every, timeout = timeout, poll_strategy = poll_strategy
+        )
+        try:
+            async for result in results:
+                if result.exception is not None:
+                    raise result.exception
+                yield SpeechAudio(result.result)
+        finally:
+            await results.aclose()
+
+    def speak_long(
+        self,
+        speech: str,
+        voice: Union[str, Voice],
+        *,
+        max_length: int = 300,
+        concurrency: int = 5,
+        padding_ms: float = 0,
+        crossfade_ms: float = 0,
+        file_path: Union[str, PathLike, BinaryIO, None] = None,
+        return_audio: bool = False,
+        check_every: Union[int, float] = 1,
+        timeout: Optional[float] = None,
+        poll_strategy: Optional[PollStrategy] = None
+    ) -> Union[bytes, SpeechAudio]:
+        """
+        Parameters:
+            `speech`, `voice`, `max_length`, `concurrency`, `check_every`, `timeout` and `poll_strategy` - The same as in `speak_long_stream`.
+
+            `padding_ms (float)` - The milliseconds of silence put between the chunks. Defaults to 0.
+
+            `crossfade_ms (float)` - The milliseconds over which each chunk fades into the next one, instead of `padding_ms`. Defaults to 0.
+
+            `file_path (str | os.PathLike | BinaryIO)` - The path of the file, or an open binary file object, that the stitched audio will be saved to. If not specified, the function will not save the audio.
+
+            `return_audio (bool)` - If True, the function will return a `uberduck.SpeechAudio` instead of bytes. Defaults to False.
+
+        Returns:
+            The bytes of one WAV file with the audio of every chunk in order, or a `uberduck.SpeechAudio` if `return_audio` is True.
+
+        Raises:
+            The same exceptions as `speak`, raised by the first chunk that failed.
+        """
+        clips = list(self.speak_long_stream(
+            speech, voice,
+            max_length = max_length, concurrency = concurrency, check_every = check_every, timeout = timeout, poll_strategy = poll_strategy
+        ))
+        audio = SpeechAudio.concatenate(clips, padding_ms = padding_ms, crossfade_ms = crossfade_ms)
         if file_path is not None:
-            async with request('GET', result['path']) as response:
-                bytes_ = await response.read()
-            await asyncio_loop.run_in_executor(
-                None,
-                lambda: _write_to_file(file_path, bytes_)
-            )
-            log.debug(f'Wrote audio to file {file_path}.')
-        if play_sound:
-            if not bytes_:
-                async with request('GET', result['path']) as response:
-                    bytes_ = await response.read()
-            log.debug(f'Playing sound "{speech}" by voice "{voice}" with UUID "{json["uuid"]}" and URL "{result["path"]}" asynchronously.')
-            await asyncio_loop.run_in_executor(
-                None,
-                lambda: play(AudioSegment.from_file(BytesIO(bytes_), format = 'wav'))
-            )
-        if return_bytes:
-            if not bytes_:
-                async with request('GET', result['path']) as response:
-                    return await response.read()
-            return bytes_
-        return result['path']
\ No newline at end of file
+            audio.save(file_path)
+        return audio if return_audio else bytes(audio)
+
+    async def speak_long_async(
+        self,
+        speech: str,
+        voice: Union[str, Voice],
+        *,
+        max_length: int = 300,
+        concurrency: int = 5,
+        padding_ms: float = 0,
+        crossfade_ms: float = 0,
+        file_path: Union[str, PathLike, BinaryIO, AsyncByteSink, None] = None,
+        return_audio: bool = False,
+        check_every: Union[int, float] = 1,
+        timeout: Optional[float] = None,
+        poll_strategy: Optional[PollStrategy] = None,
+        asyncio_loop: AbstractEventLoop = None
+    ) -> Union[bytes, SpeechAudio]:
+        """
+        Parameters:
+            `speech`, `voice`, `max_length`, `concurrency`, `padding_ms`, `crossfade_ms`, `return_audio`, `check_every`, `timeout` and `poll_strategy` - The same as in `speak_long`.
+
+            `file_path (str | os.PathLike | BinaryIO | AsyncByteSink)` - The path of the file, an open binary file object, or an object with an asynchronous `write` method that the stitched audio will be saved to.
+
+            `asyncio_loop (AbstractEventLoop)` - The event loop that the function will use. Defaults to the current event loop.
+
+        Returns:
+            The bytes of one WAV file with the audio of every chunk in order, or a `uberduck.SpeechAudio` if `return_audio` is True.
+
+        Raises:
+            The same exceptions as `speak_async`, raised by the first chunk that failed.
+        """
+        clips = [clip async for clip in self.speak_long_stream_async(
+            speech, voice,
+            max_length = max_length, concurrency = concurrency, check_every = check_every, timeout = timeout, poll_strategy = poll_strategy
+        )]
+        audio = SpeechAudio.concatenate(clips, padding_ms = padding_ms, crossfade_ms = crossfade_ms)
+        bytes_ = bytes(audio)
+        sink = await _open_sink_async(file_path, asyncio_loop or get_event_loop())
+        if sink is not None:
+            try:
+                await sink(bytes_)
+                await sink.commit()
+            finally:
+                await sink.close()
+        return audio if return_audio else bytes_
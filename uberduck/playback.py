@@ -0,0 +1,557 @@
+"""
+Copyright 2022-present ImNimboss
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from asyncio import ensure_future, wrap_future
+from concurrent.futures import Future
+from os import PathLike
+from queue import Queue
+from threading import Lock, Thread
+from time import perf_counter, sleep
+from typing import AsyncIterable, BinaryIO, Iterable, List, Optional, Tuple, Union
+from uberduck.audio import SpeechAudio, wav_header, _find_samples, _PCM, _IEEE_FLOAT
+from logging import getLogger
+
+log = getLogger(__name__)
+
+_MAX_HEADER = 1 << 16 # a stream whose samples have not started after this many bytes is not treated as a WAV file
+_UNKNOWN_SIZE = 0xFFFFFFFF # the size written by encoders that do not know the length of the stream in advance
+
+class _WavStream:
+    """
+    A private class parsing a WAV file that arrives in chunks. `feed` returns the whole frames received so far, as soon as the header is complete.
+    """
+    __slots__ = ('format', 'block_align', '_header', '_pending', '_remaining')
+
+    def __init__(self) -> None:
+        self.format: Optional[Tuple[int, int, int, int]] = None # format tag, channels, sample rate, sample width
+        self.block_align = 0
+        self._header = bytearray()
+        self._pending = b''
+        self._remaining: Optional[int] = None
+
+    def feed(self, chunk: Union[bytes, memoryview]) -> memoryview:
+        view = memoryview(chunk)
+        if self.format is None:
+            if self._header: # the header is split across chunks
+                self._header += view
+                view = memoryview(self._header)
+            found = _find_samples(view)
+            if found is None:
+                if not self._header:
+                    self._header += view
+                if len(self._header) > _MAX_HEADER:
+                    raise ValueError(f'The samples of the WAV file do not start within its first {_MAX_HEADER} bytes.')
+                return memoryview(b'')
+            (format_tag, channels, sample_rate, _, block_align, bits), position, size = found
+            if not block_align:
+                raise ValueError('The WAV file has no channels or no sample width.')
+            self.format = format_tag, channels, sample_rate, bits // 8
+            self.block_align = block_align
+            self._remaining = None if size == _UNKNOWN_SIZE else size
+            view = view[position:]
+        if self._remaining is not None:
+            view = view[:self._remaining] # anything after the samples is another chunk, like metadata
+            self._remaining -= len(view)
+        if self._pending: # the end of a frame split across chunks
+            view = memoryview(self._pending + view)
+        usable = len(view) - len(view) % self.block_align
+        self._pending = bytes(view[usable:])
+        return view[:usable]
+
+class AudioSink:
+    """
+    The base class of the outputs of a `uberduck.PlaybackQueue`. The queue calls `open` before the first frames of a clip whose format differs from the previous one, `write` with every group of whole frames, and `close` when it is closed.
+    """
+    def open(self, sample_rate: int, channels: int, sample_width: int, format_tag: int = _PCM) -> None:
+        raise NotImplementedError
+
+    def write(self, frames: memoryview) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+class FileSink(AudioSink):
+    """
+    Writes the played audio to a path or a binary file object, like a pipe to another program or `sys.stdout.buffer`, so that playback can run without an audio device.
+    Every clip played through the queue is appended to one WAV file (or to raw samples if `raw` is True), so all the clips must have the same format.
+    If the file can seek, the sizes in the header are filled in when the sink is closed, otherwise they are left as the placeholder used for streams.
+    With `realtime`, writes are slowed down to the speed at which a device would play the audio.
+    """
+    def __init__(self, file: Union[str, PathLike, BinaryIO], *, raw: bool = False, realtime: bool = False) -> None:
+        self.file = file
+        self.raw = raw
+        self.realtime = realtime
+        self.written = 0
+        self._output: Optional[BinaryIO] = None
+        self._owned = False
+        self._format: Optional[Tuple[int, int, int, int]] = None
+        self._start = 0.0
+
+    def __repr__(self):
+        return f'<{type(self).__name__} file={self.file!r} written={self.written}>'
+
+    def _open_output(self) -> BinaryIO:
+        if isinstance(self.file, (str, PathLike)):
+            self._owned = True
+            return open(self.file, 'wb')
+        return self.file
+
+    def open(self, sample_rate: int, channels: int, sample_width: int, format_tag: int = _PCM) -> None:
+        format_ = sample_rate, channels, sample_width, format_tag
+        if self._format is not None:
+            raise ValueError(f'{type(self).__name__} can only play clips of one format, got {format_} after {self._format}.')
+        self._format = format_
+        self._output = self._open_output()
+        if not self.raw:
+            header = bytearray(wav_header(0, sample_rate, channels, sample_width, format_tag))
+            header[4:8] = header[40:44] = _UNKNOWN_SIZE.to_bytes(4, 'little')
+            self._output.write(header)
+        self._start = perf_counter()
+
+    def write(self, frames: memoryview) -> None:
+        self._output.write(frames)
+        self._output.flush()
+        self.written += len(frames)
+        if self.realtime:
+            sample_rate, channels, sample_width, _ = self._format
+            ahead = self._start + self.written / (sample_rate * channels * sample_width) - perf_counter()
+            if ahead > 0:
+                sleep(ahead)
+
+    def close(self) -> None:
+        if self._output is None:
+            return
+        output, self._output = self._output, None
+        try:
+            if not self.raw and output.seekable():
+                sample_rate, channels, sample_width, format_tag = self._format
+                output.seek(0)
+                output.write(wav_header(self.written, sample_rate, channels, sample_width, format_tag))
+                output.seek(0, 2)
+        finally:
+            if self._owned:
+                output.close()
+
+class FFplaySink(FileSink):
+    """
+    Plays the audio on the default device by piping it to `ffplay`, which is part of ffmpeg. The process is started when the first clip is played, and again when the format changes.
+    `arguments` are added to the command line, like `('-volume', '50')`.
+    """
+    def __init__(self, executable: str = 'ffplay', arguments: Tuple[str, ...] = ()) -> None:
+        super().__init__(None)
+        self.executable = executable
+        self.arguments = arguments
+        self._process = None
+
+    def open(self, sample_rate: int, channels: int, sample_width: int, format_tag: int = _PCM) -> None:
+        if self._format is not None: # another format, ffplay is started again for it
+            self.close()
+            self._format = None
+        super().open(sample_rate, channels, sample_width, format_tag)
+
+    def _open_output(self) -> BinaryIO:
+        from subprocess import Popen, PIPE, DEVNULL
+        command = [
+            self.executable, '-nodisp', '-autoexit', '-loglevel', 'error',
+            '-probesize', '32', '-analyzeduration', '0', '-fflags', 'nobuffer', *self.arguments, '-i', 'pipe:0'
+        ]
+        self._process = Popen(command, stdin = PIPE, stdout = DEVNULL)
+        return self._process.stdin
+
+    def close(self) -> None:
+        if self._output is None:
+            return
+        self._output.close() # ffplay exits once it has played everything
+        self._output = None
+        self._process.wait()
+
+class PyAudioSink(AudioSink):
+    """
+    Plays the audio on a device through PyAudio (`pip install pyaudio`). `device_index` chooses the output device, the default one if not specified.
+    Writes block until the device has room for the frames, so a clip is never more than `frames_per_buffer` frames ahead of what is heard.
+    """
+    def __init__(self, device_index: Optional[int] = None, frames_per_buffer: int = 1024) -> None:
+        try:
+            import pyaudio
+        except ImportError:
+            raise ImportError('`PyAudioSink` requires PyAudio, install it with `pip install pyaudio`.') from None
+        self._pyaudio = pyaudio
+        self.device_index = device_index
+        self.frames_per_buffer = frames_per_buffer
+        self._audio = None
+        self._stream = None
+        self._format: Optional[Tuple[int, int, int, int]] = None
+
+    def open(self, sample_rate: int, channels: int, sample_width: int, format_tag: int = _PCM) -> None:
+        if format_tag == _IEEE_FLOAT and sample_width == 4:
+            sample_format = self._pyaudio.paFloat32
+        elif format_tag == _PCM:
+            sample_format = self._pyaudio.get_format_from_width(sample_width, unsigned = sample_width == 1)
+        else:
+            raise ValueError(f'PyAudio cannot play {sample_width * 8}-bit audio with format tag {format_tag}.')
+        self.close()
+        self._audio = self._pyaudio.PyAudio()
+        self._stream = self._audio.open(
+            format = sample_format, channels = channels, rate = sample_rate, output = True,
+            output_device_index = self.device_index, frames_per_buffer = self.frames_per_buffer
+        )
+        self._format = sample_rate, channels, sample_width, format_tag
+
+    def write(self, frames: memoryview) -> None:
+        self._stream.write(bytes(frames))
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.stop_stream() # waits for the buffered frames to be played
+            self._stream.close()
+            self._stream = None
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+
+def default_sink() -> AudioSink:
+    """
+    Returns a `uberduck.PyAudioSink` if PyAudio is installed, otherwise a `uberduck.FFplaySink` if ffplay is found.
+
+    Raises:
+        `RuntimeError` - If neither is available.
+    """
+    try:
+        return PyAudioSink()
+    except ImportError:
+        pass
+    from shutil import which
+    if which('ffplay') is not None:
+        return FFplaySink()
+    raise RuntimeError('Streaming playback needs PyAudio (`pip install pyaudio`) or ffplay (part of ffmpeg). Use a `uberduck.FileSink` to play to a file or a pipe instead.')
+
+class Playback:
+    """
+    A clip in a `uberduck.PlaybackQueue`, returned by `PlaybackQueue.play` and `PlaybackQueue.open`.
+
+    Attributes:
+        `created (float)` - The `time.perf_counter` value when the clip was queued.
+        `started (float | None)` - The `time.perf_counter` value when its first frames were given to the sink, or None if they have not been yet.
+        `latency (float | None)` - The seconds between queueing the clip and its first frames being played.
+
+    Functions:
+        `write(chunk: bytes)` - Adds the next bytes of the WAV file. Never blocks, so it can be called from an event loop.
+        `finish(exception: BaseException = None)` - Marks the end of the WAV file, or stops the clip with `exception` if its audio could not be fetched.
+        `wait(timeout: float = None)` - Waits until the clip has been played, skipped or has failed, and returns whether it is done.
+        `exception()` - Returns the exception that stopped the clip, or None.
+        `done()` - Returns whether the clip has been played, skipped or has failed.
+        `cancelled()` - Returns whether the clip was skipped.
+        `cancel()` - Skips the clip, or stops it if it is playing. Returns False if it had already finished.
+
+    A playback can be awaited from any event loop, which waits until it is done.
+    """
+    __slots__ = ('created', 'started', '_chunks', '_future', '_error', '_stopped', '_feeder')
+
+    def __init__(self) -> None:
+        self.created = perf_counter()
+        self.started: Optional[float] = None
+        self._chunks: Queue = Queue()
+        self._future = Future()
+        self._error: Optional[BaseException] = None
+        self._stopped = False
+        self._feeder = None
+
+    @property
+    def latency(self) -> Optional[float]:
+        return None if self.started is None else self.started - self.created
+
+    def write(self, chunk: Union[bytes, bytearray, memoryview]) -> None:
+        """
+        Adds the next bytes of the WAV file, which are played as soon as its header and whole frames have arrived.
+        """
+        if chunk:
+            self._chunks.put(chunk)
+
+    def finish(self, exception: Optional[BaseException] = None) -> None:
+        """
+        Marks the end of the WAV file. With `exception`, the clip is stopped and the exception is kept as the one of the playback.
+        """
+        self._error = exception
+        self._chunks.put(None)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits up to `timeout` seconds until the clip has been played, skipped or has failed, and returns whether it is done.
+        """
+        try:
+            self._future.exception(timeout)
+        except Exception: # timed out or cancelled
+            pass
+        return self._future.done()
+
+    def exception(self) -> Optional[BaseException]:
+        """
+        Returns the exception that stopped the clip, or None if it has been played, skipped or is not done yet.
+        """
+        if not self._future.done() or self._future.cancelled():
+            return None
+        return self._future.exception()
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def cancelled(self) -> bool:
+        return self._stopped
+
+    def cancel(self) -> bool:
+        """
+        Skips the clip if it has not started yet, or stops it where it is. Returns False if it had already finished.
+        """
+        if self._future.done():
+            return False
+        self._stopped = True
+        self._future.cancel() # only succeeds while the clip is waiting for its turn
+        self._chunks.put(None) # wakes up the player if it is waiting for more bytes
+        return True
+
+    def __await__(self):
+        return wrap_future(self._future).__await__()
+
+    def __repr__(self):
+        status = 'cancelled' if self._stopped else 'done' if self._future.done() else 'playing' if self._future.running() else 'queued'
+        return f'<Playback status=\'{status}\' latency={self.latency}>'
+
+class PlaybackQueue:
+    """
+    Plays clips one after another on a background thread, starting each one as soon as its WAV header and first frames have arrived instead of after the whole download.
+    Queueing a clip never blocks: clips are played in the order they were queued while the next ones are still being generated and downloaded.
+
+    ```python
+    with uberduck.PlaybackQueue() as queue:
+        queue.play(your_instance.speak_stream("Hello", "zwf", chunk_size = 4096))
+        queue.play(your_instance.speak_stream("world", "zwf", chunk_size = 4096))
+    ```
+
+    Initialization parameters:
+        `sink (uberduck.AudioSink)` - Where the audio is played. Defaults to `uberduck.default_sink()`, PyAudio or ffplay. A `uberduck.FileSink` writes it to a file or a pipe instead.
+        `prebuffer_ms (float)` - The milliseconds of audio buffered before a clip starts, trading latency for fewer gaps on slow connections. Defaults to 0, starting with the first frames.
+
+    Functions:
+        `play(audio: bytes | uberduck.SpeechAudio | Iterable[bytes] | AsyncIterable[bytes])` - Queues a WAV file, or the chunks of one (like `speak_stream` and `speak_stream_async`), and returns a `uberduck.Playback`.
+        `open()` - Queues a clip whose bytes are given with `Playback.write` and `Playback.finish`, and returns its `uberduck.Playback`.
+        `skip()` - Stops the clip that is playing.
+        `clear()` - Skips every clip that has not started yet.
+        `join(timeout: float = None)` - Waits until every queued clip is done and returns whether they are.
+        `close(cancel: bool = False)` - Waits for the queued clips (or skips them if `cancel` is True), stops the thread and closes the sink. Called automatically when the queue is used as a context manager.
+
+    Attributes:
+        `pending (int)` - The number of clips that have not finished playing.
+    """
+    def __init__(self, sink: Optional[AudioSink] = None, *, prebuffer_ms: float = 0) -> None:
+        self.sink = sink if sink is not None else default_sink()
+        self.prebuffer_ms = prebuffer_ms
+        self._clips: Queue = Queue()
+        self._queued: List[Playback] = []
+        self._current: Optional[Playback] = None
+        self._format: Optional[Tuple[int, int, int, int]] = None
+        self._thread: Optional[Thread] = None
+        self._closed = False
+        self._lock = Lock()
+
+    def __repr__(self):
+        return f'<PlaybackQueue sink={self.sink!r} pending={self.pending}>'
+
+    def __enter__(self) -> 'PlaybackQueue':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            self._queued = [playback for playback in self._queued if not playback.done()]
+            return len(self._queued)
+
+    def open(self) -> Playback:
+        """
+        Queues a clip whose bytes are given with `Playback.write` and ended with `Playback.finish`, and returns it.
+        """
+        playback = Playback()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('The playback queue is closed.')
+            if self._thread is None:
+                self._thread = Thread(target = self._run, name = 'uberduck-playback', daemon = True)
+                self._thread.start()
+            self._queued = [queued for queued in self._queued if not queued.done()]
+            self._queued.append(playback)
+            self._clips.put(playback)
+        return playback
+
+    def play(self, audio: Union[bytes, bytearray, memoryview, SpeechAudio, Iterable[bytes], AsyncIterable[bytes]]) -> Playback:
+        """
+        Queues a WAV file and returns its `uberduck.Playback` without waiting for it.
+        `audio` can be the whole file, or an iterator or asynchronous iterator of its chunks, like `speak_stream` and `speak_stream_async`, which is read as the clip waits for its turn.
+        Asynchronous iterators are read by a task of the running event loop, other iterators by a new thread.
+        """
+        playback = self.open()
+        if isinstance(audio, SpeechAudio):
+            audio = audio._view
+        if isinstance(audio, (bytes, bytearray, memoryview)):
+            playback.write(audio)
+            playback.finish()
+        elif hasattr(audio, '__aiter__'):
+            playback._feeder = ensure_future(_feed_async(audio, playback))
+        else:
+            playback._feeder = Thread(target = _feed, args = (audio, playback), name = 'uberduck-playback-feeder', daemon = True)
+            playback._feeder.start()
+        return playback
+
+    def skip(self) -> None:
+        """
+        Stops the clip that is playing, if any.
+        """
+        current = self._current
+        if current is not None:
+            current.cancel()
+
+    def clear(self) -> None:
+        """
+        Skips every clip that has not started playing yet.
+        """
+        with self._lock:
+            queued = list(self._queued)
+        for playback in queued:
+            if playback is not self._current:
+                playback.cancel()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits up to `timeout` seconds until every queued clip has been played, skipped or has failed, and returns whether they all have.
+        Clips are finished in order, so this waits for the last one.
+        """
+        with self._lock:
+            last = self._queued[-1] if self._queued else None
+        return last is None or last.wait(timeout)
+
+    def close(self, cancel: bool = False) -> None:
+        """
+        Waits for the queued clips to be played, or skips them if `cancel` is True, then stops the playback thread and closes the sink.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            self._clips.put(None)
+        if cancel:
+            self.clear()
+            self.skip()
+        if thread is not None:
+            thread.join()
+        self.sink.close()
+
+    def _run(self) -> None:
+        while True:
+            playback = self._clips.get()
+            if playback is None:
+                return
+            if not playback._future.set_running_or_notify_cancel():
+                continue # skipped while it was waiting
+            self._current = playback
+            try:
+                self._play(playback)
+            except Exception as e:
+                log.warning('Could not play a clip: %r.', e)
+                playback._future.set_exception(e)
+            else:
+                if playback._error is not None and not playback._stopped:
+                    log.debug('A clip stopped because its audio could not be fetched: %r.', playback._error)
+                    playback._future.set_exception(playback._error)
+                else:
+                    playback._future.set_result(None)
+            finally:
+                self._current = None
+
+    def _play(self, playback: Playback) -> None:
+        """
+        A private function playing one clip, writing its frames to the sink as they arrive.
+        """
+        stream = _WavStream()
+        buffered: List[memoryview] = []
+        threshold = 0
+        while not playback._stopped:
+            chunk = playback._chunks.get()
+            if chunk is None or playback._stopped:
+                break
+            frames = stream.feed(chunk)
+            if not frames:
+                continue
+            if playback.started is None:
+                if not buffered:
+                    self._prepare(stream)
+                    threshold = round(stream.format[2] * self.prebuffer_ms / 1000) * stream.block_align
+                buffered.append(frames)
+                if sum(len(piece) for piece in buffered) < threshold:
+                    continue
+                frames = memoryview(b''.join(buffered))
+                buffered = []
+                playback.started = perf_counter()
+                log.debug('Started playing a clip %.1f ms after it was queued.', playback.latency * 1000)
+            self.sink.write(frames)
+        if buffered and not playback._stopped: # the clip is shorter than the buffer
+            playback.started = perf_counter()
+            self.sink.write(memoryview(b''.join(buffered)))
+        if stream.format is None and playback._error is None and not playback._stopped:
+            raise ValueError('The clip ended before the header of its WAV file.')
+
+    def _prepare(self, stream: _WavStream) -> None:
+        """
+        A private function opening the sink for the format of a clip, unless it is already open for that format.
+        """
+        if stream.format == self._format:
+            return
+        format_tag, channels, sample_rate, sample_width = stream.format
+        self.sink.open(sample_rate, channels, sample_width, format_tag)
+        self._format = stream.format
+
+def _feed(chunks: Iterable[bytes], playback: Playback) -> None:
+    """
+    A private function run by a feeder thread, reading the chunks of a clip into its playback.
+    """
+    iterator = iter(chunks)
+    try:
+        for chunk in iterator:
+            if playback._stopped:
+                break
+            playback.write(chunk)
+    except Exception as e:
+        playback.finish(e)
+    else:
+        playback.finish()
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            close() # stops a generator like `speak_stream` from downloading a skipped clip
+
+async def _feed_async(chunks: AsyncIterable[bytes], playback: Playback) -> None:
+    """
+    The asynchronous version of `_feed`, run as a task.
+    """
+    iterator = chunks.__aiter__()
+    try:
+        async for chunk in iterator:
+            if playback._stopped:
+                break
+            playback.write(chunk)
+    except Exception as e:
+        playback.finish(e)
+    else:
+        playback.finish()
+    finally:
+        close = getattr(iterator, 'aclose', None)
+        if close is not None:
+            await close()
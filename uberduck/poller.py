@@ -0,0 +1,354 @@
+"""
+Copyright 2022-present ImNimboss
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from asyncio import get_event_loop, gather, wait_for, Event, Semaphore, TimeoutError as AsyncTimeoutError
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Condition, Lock, Thread, current_thread
+from time import monotonic
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+try:
+    from concurrent.futures import InvalidStateError
+except ImportError:
+    from asyncio import InvalidStateError
+from uberduck.classes import TimedOut
+from uberduck.strategies import PollStrategy
+from logging import getLogger
+
+log = getLogger(__name__)
+
+_COALESCE_WINDOW: float = 0.05 # jobs due within this many seconds of each other are checked in the same round
+
+RetryHook = Callable[[Exception, int, Optional[float]], Optional[float]] # (exception, attempt, deadline) -> seconds to wait, or None to give up
+
+def _settle(future: Future, result: Any = None, exception: Optional[BaseException] = None) -> None:
+    """
+    A private function that resolves a future unless it was already resolved or cancelled by its owner.
+    """
+    if future.done():
+        return
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+class _PendingJob:
+    """
+    A private class holding the polling state of one submitted UUID.
+    """
+    __slots__ = ('uuid', 'future', 'strategy', 'speech', 'voice', 'started', 'deadline', 'timeout', 'next_check', 'polls', 'failures')
+
+    def __init__(
+        self,
+        uuid: str,
+        future,
+        strategy: PollStrategy,
+        timeout: Optional[float],
+        now: float,
+        speech: str = '',
+        voice: str = '',
+        time_left: Optional[float] = None
+    ) -> None:
+        self.uuid = uuid
+        self.future = future
+        self.strategy = strategy
+        self.speech = speech
+        self.voice = voice
+        self.timeout = timeout
+        self.started = now
+        if time_left is None:
+            time_left = timeout
+        self.deadline = None if time_left is None else now + time_left
+        self.next_check = self._clamp(now + strategy.first_delay(speech, voice))
+        self.polls = 0
+        self.failures = 0
+
+    def _clamp(self, next_check: float) -> float:
+        return next_check if self.deadline is None else min(next_check, self.deadline)
+
+    def reschedule(self, now: float) -> bool:
+        """
+        Schedules the next check, returning False if the job has run out of time.
+        """
+        if self.deadline is not None and now >= self.deadline:
+            return False
+        self.next_check = self._clamp(now + self.strategy.next_delay(self.polls, now - self.started))
+        return True
+
+    def retry(self, exception: Exception, retry: Optional[RetryHook], now: float) -> bool:
+        """
+        Schedules the check that failed with `exception` again if `retry` allows it, returning False if the exception should be raised. `failures` counts the failures in a row, so `retry` sees how many checks failed since the last successful one.
+        """
+        self.failures += 1
+        delay = None if retry is None else retry(exception, self.failures, self.deadline)
+        if delay is None:
+            return False
+        self.next_check = self._clamp(now + delay)
+        return True
+
+class _PollStats:
+    """
+    A private mixin counting the status checks done by a poller.
+    """
+    def _init_stats(self) -> None:
+        self._completed = 0
+        self._polls = 0
+        self._polls_per_job = Counter()
+        self._stats_lock = Lock()
+
+    def _count_poll(self, job: _PendingJob) -> None:
+        job.polls += 1
+        with self._stats_lock:
+            self._polls += 1
+
+    def _count_completion(self, job: _PendingJob, now: float) -> None:
+        with self._stats_lock:
+            self._completed += 1
+            self._polls_per_job[job.polls] += 1
+        job.strategy.record(job.speech, job.voice, now - job.started)
+        log.debug('Audio with UUID %s was ready after %s checks and %.2f seconds.', job.uuid, job.polls, now - job.started)
+
+    def stats(self) -> dict:
+        """
+        Returns the number of completed jobs, the number of status checks, and how many jobs needed each number of checks (`polls_per_job`).
+        """
+        with self._stats_lock:
+            return {
+                'pending': len(self._jobs),
+                'completed': self._completed,
+                'polls': self._polls,
+                'polls_per_job': dict(self._polls_per_job)
+            }
+
+class StatusPoller(_PollStats):
+    """
+    Polls `/speak-status` for every outstanding UUID of a synchronous client from one background thread.
+
+    Due jobs are checked together in rounds, with at most `concurrency` status requests in flight, and the
+    `concurrent.futures.Future` returned by `add` is resolved with the status data once its audio has a `path`.
+    A failed check is scheduled again if `retry` returns a delay for it, otherwise its exception is set on the future.
+    The background thread exits when there is nothing left to poll and is started again by the next `add`.
+    """
+    def __init__(self, check_status: Callable[[str], Union[dict, bool]], concurrency: int, retry: Optional[RetryHook] = None) -> None:
+        self._check_status = check_status
+        self._concurrency = concurrency
+        self._retry = retry
+        self._jobs: Dict[str, _PendingJob] = {}
+        self._condition = Condition()
+        self._thread: Optional[Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._init_stats()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def add(
+        self,
+        uuid: str,
+        strategy: PollStrategy,
+        timeout: Optional[float] = None,
+        speech: str = '',
+        voice: str = '',
+        time_left: Optional[float] = None
+    ) -> Future:
+        """
+        Starts polling for `uuid` on the schedule of `strategy` and returns a future that is resolved with its status data.
+        `timeout` is reported by `uberduck.TimedOut`, and polling stops after `time_left` seconds (what is left of `timeout` after the submission), defaulting to `timeout`.
+        """
+        with self._condition:
+            job = self._jobs.get(uuid)
+            if job is None:
+                job = self._jobs[uuid] = _PendingJob(uuid, Future(), strategy, timeout, monotonic(), speech, voice, time_left)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers = self._concurrency, thread_name_prefix = 'uberduck-poll')
+            if self._thread is None:
+                self._thread = Thread(target = self._run, name = 'uberduck-poller', daemon = True)
+                self._thread.start()
+            self._condition.notify()
+        return job.future
+
+    def close(self) -> None:
+        """
+        Cancels every outstanding job and releases the status-check threads.
+        """
+        with self._condition:
+            for job in self._jobs.values():
+                job.future.cancel()
+            self._jobs.clear()
+            self._condition.notify()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait = False)
+
+    def _check(self, job: _PendingJob) -> None:
+        self._count_poll(job)
+        try:
+            result = self._check_status(job.uuid)
+        except Exception as e:
+            if not job.retry(e, self._retry, monotonic()):
+                _settle(job.future, exception = e)
+            return
+        job.failures = 0 # only failures in a row use up the attempts
+        if result:
+            self._count_completion(job, monotonic())
+            _settle(job.future, result)
+        elif not job.reschedule(monotonic()):
+            log.error('Timed out after %s seconds while polling for audio with UUID %s.', job.timeout, job.uuid)
+            _settle(job.future, exception = TimedOut(job.uuid, job.timeout))
+
+    def _run(self) -> None:
+        try:
+            self._poll()
+        except Exception as e: # a bug must not leave the futures of the pending jobs unresolved forever
+            log.error('The status poller stopped unexpectedly: %r.', e)
+            with self._condition:
+                for job in self._jobs.values():
+                    _settle(job.future, exception = e)
+                self._jobs.clear()
+        finally:
+            with self._condition:
+                if self._thread is current_thread():
+                    self._thread = None
+
+    def _poll(self) -> None:
+        while True:
+            with self._condition:
+                for uuid in [uuid for uuid, job in self._jobs.items() if job.future.done()]:
+                    del self._jobs[uuid]
+                if not self._jobs or self._executor is None:
+                    self._thread = None
+                    return
+                now = monotonic()
+                earliest = min(job.next_check for job in self._jobs.values())
+                if earliest > now:
+                    self._condition.wait(earliest - now)
+                    continue
+                due = [job for job in self._jobs.values() if job.next_check <= now + _COALESCE_WINDOW]
+                executor = self._executor
+            log.debug('Checking status of %s of %s pending jobs.', len(due), len(self._jobs))
+            try:
+                futures = [executor.submit(self._check, job) for job in due]
+            except RuntimeError: # the poller was closed while collecting this round
+                with self._condition:
+                    self._thread = None
+                return
+            for job, future in zip(due, futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    log.error('Checking the status of audio with UUID %s failed unexpectedly: %r.', job.uuid, e)
+                    _settle(job.future, exception = e)
+
+class AsyncStatusPoller(_PollStats):
+    """
+    The asynchronous counterpart of `StatusPoller`. Every outstanding UUID of an event loop is polled from one task, with at
+    most `concurrency` status requests in flight, and the `asyncio.Future` returned by `add` is resolved with the status data.
+    Cancelling the returned future stops polling for that UUID.
+    """
+    def __init__(self, check_status: Callable[[str], Awaitable[Union[dict, bool]]], concurrency: int, retry: Optional[RetryHook] = None) -> None:
+        self._check_status = check_status
+        self._retry = retry
+        self._semaphore = Semaphore(concurrency)
+        self._jobs: Dict[str, _PendingJob] = {}
+        self._wakeup = Event()
+        self._task = None
+        self._init_stats()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def add(
+        self,
+        uuid: str,
+        strategy: PollStrategy,
+        timeout: Optional[float] = None,
+        speech: str = '',
+        voice: str = '',
+        time_left: Optional[float] = None
+    ):
+        """
+        Starts polling for `uuid` on the schedule of `strategy` and returns a future that is resolved with its status data. Must be called from the event loop.
+        `timeout` and `time_left` are the same as in `StatusPoller.add`.
+        """
+        loop = get_event_loop()
+        job = self._jobs.get(uuid)
+        if job is None:
+            job = self._jobs[uuid] = _PendingJob(uuid, loop.create_future(), strategy, timeout, loop.time(), speech, voice, time_left)
+        if self._task is None:
+            self._task = loop.create_task(self._run())
+        self._wakeup.set()
+        return job.future
+
+    def close(self) -> None:
+        """
+        Cancels every outstanding job and the polling task.
+        """
+        for job in self._jobs.values():
+            job.future.cancel()
+        self._jobs.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _check(self, job: _PendingJob) -> None:
+        async with self._semaphore:
+            if job.future.done():
+                return
+            self._count_poll(job)
+            try:
+                result = await self._check_status(job.uuid)
+            except Exception as e:
+                if not job.future.done() and not job.retry(e, self._retry, get_event_loop().time()):
+                    job.future.set_exception(e)
+                return
+            job.failures = 0
+        if job.future.done():
+            return
+        if result:
+            self._count_completion(job, get_event_loop().time())
+            job.future.set_result(result)
+        elif not job.reschedule(get_event_loop().time()):
+            log.error('Timed out after %s seconds while polling for audio with UUID %s.', job.timeout, job.uuid)
+            job.future.set_exception(TimedOut(job.uuid, job.timeout))
+
+    async def _run(self) -> None:
+        loop = get_event_loop()
+        try:
+            while True:
+                for uuid in [uuid for uuid, job in self._jobs.items() if job.future.done()]:
+                    del self._jobs[uuid]
+                if not self._jobs:
+                    return
+                now = loop.time()
+                earliest = min(job.next_check for job in self._jobs.values())
+                if earliest > now:
+                    self._wakeup.clear()
+                    try:
+                        await wait_for(self._wakeup.wait(), earliest - now)
+                    except AsyncTimeoutError:
+                        pass
+                    continue
+                due = [job for job in self._jobs.values() if job.next_check <= now + _COALESCE_WINDOW]
+                log.debug('Checking status of %s of %s pending jobs asynchronously.', len(due), len(self._jobs))
+                results = await gather(*(self._check(job) for job in due), return_exceptions = True)
+                for job, result in zip(due, results):
+                    if isinstance(result, Exception) and not job.future.done():
+                        log.error('Checking the status of audio with UUID %s failed unexpectedly: %r.', job.uuid, result)
+                        job.future.set_exception(result)
+        except Exception as e:
+            log.error('The asynchronous status poller stopped unexpectedly: %r.', e)
+            for job in self._jobs.values():
+                if not job.future.done():
+                    job.future.set_exception(e)
+            self._jobs.clear()
+        finally:
+            self._task = None
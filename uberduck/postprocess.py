@@ -0,0 +1,208 @@
+"""
+Copyright 2022-present ImNimboss
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from asyncio import AbstractEventLoop, get_event_loop, wrap_future
+from concurrent.futures import Future, ProcessPoolExecutor
+from io import BytesIO
+from math import isinf
+from threading import Lock
+from typing import Optional, Tuple
+import os
+from pydub import AudioSegment
+from pydub.silence import detect_leading_silence
+from logging import getLogger
+
+log = getLogger(__name__)
+
+class Step:
+    """
+    The base class of the steps of a `uberduck.Pipeline`. A step takes a `pydub.AudioSegment` and returns a new one.
+    Steps are sent to the worker processes, so subclasses must be picklable (defined at the top level of a module).
+    """
+    def apply(self, segment: AudioSegment) -> AudioSegment:
+        raise NotImplementedError
+
+class Resample(Step):
+    """
+    Converts the audio to `frame_rate` samples per second, and optionally to `channels` channels and `sample_width` bytes per sample.
+    """
+    def __init__(self, frame_rate: int, channels: Optional[int] = None, sample_width: Optional[int] = None) -> None:
+        self.frame_rate = frame_rate
+        self.channels = channels
+        self.sample_width = sample_width
+
+    def apply(self, segment: AudioSegment) -> AudioSegment:
+        if self.sample_width is not None:
+            segment = segment.set_sample_width(self.sample_width)
+        if self.channels is not None:
+            segment = segment.set_channels(self.channels)
+        return segment.set_frame_rate(self.frame_rate)
+
+    def __repr__(self):
+        return f'<Resample frame_rate={self.frame_rate} channels={self.channels} sample_width={self.sample_width}>'
+
+class Normalize(Step):
+    """
+    Changes the volume so that the average loudness is `target_dbfs`, without raising the loudest sample above `max_peak_dbfs`. Silent audio is left unchanged.
+    """
+    def __init__(self, target_dbfs: float = -20.0, max_peak_dbfs: float = -1.0) -> None:
+        self.target_dbfs = target_dbfs
+        self.max_peak_dbfs = max_peak_dbfs
+
+    def apply(self, segment: AudioSegment) -> AudioSegment:
+        if isinf(segment.dBFS):
+            return segment
+        gain = min(self.target_dbfs - segment.dBFS, self.max_peak_dbfs - segment.max_dBFS)
+        return segment.apply_gain(gain)
+
+    def __repr__(self):
+        return f'<Normalize target_dbfs={self.target_dbfs} max_peak_dbfs={self.max_peak_dbfs}>'
+
+class TrimSilence(Step):
+    """
+    Removes the leading and trailing audio quieter than `threshold_dbfs`, keeping `padding_ms` milliseconds of it on each side.
+    """
+    def __init__(self, threshold_dbfs: float = -50.0, padding_ms: int = 0, chunk_ms: int = 10) -> None:
+        self.threshold_dbfs = threshold_dbfs
+        self.padding_ms = padding_ms
+        self.chunk_ms = chunk_ms
+
+    def apply(self, segment: AudioSegment) -> AudioSegment:
+        start = detect_leading_silence(segment, self.threshold_dbfs, self.chunk_ms)
+        if start >= len(segment):
+            return segment[:0]
+        end = len(segment) - detect_leading_silence(segment.reverse(), self.threshold_dbfs, self.chunk_ms)
+        return segment[max(0, start - self.padding_ms):min(len(segment), end + self.padding_ms)]
+
+    def __repr__(self):
+        return f'<TrimSilence threshold_dbfs={self.threshold_dbfs} padding_ms={self.padding_ms}>'
+
+class Encode(Step):
+    """
+    The last step of a pipeline, choosing the format of its output (`wav` by default). Formats other than `wav` need ffmpeg.
+    `bitrate` (like `'128k'`) and `parameters` (extra ffmpeg arguments) are passed to `pydub.AudioSegment.export`.
+    """
+    def __init__(self, format: str = 'wav', bitrate: Optional[str] = None, parameters: Optional[Tuple[str, ...]] = None) -> None:
+        self.format = format
+        self.bitrate = bitrate
+        self.parameters = parameters
+
+    def apply(self, segment: AudioSegment) -> AudioSegment:
+        return segment
+
+    def export(self, segment: AudioSegment) -> bytes:
+        output = BytesIO()
+        segment.export(output, format = self.format, bitrate = self.bitrate, parameters = list(self.parameters) if self.parameters else None)
+        return output.getvalue()
+
+    def __repr__(self):
+        return f'<Encode format=\'{self.format}\' bitrate={self.bitrate!r}>'
+
+def _run(steps: Tuple[Step, ...], encode: Encode, data: bytes) -> bytes:
+    """
+    A private function running the steps of a pipeline on one WAV file, in a worker process or in the calling thread.
+    """
+    segment = AudioSegment(data = data) # parses the WAV header in place instead of going through a file object
+    for step in steps:
+        segment = step.apply(segment)
+    return encode.export(segment)
+
+class Pipeline:
+    """
+    A declarative chain of post-processing steps run on generated audio, used through the `postprocess` parameter of `speak`, `speak_async`, `speak_many` and `speak_many_async`.
+
+    ```python
+    pipeline = uberduck.Pipeline(uberduck.TrimSilence(padding_ms = 50), uberduck.Normalize(-18), uberduck.Resample(22050), uberduck.Encode('mp3', bitrate = '96k'))
+    ```
+
+    Initialization parameters:
+        `*steps (uberduck.Step)` - The steps, run in order. If the last one is an `uberduck.Encode`, it chooses the output format, otherwise the output is a WAV file.
+        `processes (int)` - The number of worker processes. The pool is started on first use and shared by every call. 0 runs the steps in the calling thread. Defaults to the number of CPUs.
+
+    Each clip is sent to a worker as one bytes object and the output comes back the same way, so a clip is copied once in each direction.
+
+    Functions:
+        `run(data: bytes)` - Runs the steps on a WAV file in the calling thread and returns the output.
+        `submit(data: bytes)` - Runs the steps in a worker process and returns a `concurrent.futures.Future` of the output.
+        `process(data: bytes)` - Runs the steps in a worker process (or in the calling thread if `processes` is 0) and waits for the output.
+        `process_async(data: bytes, asyncio_loop: AbstractEventLoop = None)` - The asynchronous version of `process`.
+        `close()` - Stops the worker processes. Called automatically when the pipeline is used as a context manager.
+    """
+    def __init__(self, *steps: Step, processes: Optional[int] = None) -> None:
+        if steps and isinstance(steps[-1], Encode):
+            self.encode = steps[-1]
+            steps = steps[:-1]
+        else:
+            self.encode = Encode()
+        if any(isinstance(step, Encode) for step in steps):
+            raise ValueError('`Encode` can only be the last step of a pipeline.')
+        self.steps = steps
+        self.processes = (os.cpu_count() or 1) if processes is None else processes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+
+    def __repr__(self):
+        return f'<Pipeline steps={list(self.steps) + [self.encode]} processes={self.processes}>'
+
+    def __enter__(self) -> 'Pipeline':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def format(self) -> str:
+        """
+        The format of the output, like `wav` or `mp3`.
+        """
+        return self.encode.format
+
+    def run(self, data: bytes) -> bytes:
+        """
+        Runs the steps on `data` (a WAV file) in the calling thread and returns the output.
+        """
+        return _run(self.steps, self.encode, data)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers = self.processes)
+                log.debug('Started %s post-processing processes.', self.processes)
+            return self._executor
+
+    def submit(self, data: bytes) -> Future:
+        """
+        Runs the steps on `data` in a worker process and returns a future of the output.
+        """
+        return self._pool().submit(_run, self.steps, self.encode, data)
+
+    def process(self, data: bytes) -> bytes:
+        """
+        Runs the steps on `data` in a worker process, or in the calling thread if `processes` is 0, and returns the output.
+        """
+        if not self.processes:
+            return self.run(data)
+        return self.submit(data).result()
+
+    async def process_async(self, data: bytes, asyncio_loop: AbstractEventLoop = None) -> bytes:
+        """
+        The asynchronous version of `process`. With `processes` set to 0, the steps run in the default executor of the event loop.
+        """
+        if not self.processes:
+            return await (asyncio_loop or get_event_loop()).run_in_executor(None, self.run, data)
+        return await wrap_future(self.submit(data), loop = asyncio_loop)
+
+    def close(self) -> None:
+        """
+        Stops the worker processes. They are started again by the next call.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,282 @@
+"""
+Copyright 2022-present ImNimboss
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from asyncio import sleep as async_sleep
+from contextlib import contextmanager
+from struct import Struct
+from threading import Lock
+from time import monotonic, sleep, time
+from typing import Dict, Iterator, List, Optional
+import os
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+from uberduck.classes import TimedOut
+from logging import getLogger
+
+log = getLogger(__name__)
+
+_STATE = Struct('<4d') # tokens, updated at, current rate, last rate cut
+
+class TokenBucket:
+    """
+    A token bucket allowing `rate` requests per second on average and bursts of up to `burst` requests.
+
+    Callers reserve a token and then sleep until it is theirs, so waiting callers are served in order without holding a lock.
+    The rate is halved (down to `min_rate`) when the API answers with a 429, at most once per second, and raised again by
+    `recovery` times `rate` after every successful request. A `Retry-After` delay pauses the bucket for that long.
+
+    Initialization parameters:
+        `rate (float)` - The number of requests per second allowed on average.
+        `burst (int)` - The number of requests that can be sent at once after a quiet period. Defaults to `rate` (at least 1).
+        `min_rate (float)` - The lowest rate the bucket slows down to. Defaults to a twentieth of `rate`.
+        `recovery (float)` - The fraction of `rate` added back after every successful request. Defaults to 0.05.
+        `path (str)` - The path of a file holding the state of the bucket, so that it is shared by every process using the same file. POSIX only. If not specified, the bucket is shared by the threads and tasks of this process only.
+        `offset (int)` - The position of this bucket's state in the file at `path`, so that several buckets can share one file. Defaults to 0.
+
+    Functions:
+        `acquire(max_wait: float = None)` - Waits until a request may be sent and returns the seconds waited. Raises `uberduck.TimedOut` instead if that would take longer than `max_wait`.
+        `acquire_async(max_wait: float = None)` - The asynchronous version of `acquire`.
+        `penalize(retry_after: float = None)` - Slows the bucket down after a 429.
+        `reward()` - Speeds the bucket back up after a successful request.
+        `stats()` - Returns the current rate, the available tokens, the number of callers waiting and counters.
+    """
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[int] = None,
+        *,
+        min_rate: Optional[float] = None,
+        recovery: float = 0.05,
+        path: Optional[str] = None,
+        offset: int = 0
+    ) -> None:
+        if rate <= 0:
+            raise ValueError('The rate of a token bucket must be positive.')
+        if path is not None and fcntl is None:
+            raise ValueError('Sharing a token bucket through a file is only supported on POSIX systems.')
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.min_rate = min_rate or rate / 20
+        self.recovery = recovery
+        self.path = path
+        self.offset = offset
+        self._lock = Lock()
+        self._local = [float(self.burst), self._now(), float(rate), 0.0]
+        self._descriptor: Optional[int] = None
+        self._descriptor_pid: Optional[int] = None
+        self._waiting = self._acquired = self._delayed = self._ratelimited = 0
+        self._waited = 0.0
+
+    def __repr__(self):
+        return f'<TokenBucket rate={self.rate} burst={self.burst} path={self.path!r}>'
+
+    def _now(self) -> float:
+        return monotonic() if self.path is None else time() # the monotonic clock is not comparable between processes
+
+    def _open(self) -> int:
+        if self._descriptor is None or self._descriptor_pid != os.getpid(): # a forked child must not share the parent's lock
+            self._descriptor = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._descriptor_pid = os.getpid()
+        return self._descriptor
+
+    @contextmanager
+    def _state(self) -> Iterator[List[float]]:
+        """
+        A private context manager yielding the mutable state of the bucket, locked against other threads and (with `path`) other processes.
+        """
+        with self._lock:
+            if self.path is None:
+                yield self._local
+                return
+            descriptor = self._open()
+            fcntl.flock(descriptor, fcntl.LOCK_EX)
+            try:
+                raw = os.pread(descriptor, _STATE.size, self.offset)
+                state = list(_STATE.unpack(raw)) if len(raw) == _STATE.size else [float(self.burst), self._now(), float(self.rate), 0.0]
+                before = list(state)
+                yield state
+                if state != before or len(raw) != _STATE.size:
+                    os.pwrite(descriptor, _STATE.pack(*state), self.offset)
+            finally:
+                fcntl.flock(descriptor, fcntl.LOCK_UN)
+
+    def _reserve(self, max_wait: Optional[float]) -> float:
+        """
+        A private function that takes the next token and returns the seconds until it may be used.
+        Raises `uberduck.TimedOut` without taking the token if that is longer than `max_wait` seconds.
+        """
+        with self._state() as state:
+            tokens, updated, rate, _ = state
+            now = self._now()
+            start = max(now, updated) # `updated` is in the future while the bucket is paused by a Retry-After
+            tokens = min(self.burst, tokens + (start - updated) * rate) - 1
+            delay = start - now + max(0.0, -tokens) / rate
+            if max_wait is not None and delay > max_wait:
+                log.debug('A request would wait %.2f seconds for the rate limit, longer than the %.2f seconds left.', delay, max_wait)
+                raise TimedOut(None, max_wait, 'rate_limit')
+            state[0], state[1] = tokens, start
+            self._acquired += 1
+            if delay > 0:
+                self._delayed += 1
+                self._waiting += 1
+        return delay
+
+    def _waited_for(self, started: float) -> float:
+        """
+        A private function that records the end of a wait that began at `started` (a `time.monotonic` value) and returns its length.
+        """
+        waited = monotonic() - started
+        with self._lock:
+            self._waiting -= 1
+            self._waited += waited
+        return waited
+
+    def acquire(self, max_wait: Optional[float] = None) -> float:
+        """
+        Waits until a request may be sent and returns the seconds it actually waited.
+        Raises `uberduck.TimedOut` right away, without using up a request, if that would take longer than `max_wait` seconds.
+        """
+        delay = self._reserve(max_wait)
+        if delay <= 0:
+            return 0.0
+        started = monotonic()
+        try:
+            sleep(delay)
+        finally:
+            waited = self._waited_for(started)
+        return waited
+
+    async def acquire_async(self, max_wait: Optional[float] = None) -> float:
+        """
+        The asynchronous version of `acquire`.
+        """
+        delay = self._reserve(max_wait)
+        if delay <= 0:
+            return 0.0
+        started = monotonic()
+        try:
+            await async_sleep(delay)
+        finally:
+            waited = self._waited_for(started)
+        return waited
+
+    def penalize(self, retry_after: Optional[float] = None) -> None:
+        """
+        Slows the bucket down after the API answered with a 429, pausing it for `retry_after` seconds if given.
+        """
+        with self._state() as state:
+            now = self._now()
+            if now - state[3] >= 1: # a wave of 429s from one burst only counts once
+                state[2] = max(self.min_rate, state[2] / 2)
+                state[3] = now
+            state[0] = min(state[0], 0.0)
+            if retry_after:
+                state[1] = max(state[1], now + retry_after)
+            rate = state[2]
+            self._ratelimited += 1
+        log.debug('Rate-limited by the API, slowing down to %.2f requests per second (Retry-After %s).', rate, retry_after)
+
+    def reward(self) -> None:
+        """
+        Speeds the bucket back up towards `rate` after a successful request.
+        """
+        if self.path is None and self._local[2] >= self.rate:
+            return
+        with self._state() as state:
+            if state[2] < self.rate:
+                state[2] = min(self.rate, state[2] + self.rate * self.recovery)
+
+    def stats(self) -> dict:
+        """
+        Returns the `rate` currently allowed, the configured `max_rate`, the available `tokens` (negative when callers are queued),
+        the number of callers `waiting` in this process, and the number of `acquired` and `delayed` requests, the total
+        `wait_seconds` and the number of 429s (`ratelimited`) so far in this process.
+        """
+        with self._state() as state:
+            tokens, updated, rate, _ = state
+            now = self._now()
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * rate)
+        return {
+            'rate': rate,
+            'max_rate': self.rate,
+            'tokens': tokens,
+            'waiting': self._waiting,
+            'acquired': self._acquired,
+            'delayed': self._delayed,
+            'wait_seconds': self._waited,
+            'ratelimited': self._ratelimited
+        }
+
+class RateLimiter:
+    """
+    A client-side rate limiter for `UberDuck(..., rate_limiter = RateLimiter(...))`, with one `TokenBucket` for speech submissions (`/speak`) and one for status checks (`/speak-status`).
+
+    Requests wait for their bucket before being sent, so bursts are spread out instead of being rejected by the API. A 429
+    response slows the bucket of its endpoint down and honours the `Retry-After` header, and status checks answered with a
+    429 are simply checked again later instead of failing the job.
+
+    Initialization parameters:
+        `speak_rate (float)` - The number of submissions per second allowed on average. Defaults to 2.
+        `status_rate (float)` - The number of status checks per second allowed on average. Defaults to 10.
+        `speak_burst (int)` - The burst size of submissions. Defaults to `speak_rate`.
+        `status_burst (int)` - The burst size of status checks. Defaults to `status_rate`.
+        `path (str)` - The path of a file holding the state of both buckets, so that every process using the same file shares the budget. POSIX only. If not specified, the budget is shared by this process only.
+
+    Attributes:
+        `speak` - The `TokenBucket` of submissions.
+        `status` - The `TokenBucket` of status checks.
+
+    Functions:
+        `stats()` - Returns the `stats()` of both buckets, under `speak` and `status`.
+    """
+    def __init__(
+        self,
+        speak_rate: float = 2,
+        status_rate: float = 10,
+        *,
+        speak_burst: Optional[int] = None,
+        status_burst: Optional[int] = None,
+        path: Optional[str] = None
+    ) -> None:
+        self.path = path
+        self.speak = TokenBucket(speak_rate, speak_burst, path = path, offset = 0)
+        self.status = TokenBucket(status_rate, status_burst, path = path, offset = _STATE.size)
+        self._buckets: Dict[str, TokenBucket] = {'speak': self.speak, 'status': self.status}
+
+    def __repr__(self):
+        return f'<RateLimiter speak_rate={self.speak.rate} status_rate={self.status.rate} path={self.path!r}>'
+
+    def acquire(self, endpoint: str, max_wait: Optional[float] = None) -> float:
+        """
+        Waits for the bucket of `endpoint` (`speak` or `status`). See `TokenBucket.acquire`.
+        """
+        return self._buckets[endpoint].acquire(max_wait)
+
+    async def acquire_async(self, endpoint: str, max_wait: Optional[float] = None) -> float:
+        """
+        The asynchronous version of `acquire`.
+        """
+        return await self._buckets[endpoint].acquire_async(max_wait)
+
+    def observe(self, endpoint: str, status_code: int, retry_after: Optional[float] = None) -> None:
+        """
+        Adapts the bucket of `endpoint` to the status code of a response.
+        """
+        if status_code == 429:
+            self._buckets[endpoint].penalize(retry_after)
+        elif 200 <= status_code <= 299:
+            self._buckets[endpoint].reward()
+
+    def stats(self) -> dict:
+        """
+        Returns the `stats()` of both buckets, under `speak` and `status`.
+        """
+        return {endpoint: bucket.stats() for endpoint, bucket in self._buckets.items()}
@@ -0,0 +1,178 @@
+"""
+Copyright 2022-present ImNimboss
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from asyncio import sleep as async_sleep
+from random import uniform
+from threading import Lock
+from time import monotonic, sleep
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Type, TypeVar
+import sys
+from requests.exceptions import ConnectionError as RequestsConnectionError, ChunkedEncodingError
+from uberduck.classes import HTTPException, Ratelimited
+from logging import getLogger
+
+log = getLogger(__name__)
+
+T = TypeVar('T')
+
+CONNECTION_ERRORS: Tuple[Type[BaseException], ...] = (ConnectionError, RequestsConnectionError, ChunkedEncodingError)
+
+def _async_connection_errors() -> Tuple[Type[BaseException], ...]:
+    """
+    A private function returning the connection errors of aiohttp, or nothing if it has not been imported yet (in which case none of its errors can have been raised).
+    aiohttp is only imported by the asynchronous functions, so that importing uberduck does not pay for it.
+    """
+    aiohttp = sys.modules.get('aiohttp')
+    return () if aiohttp is None else (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)
+
+class RetryPolicy:
+    """
+    Decides which failed requests are sent again and when, used through `UberDuck(..., retry_policy = RetryPolicy())`.
+    Submissions, status checks and downloads are retried; invalid voices, invalid credentials and timeouts never are.
+    A submission that failed after it was sent (a reset connection, for example) may already have been accepted, so retrying it can generate the audio twice.
+
+    Initialization parameters:
+        `attempts (dict)` - The maximum number of attempts (the first one included) for each exception class. The most specific class of an exception is used. Defaults to 3 for `uberduck.HTTPException`, 4 for `uberduck.Ratelimited` and 3 for connection errors.
+        `statuses (tuple)` - The status codes of `uberduck.HTTPException` that are retried. Defaults to 408, 500, 502, 503 and 504.
+        `initial (float)` - The number of seconds to wait before the first retry. Defaults to 0.5.
+        `factor (float)` - The wait is multiplied by this after every retry. Defaults to 2.
+        `maximum (float)` - The maximum number of seconds to wait between attempts. Defaults to 10.
+        `jitter (float)` - Every wait is randomly spread by up to this fraction. Defaults to 0.1.
+        `budget (float)` - The number of retries that can be spent before successful requests earn more, so that an outage does not multiply the load on the API. Defaults to 10.
+        `budget_ratio (float)` - The number of retries earned by every successful request, up to `budget`. Defaults to 0.2.
+
+    A `Retry-After` delay given with a 429 is waited for even if it is longer than the backoff.
+
+    Functions:
+        `delay(exception: Exception, attempt: int, deadline: float = None)` - Returns the number of seconds to wait before attempt `attempt + 1`, or None if the exception should be raised.
+        `record_success()` - Earns back part of the budget after a successful request.
+        `call(function: Callable, deadline: float = None)` - Calls `function` until it succeeds or should not be retried.
+        `call_async(function: Callable, deadline: float = None)` - The asynchronous version of `call`, for a function returning an awaitable.
+        `stats()` - Returns the number of retries, the number of errors that were not retried because the budget was spent, and the budget left.
+    """
+    def __init__(
+        self,
+        attempts: Optional[Dict[Type[BaseException], int]] = None,
+        *,
+        statuses: Tuple[int, ...] = (408, 500, 502, 503, 504),
+        initial: float = 0.5,
+        factor: float = 2,
+        maximum: float = 10,
+        jitter: float = 0.1,
+        budget: float = 10,
+        budget_ratio: float = 0.2
+    ) -> None:
+        self._default_attempts = attempts is None
+        if attempts is None:
+            attempts = {HTTPException: 3, Ratelimited: 4}
+            attempts.update((error, 3) for error in CONNECTION_ERRORS + _async_connection_errors())
+        self.attempts = attempts
+        self.statuses = statuses
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+        self.jitter = jitter
+        self.budget = budget
+        self.budget_ratio = budget_ratio
+        self._tokens = budget
+        self._retries = self._exhausted = 0
+        self._lock = Lock()
+
+    def __repr__(self):
+        return f'<RetryPolicy initial={self.initial} factor={self.factor} maximum={self.maximum} budget={self.budget}>'
+
+    def max_attempts(self, exception: BaseException) -> int:
+        """
+        Returns the maximum number of attempts for requests failing with `exception`, 1 meaning that it is not retried.
+        """
+        if isinstance(exception, HTTPException) and exception.status_code not in self.statuses:
+            return 1
+        if self._default_attempts:
+            for error in _async_connection_errors(): # aiohttp may have been imported after the policy was created
+                self.attempts.setdefault(error, 3)
+        for error in type(exception).__mro__:
+            if error in self.attempts:
+                return self.attempts[error]
+        return 1
+
+    def delay(self, exception: BaseException, attempt: int, deadline: Optional[float] = None) -> Optional[float]:
+        """
+        Returns the number of seconds to wait before sending attempt number `attempt + 1` after `exception`, or None if it should be raised instead.
+        `deadline` is a `time.monotonic` value that the next attempt has to start before.
+        """
+        if attempt >= self.max_attempts(exception):
+            return None
+        delay = min(self.maximum, self.initial * self.factor ** (attempt - 1))
+        if self.jitter:
+            delay *= uniform(1 - self.jitter, 1 + self.jitter)
+        retry_after = getattr(exception, 'retry_after', None)
+        if retry_after:
+            delay = max(delay, retry_after)
+        if deadline is not None and monotonic() + delay >= deadline:
+            return None
+        with self._lock:
+            if self._tokens < 1:
+                self._exhausted += 1
+                log.debug('Not retrying %r, the retry budget is spent.', exception)
+                return None
+            self._tokens -= 1
+            self._retries += 1
+        log.debug('Retrying after %r in %.2f seconds (attempt %s).', exception, delay, attempt + 1)
+        return delay
+
+    def record_success(self) -> None:
+        """
+        Earns back `budget_ratio` retries, up to `budget`, after a successful request.
+        """
+        if self._tokens < self.budget:
+            with self._lock:
+                self._tokens = min(self.budget, self._tokens + self.budget_ratio)
+
+    def call(self, function: Callable[[], T], deadline: Optional[float] = None) -> T:
+        """
+        Calls `function` until it returns, waiting between attempts, and raises the last exception once it should not be retried.
+        """
+        attempt = 1
+        while True:
+            try:
+                result = function()
+            except Exception as e:
+                delay = self.delay(e, attempt, deadline)
+                if delay is None:
+                    raise
+                sleep(delay)
+                attempt += 1
+                continue
+            self.record_success()
+            return result
+
+    async def call_async(self, function: Callable[[], Awaitable[T]], deadline: Optional[float] = None) -> T:
+        """
+        The asynchronous version of `call`. `function` is called again for every attempt and must return a new awaitable each time.
+        """
+        attempt = 1
+        while True:
+            try:
+                result = await function()
+            except Exception as e:
+                delay = self.delay(e, attempt, deadline)
+                if delay is None:
+                    raise
+                await async_sleep(delay)
+                attempt += 1
+                continue
+            self.record_success()
+            return result
+
+    def stats(self) -> dict:
+        """
+        Returns the number of `retries` so far, the number of errors that were raised because the budget was spent (`exhausted`), and the `budget` left.
+        """
+        with self._lock:
+            return {'retries': self._retries, 'exhausted': self._exhausted, 'budget': self._tokens}
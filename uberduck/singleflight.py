@@ -0,0 +1,128 @@
+"""
+Copyright 2022-present ImNimboss
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from asyncio import CancelledError, ensure_future, shield, wait_for, wrap_future
+from concurrent.futures import Future
+from threading import Lock
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+from logging import getLogger
+
+log = getLogger(__name__)
+
+T = TypeVar('T')
+
+class _Call:
+    """
+    A private class holding the shared future of one in-flight call and the number of callers attached to it.
+    """
+    __slots__ = ('future', 'followers')
+
+    def __init__(self) -> None:
+        self.future = Future()
+        self.followers = 0
+
+class SingleFlight:
+    """
+    Coalesces identical calls that are in flight at the same time, used through `UberDuck(..., single_flight = SingleFlight())`.
+    The first call for a key (the leader) does the work; calls for the same key made before it finishes wait for it and get the same result or exception, from any thread or event loop.
+
+    Functions:
+        `do(key: Hashable, function: Callable, timeout: float = None)` - Calls `function`, or waits up to `timeout` seconds for the identical call in flight, and returns its result.
+        `do_async(key: Hashable, function: Callable, timeout: float = None)` - The asynchronous version of `do`, for a function returning an awaitable.
+        `stats()` - Returns the number of calls in flight, the number of calls that did the work and the number of calls that were coalesced into them.
+
+    A follower that times out or is cancelled does not affect the others. If an asynchronous leader is cancelled, the work goes on for its followers, and is only cancelled if it has none.
+    """
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = Lock()
+        self._leaders = self._coalesced = 0
+
+    def __repr__(self):
+        return f'<SingleFlight in_flight={len(self._calls)} leaders={self._leaders} coalesced={self._coalesced}>'
+
+    def _join(self, key: Hashable) -> Tuple[_Call, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self._coalesced += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            self._leaders += 1
+            return call, True
+
+    def _leave(self, call: _Call) -> None:
+        with self._lock:
+            call.followers -= 1
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def do(self, key: Hashable, function: Callable[[], T], timeout: Optional[float] = None) -> T:
+        """
+        Calls `function` and returns its result, unless an identical call for `key` is in flight, in which case its result is waited for up to `timeout` seconds and returned.
+        Raises `concurrent.futures.TimeoutError` if the call in flight takes longer than `timeout`.
+        """
+        call, leader = self._join(key)
+        if not leader:
+            log.debug('Coalesced a call into the one in flight for %r.', key)
+            try:
+                return call.future.result(timeout)
+            finally:
+                self._leave(call)
+        try:
+            result = function()
+        except BaseException as e:
+            self._forget(key, call)
+            call.future.set_exception(e)
+            raise
+        self._forget(key, call)
+        call.future.set_result(result)
+        return result
+
+    async def do_async(self, key: Hashable, function: Callable[[], Awaitable[T]], timeout: Optional[float] = None) -> T:
+        """
+        The asynchronous version of `do`. Raises `asyncio.TimeoutError` if the call in flight takes longer than `timeout`.
+        """
+        call, leader = self._join(key)
+        if not leader:
+            log.debug('Coalesced an asynchronous call into the one in flight for %r.', key)
+            try:
+                return await wait_for(shield(wrap_future(call.future)), timeout)
+            finally:
+                self._leave(call) # a follower that gave up must not keep a cancelled leader's work alive
+        task = ensure_future(function())
+        task.add_done_callback(lambda task: self._settle(key, call, task))
+        try:
+            return await shield(task)
+        except CancelledError:
+            with self._lock:
+                if not call.followers:
+                    self._calls.pop(key, None)
+                    task.cancel()
+            raise
+
+    def _settle(self, key: Hashable, call: _Call, task) -> None:
+        self._forget(key, call)
+        if task.cancelled():
+            call.future.cancel()
+        elif task.exception() is not None:
+            call.future.set_exception(task.exception())
+        else:
+            call.future.set_result(task.result())
+
+    def stats(self) -> dict:
+        """
+        Returns the number of calls `in_flight`, the number of `leaders` that did the work and the number of calls that were `coalesced` into them.
+        """
+        with self._lock:
+            return {'in_flight': len(self._calls), 'leaders': self._leaders, 'coalesced': self._coalesced}
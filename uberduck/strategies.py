@@ -0,0 +1,151 @@
+"""
+Copyright 2022-present ImNimboss
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from random import uniform
+from threading import Lock
+from typing import Dict, Optional, Union
+
+class PollStrategy:
+    """
+    The base class of the strategies that decide when the status of a pending audio is checked.
+
+    Functions:
+        `first_delay(speech: str, voice: str)` - Returns the number of seconds to wait before the first check. Defaults to 0.
+        `next_delay(polls: int, elapsed: float)` - Returns the number of seconds to wait before the next check, given the number of checks done so far and the seconds since submission.
+        `record(speech: str, voice: str, latency: float)` - Called with the number of seconds an audio took to be generated. Does nothing by default.
+    """
+    def first_delay(self, speech: str, voice: str) -> float:
+        return 0
+
+    def next_delay(self, polls: int, elapsed: float) -> float:
+        raise NotImplementedError
+
+    def record(self, speech: str, voice: str, latency: float) -> None:
+        pass
+
+class FixedInterval(PollStrategy):
+    """
+    Checks right away and then every `interval` seconds. This is what the `check_every` argument uses.
+    """
+    def __init__(self, interval: Union[int, float] = 1) -> None:
+        self.interval = interval
+
+    def next_delay(self, polls: int, elapsed: float) -> float:
+        return self.interval
+
+    def __repr__(self):
+        return f'<FixedInterval interval={self.interval}>'
+
+class ExponentialBackoff(PollStrategy):
+    """
+    Waits `initial` seconds before the first check and multiplies the wait by `factor` after every check, up to `maximum` seconds.
+    Every wait is randomly spread by up to `jitter` (a fraction of the wait) so that many jobs do not check at the same moment.
+    """
+    def __init__(
+        self,
+        initial: float = 0.5,
+        factor: float = 2,
+        maximum: float = 10,
+        jitter: float = 0.1
+    ) -> None:
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+        self.jitter = jitter
+
+    def _spread(self, delay: float) -> float:
+        return delay * uniform(1 - self.jitter, 1 + self.jitter) if self.jitter else delay
+
+    def first_delay(self, speech: str, voice: str) -> float:
+        return self._spread(self.initial)
+
+    def next_delay(self, polls: int, elapsed: float) -> float:
+        return self._spread(min(self.maximum, self.initial * self.factor ** polls))
+
+    def __repr__(self):
+        return f'<ExponentialBackoff initial={self.initial} factor={self.factor} maximum={self.maximum} jitter={self.jitter}>'
+
+class _LatencyModel:
+    """
+    A private class fitting `latency = intercept + slope * length` by least squares, with older samples decaying by `decay` per sample.
+    """
+    __slots__ = ('decay', 'n', 'x', 'y', 'xx', 'xy')
+
+    def __init__(self, decay: float) -> None:
+        self.decay = decay
+        self.n = self.x = self.y = self.xx = self.xy = 0.0
+
+    def add(self, length: float, latency: float) -> None:
+        d = self.decay
+        self.n = self.n * d + 1
+        self.x = self.x * d + length
+        self.y = self.y * d + latency
+        self.xx = self.xx * d + length * length
+        self.xy = self.xy * d + length * latency
+
+    def predict(self, length: float) -> Optional[float]:
+        if not self.n:
+            return None
+        mean_x, mean_y = self.x / self.n, self.y / self.n
+        variance = self.xx / self.n - mean_x * mean_x
+        if variance <= 1e-9: # every sample had the same length
+            return mean_y
+        slope = (self.xy / self.n - mean_x * mean_y) / variance
+        return max(0.0, mean_y + slope * (length - mean_x))
+
+class AdaptivePolling(PollStrategy):
+    """
+    Learns how long audio takes to be generated for each voice and length of speech, and schedules the first check just before the expected completion.
+    After that, checks follow `fallback` (an `ExponentialBackoff` starting at 0.25 seconds by default). Until anything has been learned, the first check is done right away.
+
+    Initialization parameters:
+        `lead (float)` - The fraction of the expected time to wait before the first check. Defaults to 0.9.
+        `decay (float)` - How much each older latency sample counts relative to the next one. Defaults to 0.95.
+        `fallback (PollStrategy)` - The strategy used after the first check.
+    """
+    def __init__(
+        self,
+        lead: float = 0.9,
+        decay: float = 0.95,
+        fallback: Optional[PollStrategy] = None
+    ) -> None:
+        self.lead = lead
+        self.decay = decay
+        self.fallback = fallback or ExponentialBackoff(initial = 0.25, factor = 1.5, maximum = 5)
+        self._voices: Dict[str, _LatencyModel] = {}
+        self._overall = _LatencyModel(decay)
+        self._lock = Lock()
+
+    def expected_latency(self, speech: str, voice: str) -> Optional[float]:
+        """
+        Returns the expected number of seconds for the audio to be generated, or None if nothing has been learned yet.
+        """
+        with self._lock:
+            model = self._voices.get(voice.lower())
+            if model is None:
+                model = self._overall
+            return model.predict(len(speech))
+
+    def first_delay(self, speech: str, voice: str) -> float:
+        expected = self.expected_latency(speech, voice)
+        return 0 if expected is None else expected * self.lead
+
+    def next_delay(self, polls: int, elapsed: float) -> float:
+        return self.fallback.next_delay(polls - 1, elapsed)
+
+    def record(self, speech: str, voice: str, latency: float) -> None:
+        with self._lock:
+            model = self._voices.get(voice.lower())
+            if model is None:
+                model = self._voices[voice.lower()] = _LatencyModel(self.decay)
+            model.add(len(speech), latency)
+            self._overall.add(len(speech), latency)
+
+    def __repr__(self):
+        return f'<AdaptivePolling lead={self.lead} decay={self.decay} voices={len(self._voices)}>'